@@ -0,0 +1,86 @@
+# blog/body_stats.py
+"""
+Härledd metadata för blogginlägg, beräknad från body-StreamFieldens
+rådata (JSON) – inga block deserialiseras och inga bilder slås upp.
+
+Körs från BlogPost.save(), så listningar, sök och flöden kan läsa
+färdiga fält i stället för att gå igenom body vid varje request.
+"""
+import html
+import math
+import re
+
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+# --- Konfiguration ---
+WORDS_PER_MINUTE = 200      # lästakt för svensk löptext
+EXCERPT_LENGTH = 300        # tecken i utdraget
+
+WORD_RE = re.compile(r"\w+")
+# Wagtails lagringsformat för rich text: <embed embedtype="image" id="3"/>, <a linktype="document" id="5">
+RICHTEXT_IMAGE_RE = re.compile(r'<embed\b[^>]*\bembedtype="image"[^>]*\bid="(\d+)"')
+RICHTEXT_DOCUMENT_RE = re.compile(r'<a\b[^>]*\blinktype="document"[^>]*\bid="(\d+)"')
+
+
+# Blockelement i rich text – blir mellanslag, så stycken inte klistras ihop
+BLOCK_END_RE = re.compile(r"</(?:p|h\d|li|blockquote)>|<br\s*/?>", re.IGNORECASE)
+
+
+def _text(value):
+    text = html.unescape(strip_tags(BLOCK_END_RE.sub(" ", value or "")))
+    return " ".join(text.split())
+
+
+def _add(ids, value):
+    if value and int(value) not in ids:
+        ids.append(int(value))
+
+
+def analyze_body(raw_data):
+    """
+    Går igenom body-blocken (rådata) och returnerar en dict med
+    word_count, reading_time, excerpt, table_of_contents, image_ids och
+    document_ids.
+    """
+    texts, excerpt_parts, toc = [], [], []
+    image_ids, document_ids = [], []
+
+    for block in raw_data or []:
+        block_type, value = block.get("type"), block.get("value")
+
+        if block_type == "heading":
+            title = _text(value)
+            texts.append(title)
+            if title:
+                toc.append({"anchor": f"h-{block.get('id')}", "title": title})
+
+        elif block_type == "paragraph":
+            text = _text(value)
+            texts.append(text)
+            excerpt_parts.append(text)
+            for image_id in RICHTEXT_IMAGE_RE.findall(value or ""):
+                _add(image_ids, image_id)
+            for document_id in RICHTEXT_DOCUMENT_RE.findall(value or ""):
+                _add(document_ids, document_id)
+
+        elif block_type == "quote":
+            texts.append(_text(value))
+
+        elif block_type == "image":
+            _add(image_ids, value)
+
+        elif block_type == "video":
+            _add(document_ids, value)
+
+    word_count = sum(len(WORD_RE.findall(text)) for text in texts)
+    excerpt = " ".join(part for part in excerpt_parts if part)
+
+    return {
+        "word_count": word_count,
+        "reading_time": max(1, math.ceil(word_count / WORDS_PER_MINUTE)),
+        "excerpt": Truncator(excerpt).chars(EXCERPT_LENGTH),
+        "table_of_contents": toc,
+        "image_ids": image_ids,
+        "document_ids": document_ids,
+    }
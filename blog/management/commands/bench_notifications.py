@@ -0,0 +1,84 @@
+import resource
+import secrets
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from wagtail.models import Site
+
+from blog.models import BlogPost, BlogSubscriber, BlogPostNotification
+from blog.tasks import deliver_blogpost_notification
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Mäter tid och minne för blogg-utskicket vid olika antal prenumeranter. '
+        'Allt körs i en transaktion som rullas tillbaka, och mailen skickas '
+        'till en dummy-backend.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            nargs='+',
+            type=int,
+            default=[1000, 10000, 100000],
+            help='Antal prenumeranter per körning (default: 1000 10000 100000)',
+        )
+        parser.add_argument(
+            '--email-backend',
+            default='django.core.mail.backends.dummy.EmailBackend',
+            help='Mail-backend att mäta mot (default: dummy)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'Prenumeranter':>14} {'Tid (s)':>10} {'Mail/s':>10} {'Peak heap (MB)':>15} {'Max RSS (MB)':>13}")
+
+        for size in options['sizes']:
+            # DEBUG=False så att Django inte sparar varje SQL-fråga i minnet
+            with override_settings(EMAIL_BACKEND=options['email_backend'], DEBUG=False):
+                elapsed, peak = self.run_size(size)
+
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            rate = size / elapsed if elapsed else 0
+            self.stdout.write(f"{size:>14} {elapsed:>10.2f} {rate:>10.0f} {peak / 1024 / 1024:>15.1f} {max_rss:>13.1f}")
+
+    def run_size(self, size):
+        try:
+            with transaction.atomic():
+                # Bara benchmark-prenumeranterna ska få utskicket
+                BlogSubscriber.objects.filter(active=True).update(active=False)
+                BlogSubscriber.objects.bulk_create(
+                    (
+                        BlogSubscriber(
+                            email=f"bench-{i}@example.invalid",
+                            unsubscribe_token=secrets.token_urlsafe(32),
+                        )
+                        for i in range(size)
+                    ),
+                    batch_size=1000,
+                )
+
+                root = Site.objects.get(is_default_site=True).root_page
+                post = BlogPost(title='Benchmark', slug=f'bench-{secrets.token_hex(4)}', intro='Benchmark')
+                root.add_child(instance=post)
+                notification = BlogPostNotification.objects.create(post=post)
+
+                tracemalloc.start()
+                start = time.perf_counter()
+                deliver_blogpost_notification.call(notification.pk)
+                elapsed = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                raise Rollback
+        except Rollback:
+            pass
+
+        return elapsed, peak
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import BlogPostNotification
+from blog.tasks import deliver_blogpost_notification
+
+
+class Command(BaseCommand):
+    help = 'Återupptar blogg-utskick som inte är klara (t.ex. efter en krasch)'
+
+    # Jobb som redan kör eller väntar på omförsök är ofarliga att köa igen:
+    # varje mottagare tas över (blog.tasks.claim_chunk) innan den får mail.
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--now',
+            action='store_true',
+            help='Kör utskicken direkt i den här processen i stället för att köa dem',
+        )
+
+    def handle(self, *args, **options):
+        pending = BlogPostNotification.objects.filter(completed_at__isnull=True).order_by('pk')
+
+        count = 0
+        for notification in pending:
+            if options['now']:
+                deliver_blogpost_notification.call(notification.pk)
+            else:
+                deliver_blogpost_notification.enqueue(notification.pk)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f'✓ {count} utskick återupptagna'))
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:24
+
+import django.db.models.deletion
+import wagtail.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_alter_blogpost_date'),
+        ('wagtaildocs', '0014_alter_document_file_size'),
+        ('wagtailimages', '0027_image_description'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlogSubscriber',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('active', models.BooleanField(default=True)),
+                ('unsubscribe_token', models.CharField(editable=False, max_length=64, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='blogindexpage',
+            name='hero_image',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtailimages.image', verbose_name='Hero-bild'),
+        ),
+        migrations.AddField(
+            model_name='blogindexpage',
+            name='hero_video',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtaildocs.document'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='send_notification',
+            field=models.BooleanField(default=True, help_text='Om ikryssad skickas mail till prenumeranter när inlägget publiceras första gången.', verbose_name='Skicka prenumerationsmail'),
+        ),
+        migrations.AlterField(
+            model_name='blogindexpage',
+            name='intro',
+            field=wagtail.fields.RichTextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='blogpost',
+            name='body',
+            field=wagtail.fields.StreamField([('heading', 0), ('paragraph', 1), ('image', 2), ('quote', 3), ('video', 4)], block_lookup={0: ('wagtail.blocks.CharBlock', (), {'form_classname': 'title', 'label': 'Rubrik'}), 1: ('wagtail.blocks.RichTextBlock', (), {'label': 'Paragraf'}), 2: ('wagtail.images.blocks.ImageChooserBlock', (), {'label': 'Bild'}), 3: ('wagtail.blocks.BlockQuoteBlock', (), {'label': 'Citat'}), 4: ('wagtail.documents.blocks.DocumentChooserBlock', (), {})}, verbose_name='Innehåll'),
+        ),
+        migrations.CreateModel(
+            name='BlogPostNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sent_at', models.DateTimeField(auto_now_add=True)),
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='notification_entry', to='blog.blogpost')),
+            ],
+        ),
+    ]
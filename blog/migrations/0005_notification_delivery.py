@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_existing_notifications_completed(apps, schema_editor):
+    # Utskick loggade före leveransköen har redan gått ut i sin helhet
+    BlogPostNotification = apps.get_model('blog', 'BlogPostNotification')
+    BlogPostNotification.objects.filter(completed_at__isnull=True).update(
+        recipients_ready=True,
+        completed_at=F('sent_at'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_blogsubscriber_blogindexpage_hero_image_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpostnotification',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='blogpostnotification',
+            name='recipients_ready',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='BlogNotificationDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Väntar'), ('sent', 'Skickat'), ('failed', 'Misslyckades')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='blog.blogpostnotification')),
+                ('subscriber', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='blog.blogsubscriber')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['notification', 'status', 'id'], name='blog_blogno_notific_bdb46e_idx')],
+                'constraints': [models.UniqueConstraint(fields=('notification', 'subscriber'), name='blog_delivery_unique_recipient')],
+            },
+        ),
+        migrations.RunPython(mark_existing_notifications_completed, migrations.RunPython.noop),
+    ]
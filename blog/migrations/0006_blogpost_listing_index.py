@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_notification_delivery'),
+        ('wagtailcore', '0095_groupsitepermission'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['-date', '-page_ptr'], name='blog_blogpo_date_ceb36d_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:58
+
+from django.db import migrations, models
+
+from blog.body_stats import analyze_body
+
+
+def compute_body_stats(apps, schema_editor):
+    # Befintliga inlägg – nya räknas i BlogPost.save()
+    BlogPost = apps.get_model('blog', 'BlogPost')
+    posts = []
+    for post in BlogPost.objects.only('page_ptr', 'body').iterator(chunk_size=200):
+        for field, value in analyze_body(list(post.body.raw_data)).items():
+            setattr(post, field, value)
+        posts.append(post)
+    BlogPost.objects.bulk_update(
+        posts,
+        ['word_count', 'reading_time', 'excerpt', 'table_of_contents', 'image_ids', 'document_ids'],
+        batch_size=200,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_blogpost_listing_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='document_ids',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='Dokument i innehållet'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='Utdrag'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='image_ids',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='Bilder i innehållet'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='table_of_contents',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='Innehållsförteckning'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Antal ord'),
+        ),
+        migrations.AlterField(
+            model_name='blogpost',
+            name='reading_time',
+            field=models.IntegerField(default=5, editable=False, help_text='Beräknas från innehållet när inlägget sparas', verbose_name='Läsningstid (minuter)'),
+        ),
+        migrations.RunPython(compute_body_stats, migrations.RunPython.noop),
+    ]
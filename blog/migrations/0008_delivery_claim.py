@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_blogpost_body_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blognotificationdelivery',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='blognotificationdelivery',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Väntar'), ('sending', 'Skickas'), ('sent', 'Skickat'), ('failed', 'Misslyckades')], default='pending', max_length=10),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 00:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_delivery_claim'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='blogpost',
+            name='reading_time',
+            field=models.IntegerField(db_index=True, default=5, editable=False, help_text='Beräknas från innehållet när inlägget sparas', verbose_name='Läsningstid (minuter)'),
+        ),
+        migrations.AlterField(
+            model_name='blogpost',
+            name='word_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='Antal ord'),
+        ),
+    ]
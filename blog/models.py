@@ -1,7 +1,11 @@
 # blog/models.py
 
 import secrets
+from datetime import datetime, timedelta, timezone as dt_timezone
+
 from django.db import models
+from django.db.models import Q
+from django.http import Http404
 from django.utils import timezone
 from django.urls import reverse
 
@@ -16,6 +20,28 @@ from wagtail.documents.models import Document
 
 from core.models import BasePage
 
+from .body_stats import analyze_body
+
+# --- Konfiguration för blogglistan ---
+POSTS_PER_PAGE = 12
+# Kolumner som listningen (kortet) faktiskt använder
+LISTING_FIELDS = ("title", "slug", "url_path", "path", "depth", "date", "intro")
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_cursor(post):
+    """Markör för keyset-paginering: publiceringsdatum (µs) och id, t.ex. "1735732800000000-42"."""
+    return f"{(post.date - _EPOCH) // timedelta(microseconds=1)}-{post.pk}"
+
+
+def decode_cursor(cursor):
+    """Tolkar en markör från encode_cursor(). Ogiltig markör ger 404."""
+    try:
+        micros, pk = cursor.split("-")
+        return _EPOCH + timedelta(microseconds=int(micros)), int(pk)
+    except (ValueError, OverflowError):
+        raise Http404("Ogiltig sida")
+
 
 class BlogIndexPage(BasePage):
     hero_image = models.ForeignKey(
@@ -42,13 +68,37 @@ class BlogIndexPage(BasePage):
     ]
 
     def get_posts(self):
-        return BlogPost.objects.live().descendant_of(self).order_by('-date')
+        return BlogPost.objects.live().descendant_of(self).order_by('-date', '-pk')
+
+    def get_posts_page(self, after=None):
+        """
+        En sida av listningen med keyset-paginering på (date, id): samma
+        kostnad oavsett hur långt in i arkivet man är. `after` är markören
+        från förra sidan. Returnerar (inlägg, markör för nästa sida eller None).
+        """
+        posts = self.get_posts().only(*LISTING_FIELDS)
+        if after:
+            date, pk = decode_cursor(after)
+            posts = posts.filter(Q(date__lt=date) | Q(date=date, pk__lt=pk))
+
+        # En extra rad avgör om det finns fler – ingen COUNT behövs
+        posts = list(posts[:POSTS_PER_PAGE + 1])
+        if len(posts) > POSTS_PER_PAGE:
+            posts = posts[:POSTS_PER_PAGE]
+            return posts, encode_cursor(posts[-1])
+        return posts, None
 
     def get_context(self, request):
         ctx = super().get_context(request)
-        ctx['posts'] = self.get_posts()
+        ctx['posts'], ctx['next_cursor'] = self.get_posts_page(request.GET.get('after'))
         return ctx
 
+    def get_template(self, request, *args, **kwargs):
+        # "Visa fler" (HTMX) får bara nästa kort + knappen, hela sidan annars
+        if request.headers.get('HX-Target') == 'blog-posts':
+            return 'blog/partials/post_page.html'
+        return super().get_template(request, *args, **kwargs)
+
     class Meta:
         verbose_name = "Blogg"
 
@@ -76,8 +126,10 @@ class BlogPost(BasePage):
 
     reading_time = models.IntegerField(
         default=5,
+        editable=False,
+        db_index=True,
         verbose_name="Läsningstid (minuter)",
-        help_text="Uppskattad läsningstid i minuter"
+        help_text="Beräknas från innehållet när inlägget sparas"
     )
 
     # ✅ kontroll om det ska skickas utskick
@@ -95,15 +147,25 @@ class BlogPost(BasePage):
         ('video', DocumentChooserBlock()),
     ], use_json_field=True, verbose_name="Innehåll")
 
+    # --- Härledd metadata (beräknas från body vid save, se blog.body_stats) ---
+    # word_count och reading_time (ovan) har index för filtrering/sortering; övriga läses per inlägg
+    word_count = models.PositiveIntegerField(default=0, editable=False, db_index=True, verbose_name="Antal ord")
+    excerpt = models.TextField(blank=True, editable=False, verbose_name="Utdrag")
+    table_of_contents = models.JSONField(default=list, blank=True, editable=False, verbose_name="Innehållsförteckning")
+    image_ids = models.JSONField(default=list, blank=True, editable=False, verbose_name="Bilder i innehållet")
+    document_ids = models.JSONField(default=list, blank=True, editable=False, verbose_name="Dokument i innehållet")
+
+    # Vikter i PostgreSQL-sökningen: titel (2) A, ingress B, brödtext C
     search_fields = Page.search_fields + [
-        index.SearchField('intro'),
-        index.SearchField('body'),
+        index.SearchField('intro', boost=1.5),
+        index.SearchField('body', boost=1),
+        index.FilterField('reading_time'),
+        index.FilterField('word_count'),
     ]
 
     content_panels = Page.content_panels + [
         FieldPanel('date'),
         FieldPanel('author_name'),
-        FieldPanel('reading_time'),
         FieldPanel('intro'),
         FieldPanel('send_notification'),
         FieldPanel('body'),
@@ -112,6 +174,26 @@ class BlogPost(BasePage):
     class Meta:
         verbose_name = "Blogginlägg"
         verbose_name_plural = "Blogginlägg"
+        indexes = [
+            # Listningens sortering och keyset-paginering (date, id)
+            models.Index(fields=["-date", "-page_ptr"]),
+        ]
+
+    def update_body_stats(self):
+        """Räknar om den härledda metadatan från body. Returnerar fälten som ändrats."""
+        stats = analyze_body(self.body.get_prep_value())
+        for field, value in stats.items():
+            setattr(self, field, value)
+        return list(stats)
+
+    def save(self, *args, **kwargs):
+        # Publicering och vanliga sparningar; save_revision() rör inte body
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "body" in update_fields:
+            fields = self.update_body_stats()
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, *fields}
+        super().save(*args, **kwargs)
 
 
 class BlogSubscriber(models.Model):
@@ -151,5 +233,65 @@ class BlogPostNotification(models.Model):
     )
     sent_at = models.DateTimeField(auto_now_add=True)
 
+    # Sätts när mottagarlistan har frusits (BlogNotificationDelivery-rader skapade)
+    recipients_ready = models.BooleanField(default=False)
+
+    # Sätts när inga leveranser längre väntar – då är utskicket klart
+    completed_at = models.DateTimeField(null=True, blank=True)
+
     def __str__(self):
         return f"Notification for {self.post.title} @ {self.sent_at:%Y-%m-%d %H:%M}"
+
+
+class BlogNotificationDelivery(models.Model):
+    """
+    Leveransstatus per mottagare för ett utskick.
+    Gör att bakgrundsjobbet kan fortsätta där det slutade efter en krasch
+    utan att skicka dubbletter.
+    """
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Väntar"),
+        (STATUS_SENDING, "Skickas"),
+        (STATUS_SENT, "Skickat"),
+        (STATUS_FAILED, "Misslyckades"),
+    ]
+
+    notification = models.ForeignKey(
+        BlogPostNotification,
+        on_delete=models.CASCADE,
+        related_name="deliveries",
+    )
+    subscriber = models.ForeignKey(
+        BlogSubscriber,
+        on_delete=models.CASCADE,
+        related_name="deliveries",
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # Sätts när ett jobb tar över mottagaren, så två workers aldrig skickar samma mail
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["notification", "subscriber"],
+                name="blog_delivery_unique_recipient",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["notification", "status", "id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.subscriber_id} → {self.notification_id} ({self.status})"
@@ -0,0 +1,264 @@
+# blog/tasks.py
+from contextlib import closing
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.mail import get_connection, EmailMessage
+from django.db import transaction
+from django.db.models import F, Q
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils import timezone
+
+from django_tasks import task, default_task_backend
+
+from .models import BlogSubscriber, BlogPostNotification, BlogNotificationDelivery
+
+
+# --- Konfiguration för utskick ---
+NOTIFICATION_CHUNK_SIZE = 200       # antal mottagare per SMTP-connection
+NOTIFICATION_MAX_ATTEMPTS = 3       # försök per mottagare innan vi ger upp
+NOTIFICATION_RETRY_MINUTES = 10     # väntetid innan misslyckade försöks igen
+NOTIFICATION_STALE_MINUTES = 15     # "skickas" längre än så = workern dog, försök igen
+
+
+def get_post_urls(post):
+    """Returnerar (post_url, root_url) för ett inlägg."""
+    url_parts = post.get_url_parts()
+    if url_parts:
+        _, root_url, relative_url = url_parts
+        return root_url + relative_url, root_url
+
+    base = getattr(settings, "BASE_URL", "").rstrip("/")
+    return f"{base or 'https://harpans.se'}{post.url}", base
+
+
+def snapshot_recipients(notification):
+    """
+    Fryser mottagarlistan: en BlogNotificationDelivery per aktiv prenumerant.
+    Körs en gång per utskick, så nya prenumeranter efter publicering
+    får inte ett gammalt inlägg.
+    """
+    with transaction.atomic():
+        notification = (
+            BlogPostNotification.objects.select_for_update()
+            .get(pk=notification.pk)
+        )
+        if notification.recipients_ready:
+            return notification
+
+        subscriber_ids = (
+            BlogSubscriber.objects.filter(active=True)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+            .iterator(chunk_size=NOTIFICATION_CHUNK_SIZE)
+        )
+        # bulk_create gör om sitt argument till en lista, så vi matar den
+        # bit för bit för att inte ha hela listan i minnet.
+        while batch := list(islice(subscriber_ids, NOTIFICATION_CHUNK_SIZE)):
+            BlogNotificationDelivery.objects.bulk_create(
+                [BlogNotificationDelivery(notification=notification, subscriber_id=pk) for pk in batch],
+                ignore_conflicts=True,
+            )
+        notification.recipients_ready = True
+        notification.save(update_fields=["recipients_ready"])
+
+    return notification
+
+
+class NotificationMail:
+    """
+    Förkompilerat utskick: mallen renderas EN gång per inlägg med en
+    platshållare för avanmälningstoken, som sedan byts ut per mottagare.
+    """
+    TOKEN_PLACEHOLDER = "__UNSUBSCRIBE_TOKEN__"
+
+    def __init__(self, post, post_url, root_url):
+        unsubscribe_url = root_url + reverse("blog_unsubscribe", args=[self.TOKEN_PLACEHOLDER])
+
+        self.subject = f"Nytt inlägg: {post.title}"
+        self.body = get_template("blog/email/new_post.txt").render({
+            "post": post,
+            "post_url": post_url,
+            "unsubscribe_url": unsubscribe_url,
+        })
+
+    def build(self, email, token, connection):
+        return EmailMessage(
+            subject=self.subject,
+            body=self.body.replace(self.TOKEN_PLACEHOLDER, token),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[email],
+            connection=connection,
+        )
+
+
+def mark_delivery(pk, attempts, error=None):
+    """Sparar utfallet för en mottagare direkt efter att mailet gått iväg (eller inte)."""
+    if error is None:
+        BlogNotificationDelivery.objects.filter(pk=pk).update(
+            status=BlogNotificationDelivery.STATUS_SENT,
+            attempts=F("attempts") + 1,
+            sent_at=timezone.now(),
+        )
+        return
+    BlogNotificationDelivery.objects.filter(pk=pk).update(
+        attempts=F("attempts") + 1,
+        last_error=repr(error)[:1000],
+        status=(
+            BlogNotificationDelivery.STATUS_FAILED
+            if attempts + 1 >= NOTIFICATION_MAX_ATTEMPTS
+            else BlogNotificationDelivery.STATUS_PENDING
+        ),
+    )
+
+
+def send_delivery_chunk(mail, deliveries):
+    """
+    Skickar en bit av utskicket. `deliveries` är tupler (pk, attempts,
+    email, token). Varje mottagare markeras direkt efter sitt mail, så en
+    krasch ger högst de mail som just var på väg som dubbletter.
+
+    Med PooledSMTPBackend går hela biten till send_iter(), som sprider den
+    på EMAIL_POOL_PARALLEL connections och lämnar ut utfallet per mail.
+    Andra backends får ett mail i taget över EN connection.
+
+    Går det inte att ansluta räknas ett försök för hela biten, raderna
+    lämnas tillbaka som väntande (eller misslyckade) och False returneras.
+    """
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        for pk, attempts, email, token in deliveries:
+            mark_delivery(pk, attempts, e)
+        return False
+    try:
+        if hasattr(connection, "send_iter"):
+            # Mailen kommer tillbaka i den ordning de blir klara
+            messages, delivery = [], {}
+            for pk, attempts, email, token in deliveries:
+                message = mail.build(email, token, connection)
+                messages.append(message)
+                delivery[id(message)] = (pk, attempts)
+            with closing(connection.send_iter(messages)) as results:
+                for message, sent, error in results:
+                    mark_delivery(*delivery[id(message)], error)
+            return True
+
+        for pk, attempts, email, token in deliveries:
+            try:
+                mail.build(email, token, connection).send()
+            except Exception as e:
+                mark_delivery(pk, attempts, e)
+            else:
+                mark_delivery(pk, attempts)
+        return True
+    finally:
+        connection.close()
+
+
+def _claimable(notification):
+    """Leveranser som får tas över: väntande, eller "skickas" hos en worker som dött."""
+    stale = timezone.now() - timedelta(minutes=NOTIFICATION_STALE_MINUTES)
+    return BlogNotificationDelivery.objects.filter(notification=notification).filter(
+        Q(status=BlogNotificationDelivery.STATUS_PENDING)
+        | Q(status=BlogNotificationDelivery.STATUS_SENDING, claimed_at__lt=stale)
+    )
+
+
+def claim_chunk(notification, last_pk=0, chunk_size=NOTIFICATION_CHUNK_SIZE):
+    """
+    Tar över nästa bit leveranser efter `last_pk` (status "skickas"), så
+    att två jobb för samma utskick aldrig skickar till samma mottagare.
+    Returnerar (sista genomsökta pk, tupler (pk, attempts, email, token))
+    för de rader som det här jobbet fick – eller (None, []) när inget finns kvar.
+
+    SELECT ... FOR UPDATE SKIP LOCKED hoppar över rader som ett annat jobb
+    håller på att ta, och UPDATE:n kräver att raden fortfarande är ledig.
+    """
+    with transaction.atomic():
+        pks = list(
+            _claimable(notification)
+            .filter(pk__gt=last_pk)
+            .select_for_update(skip_locked=True)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:chunk_size]
+        )
+        if not pks:
+            return None, []
+        now = timezone.now()
+        _claimable(notification).filter(pk__in=pks).update(
+            status=BlogNotificationDelivery.STATUS_SENDING,
+            claimed_at=now,
+        )
+
+    claimed = list(
+        BlogNotificationDelivery.objects.filter(
+            pk__in=pks,
+            status=BlogNotificationDelivery.STATUS_SENDING,
+            claimed_at=now,
+        )
+        .order_by("pk")
+        .values_list("pk", "attempts", "subscriber__email", "subscriber__unsubscribe_token")
+    )
+    return pks[-1], claimed
+
+
+def iter_claimed_chunks(notification, chunk_size=NOTIFICATION_CHUNK_SIZE):
+    """
+    Tar över och lämnar ut väntande leveranser i bitar med
+    keyset-paginering och bara de kolumner som behövs, så minnet är
+    konstant oavsett listans storlek. En cursor framåt gör också att
+    mottagare som misslyckas i den här körningen inte plockas upp igen direkt.
+    """
+    last_pk = 0
+    while True:
+        last_pk, chunk = claim_chunk(notification, last_pk, chunk_size)
+        if last_pk is None:
+            return
+        if chunk:
+            yield chunk
+
+
+@task()
+def deliver_blogpost_notification(notification_id):
+    """
+    Bakgrundsjobb: skickar ett utskick i bitar om NOTIFICATION_CHUNK_SIZE.
+    Jobbet är idempotent – körs det igen fortsätter det med de mottagare
+    som fortfarande väntar. Varje bit tas över (claim_chunk) innan den
+    skickas, så flera jobb för samma utskick kan köra samtidigt.
+    """
+    try:
+        notification = BlogPostNotification.objects.select_related("post").get(pk=notification_id)
+    except BlogPostNotification.DoesNotExist:
+        return
+
+    if notification.completed_at:
+        return
+
+    notification = snapshot_recipients(notification)
+    post = notification.post
+    mail = NotificationMail(post, *get_post_urls(post))
+
+    for chunk in iter_claimed_chunks(notification):
+        if not send_delivery_chunk(mail, chunk):
+            # Mailservern svarar inte – resten får vänta till omförsöket
+            break
+
+    # Väntande (misslyckade) eller under utskick hos ett annat jobb
+    unfinished = BlogNotificationDelivery.objects.filter(
+        notification=notification,
+        status__in=[BlogNotificationDelivery.STATUS_PENDING, BlogNotificationDelivery.STATUS_SENDING],
+    )
+    if unfinished.exists():
+        # Försök igen senare – schemalägg om backenden stödjer det,
+        # annars plockas de upp av `send_pending_notifications`.
+        if default_task_backend.supports_defer:
+            deliver_blogpost_notification.using(
+                run_after=timezone.now() + timedelta(minutes=NOTIFICATION_RETRY_MINUTES),
+            ).enqueue(notification.pk)
+        return
+
+    BlogPostNotification.objects.filter(pk=notification.pk).update(completed_at=timezone.now())
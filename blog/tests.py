@@ -1,3 +1,300 @@
-from django.test import TestCase
+import importlib
+from datetime import timedelta
+from smtplib import SMTPServerDisconnected
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from blog import tasks
+from blog.body_stats import EXCERPT_LENGTH, analyze_body
+from blog.models import BlogNotificationDelivery, BlogPost, BlogPostNotification, BlogSubscriber
+from core import mail as pooled_mail
+from core.perf import PerfTestCase, build_site
+from core.smtp_stub import LocalSMTPServer
+
+
+class BlogBudgetTests(PerfTestCase):
+    """Query-budgetar för bloggen med ett realistiskt antal inlägg."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.pages = build_site(blog_posts=500)
+
+    def test_blog_index(self):
+        self.assertBudget("page.blog_index", self.measure(self.pages["blog"].url), queries=16)
+
+    def test_blog_index_deep_page(self):
+        # Sista sidan i arkivet ska kosta lika mycket som den första
+        from blog.models import encode_cursor
+        post = self.pages["blog"].get_posts()[480]
+        url = f"{self.pages['blog'].url}?after={encode_cursor(post)}"
+        self.assertBudget("page.blog_index.deep", self.measure(url), queries=16)
+
+    def test_blog_index_load_more(self):
+        response = self.client.get(self.pages["blog"].url)
+        cursor = response.context["next_cursor"]
+        result = self.measure(f"{self.pages['blog'].url}?after={cursor}", HTTP_HX_REQUEST="true", HTTP_HX_TARGET="blog-posts")
+        self.assertBudget("htmx.blog_load_more", result, queries=7)
+
+    def test_blog_post(self):
+        self.assertBudget("page.blog_post", self.measure(self.pages["post"].url), queries=16)
+
+    def test_subscribe(self):
+        result = self.measure("/api/blog/subscribe/", "post", {"email": "kund@example.se"})
+        self.assertBudget("api.blog_subscribe", result, queries=1)
+
+    def test_unsubscribe(self):
+        subscriber = BlogSubscriber.objects.create(email="kund@example.se")
+        result = self.measure(subscriber.get_unsubscribe_url())
+        self.assertBudget("url.blog_unsubscribe", result, queries=10)
+
+
+class WorkerCrash(BaseException):
+    """Workern dör mitt i utskicket (fångas inte av `except Exception`)."""
+
+
+class FlakyBackend(EmailBackend):
+    """
+    locmem-backend som vägrar mail till adresserna i `failing`, låter
+    workern krascha före mail nummer `crash_at` (räknat från 1) och
+    inte går att ansluta till när `down` är satt.
+    """
+    failing = set()
+    crash_at = None
+    down = False
+
+    def open(self):
+        if self.down:
+            raise ConnectionRefusedError("Connection refused")
+        return super().open()
+
+    def send_messages(self, messages):
+        for message in messages:
+            if self.crash_at is not None and len(mail.outbox) + 1 >= self.crash_at:
+                raise WorkerCrash()
+            if set(message.to) & self.failing:
+                raise SMTPServerDisconnected("421 Service not available")
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND="blog.tests.FlakyBackend")
+class NotificationDeliveryTests(TestCase):
+    """Utskicket: frusen mottagarlista, återupptag utan dubbletter, omförsök och claims."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.post = build_site(blog_posts=1, team_members=0)["post"]
+        cls.subscribers = [BlogSubscriber.objects.create(email=f"kund{i}@example.se") for i in range(5)]
+
+    def setUp(self):
+        FlakyBackend.failing = set()
+        FlakyBackend.crash_at = None
+        FlakyBackend.down = False
+        self.notification = BlogPostNotification.objects.create(post=self.post)
+
+    def deliver(self):
+        tasks.deliver_blogpost_notification.call(self.notification.pk)
+        self.notification.refresh_from_db()
+
+    def recipients(self):
+        return sorted(message.to[0] for message in mail.outbox)
+
+    def test_sends_once_per_subscriber(self):
+        self.deliver()
+        self.assertEqual(self.recipients(), sorted(s.email for s in self.subscribers))
+        self.assertIsNotNone(self.notification.completed_at)
+
+        # Ett klart utskick skickar inget igen
+        self.deliver()
+        self.assertEqual(len(mail.outbox), len(self.subscribers))
+
+    def test_recipient_list_is_frozen(self):
+        tasks.snapshot_recipients(self.notification)
+        BlogSubscriber.objects.create(email="ny@example.se")
+        self.deliver()
+        self.assertNotIn("ny@example.se", self.recipients())
+
+    def test_resume_does_not_resend(self):
+        tasks.snapshot_recipients(self.notification)
+        done = self.notification.deliveries.order_by("pk")[:2]
+        BlogNotificationDelivery.objects.filter(pk__in=[d.pk for d in done]).update(
+            status=BlogNotificationDelivery.STATUS_SENT, attempts=1, sent_at=timezone.now(),
+        )
+        self.deliver()
+        self.assertEqual(self.recipients(), sorted(s.email for s in self.subscribers[2:]))
+        self.assertIsNotNone(self.notification.completed_at)
+
+    def test_crash_mid_chunk_does_not_resend(self):
+        FlakyBackend.crash_at = 3
+        with self.assertRaises(WorkerCrash):
+            self.deliver()
+        self.assertEqual(len(mail.outbox), 2)
+        # De två skickade är markerade direkt, inte först i slutet av biten
+        self.assertEqual(self.notification.deliveries.filter(status=BlogNotificationDelivery.STATUS_SENT).count(), 2)
+
+        # Nästa körning efter att claimen blivit inaktuell
+        FlakyBackend.crash_at = None
+        FlakyBackend.down = False
+        self.notification.deliveries.filter(status=BlogNotificationDelivery.STATUS_SENDING).update(
+            claimed_at=timezone.now() - timedelta(minutes=tasks.NOTIFICATION_STALE_MINUTES + 1),
+        )
+        self.deliver()
+        self.assertEqual(self.recipients(), sorted(s.email for s in self.subscribers))
+        self.assertIsNotNone(self.notification.completed_at)
+
+    def test_retries_until_max_attempts(self):
+        FlakyBackend.failing = {"kund1@example.se"}
+        for attempt in range(1, tasks.NOTIFICATION_MAX_ATTEMPTS + 1):
+            self.deliver()
+            delivery = self.notification.deliveries.get(subscriber=self.subscribers[1])
+            self.assertEqual(delivery.attempts, attempt)
+            if attempt < tasks.NOTIFICATION_MAX_ATTEMPTS:
+                self.assertEqual(delivery.status, BlogNotificationDelivery.STATUS_PENDING)
+                self.assertIsNone(self.notification.completed_at)
+
+        self.assertEqual(delivery.status, BlogNotificationDelivery.STATUS_FAILED)
+        self.assertIn("421", delivery.last_error)
+        self.assertIsNotNone(self.notification.completed_at)
+        # Övriga fick sitt mail exakt en gång
+        self.assertEqual(len(mail.outbox), len(self.subscribers) - 1)
+
+    def test_connect_failure_releases_rows_and_retries(self):
+        FlakyBackend.down = True
+        task = tasks.deliver_blogpost_notification
+        with mock.patch.object(tasks, "deliver_blogpost_notification") as retry, \
+                mock.patch.object(tasks.default_task_backend, "supports_defer", True):
+            task.call(self.notification.pk)
+
+        deliveries = self.notification.deliveries.all()
+        self.assertEqual(
+            {(d.status, d.attempts) for d in deliveries},
+            {(BlogNotificationDelivery.STATUS_PENDING, 1)},
+        )
+        self.assertIn("Connection refused", deliveries[0].last_error)
+        self.assertEqual(mail.outbox, [])
+        retry.using.return_value.enqueue.assert_called_once_with(self.notification.pk)
+
+        # Servern är tillbaka – nästa körning skickar allt
+        FlakyBackend.down = False
+        self.deliver()
+        self.assertEqual(len(mail.outbox), len(self.subscribers))
+        self.assertIsNotNone(self.notification.completed_at)
+
+    def test_claimed_rows_are_skipped_until_stale(self):
+        tasks.snapshot_recipients(self.notification)
+        taken = self.notification.deliveries.get(subscriber=self.subscribers[0])
+        # Ett annat jobb håller på med mottagaren
+        BlogNotificationDelivery.objects.filter(pk=taken.pk).update(
+            status=BlogNotificationDelivery.STATUS_SENDING, claimed_at=timezone.now(),
+        )
+        self.deliver()
+        self.assertNotIn("kund0@example.se", self.recipients())
+        self.assertIsNone(self.notification.completed_at)
+
+        # Workern dog – efter NOTIFICATION_STALE_MINUTES tas raden över
+        BlogNotificationDelivery.objects.filter(pk=taken.pk).update(
+            claimed_at=timezone.now() - timedelta(minutes=tasks.NOTIFICATION_STALE_MINUTES + 1),
+        )
+        self.deliver()
+        self.assertEqual(self.recipients().count("kund0@example.se"), 1)
+        self.assertIsNotNone(self.notification.completed_at)
+
+    def test_claim_is_exclusive(self):
+        tasks.snapshot_recipients(self.notification)
+        _, first = tasks.claim_chunk(self.notification)
+        _, second = tasks.claim_chunk(self.notification)
+        self.assertEqual(len(first), len(self.subscribers))
+        self.assertEqual(second, [])
+
+    def test_pooled_backend_sends_chunk_in_parallel(self):
+        with LocalSMTPServer() as server, override_settings(
+            EMAIL_BACKEND="core.mail.PooledSMTPBackend",
+            EMAIL_HOST="127.0.0.1", EMAIL_PORT=server.port, EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="", EMAIL_HOST_PASSWORD="",
+            EMAIL_POOL_PARALLEL=2, EMAIL_POOL_PARALLEL_THRESHOLD=2,
+        ):
+            pooled_mail.close_pool()
+            try:
+                self.deliver()
+            finally:
+                pooled_mail.close_pool()
+
+        self.assertEqual(sorted(rcpts[0] for _, rcpts, _ in server.messages), sorted(s.email for s in self.subscribers))
+        self.assertEqual(server.connections, 2)
+        self.assertFalse(self.notification.deliveries.exclude(status=BlogNotificationDelivery.STATUS_SENT).exists())
+        self.assertIsNotNone(self.notification.completed_at)
+
+
+class BodyStatsTests(SimpleTestCase):
+    """blog.body_stats.analyze_body på body-fältets rådata."""
+
+    BODY = [
+        {"type": "heading", "id": "a1", "value": "Moms &amp; skatt"},
+        {"type": "paragraph", "id": "b2", "value": (
+            '<p>Första stycket om moms.</p><embed embedtype="image" format="fullwidth" id="7"/>'
+            '<p>Se <a linktype="document" id="3">blanketten</a>.</p>'
+        )},
+        {"type": "image", "id": "c3", "value": 9},
+        {"type": "quote", "id": "d4", "value": "Ett citat här"},
+        {"type": "heading", "id": "e5", "value": "  "},
+        {"type": "video", "id": "f6", "value": 3},
+        {"type": "image", "id": "g7", "value": 7},
+    ]
+
+    def test_word_count_and_reading_time(self):
+        stats = analyze_body(self.BODY)
+        # "Moms & skatt" (2) + styckena (6) + citatet (3)
+        self.assertEqual(stats["word_count"], 11)
+        self.assertEqual(stats["reading_time"], 1)
+        self.assertEqual(analyze_body([{"type": "paragraph", "value": "<p>ord </p>" * 401}])["reading_time"], 3)
+
+    def test_excerpt_is_plain_paragraph_text(self):
+        self.assertEqual(analyze_body(self.BODY)["excerpt"], "Första stycket om moms. Se blanketten.")
+        long = analyze_body([{"type": "paragraph", "value": "<p>" + "ord " * 200 + "</p>"}])["excerpt"]
+        self.assertEqual(len(long), EXCERPT_LENGTH)
+        self.assertTrue(long.endswith("…"))
+
+    def test_table_of_contents_skips_empty_headings(self):
+        self.assertEqual(analyze_body(self.BODY)["table_of_contents"], [{"anchor": "h-a1", "title": "Moms & skatt"}])
+
+    def test_image_and_document_ids_without_duplicates(self):
+        stats = analyze_body(self.BODY)
+        self.assertEqual(stats["image_ids"], [7, 9])
+        self.assertEqual(stats["document_ids"], [3])
+
+    def test_empty_body(self):
+        self.assertEqual(analyze_body(None), {
+            "word_count": 0, "reading_time": 1, "excerpt": "",
+            "table_of_contents": [], "image_ids": [], "document_ids": [],
+        })
+
+
+class BodyStatsSaveTests(TestCase):
+    """Metadatan räknas vid publicering och fylls i av 0007-migreringen för gamla inlägg."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.pages = build_site(blog_posts=1, team_members=0)
+
+    def test_publish_computes_stats(self):
+        post = BlogPost.objects.get(pk=self.pages["post"].pk)
+        self.assertEqual(post.table_of_contents[0]["title"], "Bakgrund")
+        self.assertEqual(post.image_ids, [self.pages["image"].pk])
+        self.assertGreater(post.word_count, 0)
+
+    def test_backfill_migration(self):
+        post = self.pages["post"]
+        BlogPost.objects.filter(pk=post.pk).update(word_count=0, excerpt="", table_of_contents=[], image_ids=[])
+        migration = importlib.import_module("blog.migrations.0007_blogpost_body_stats")
+        migration.compute_body_stats(apps, None)
+
+        post = BlogPost.objects.get(pk=post.pk)
+        expected = analyze_body(list(post.body.raw_data))
+        self.assertEqual(post.word_count, expected["word_count"])
+        self.assertEqual(post.excerpt, expected["excerpt"])
+        self.assertEqual(post.table_of_contents, expected["table_of_contents"])
+        self.assertEqual(post.image_ids, [self.pages["image"].pk])
@@ -3,14 +3,32 @@ from django.views.decorators.http import require_POST
 from django.http import HttpResponse, JsonResponse
 from django.utils.html import escape
 
+from core.ratelimit import rate_limit
+
 from .models import BlogSubscriber
 
 
+# --- Konfiguration för rate limiting ---
+SUBSCRIBE_MAX_ATTEMPTS = 5          # Prenumeration: max 5 anmälningar
+SUBSCRIBE_WINDOW_MINUTES = 60       # per timme
+
+
+def subscribe_rate_limited(request):
+    html = """
+    <div class="bg-red-50 border border-red-200 text-red-800 px-4 py-3 rounded-lg text-sm">
+      <p>För många anmälningar på kort tid. Försök igen om en stund.</p>
+    </div>
+    """
+    # 200 (inte 429) – HTMX byter bara in svar med 2xx
+    return HttpResponse(html)
+
+
 @require_POST
+@rate_limit("subscribe", SUBSCRIBE_MAX_ATTEMPTS, SUBSCRIBE_WINDOW_MINUTES * 60, subscribe_rate_limited)
 def blog_subscribe(request):
     """
     Tar emot email från formuläret och lägger till/aktiverar prenumerant.
-    Returnerar en liten HTML-snutt (HTMX-vänlig).
+    Returnerar en liten HTML-snutt (HTMX-vänlig). Rate limit per IP i cachen.
     """
     email = (request.POST.get("email") or "").strip().lower()
     honeypot = (request.POST.get("website") or "").strip()
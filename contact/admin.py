@@ -1,3 +1,50 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import InstagramPost, OutgoingMail
+from .tasks import deliver_outgoing_mail
+
+
+@admin.register(OutgoingMail)
+class OutgoingMailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'kind', 'to', 'status', 'attempts', 'created_at', 'sent_at', 'queue_wait_display')
+    list_filter = ('status', 'kind')
+    search_fields = ('subject', 'to')
+    readonly_fields = (
+        'kind', 'submission', 'subject', 'body', 'from_email', 'to',
+        'status', 'attempts', 'last_error', 'created_at', 'claimed_at', 'sent_at',
+        'queue_wait_display',
+    )
+    actions = ['resend']
+
+    @admin.display(description='Tid i kö')
+    def queue_wait_display(self, obj):
+        wait = obj.queue_wait
+        if wait is None:
+            return '–'
+        seconds = wait.total_seconds()
+        if seconds < 60:
+            return f'{seconds:.1f} s'
+        return f'{seconds / 60:.1f} min'
+
+    @admin.action(description='Köa valda mail igen')
+    def resend(self, request, queryset):
+        ids = list(queryset.filter(status=OutgoingMail.STATUS_FAILED).values_list('pk', flat=True))
+        # Nya försök från noll – annars får mailet bara ett försök innan det är "failed" igen
+        OutgoingMail.objects.filter(pk__in=ids).update(
+            status=OutgoingMail.STATUS_PENDING, attempts=0, last_error='',
+        )
+        for pk in ids:
+            deliver_outgoing_mail.enqueue(pk)
+        self.message_user(request, f'{len(ids)} mail köade igen.')
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(InstagramPost)
+class InstagramPostAdmin(admin.ModelAdmin):
+    list_display = ('media_id', 'media_type', 'timestamp', 'fetched_at')
+    readonly_fields = ('media_id', 'caption', 'media_type', 'permalink', 'timestamp', 'thumbnails', 'fetched_at')
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,188 @@
+# contact/instagram.py
+"""
+Instagram-flödet (/api/instagram/) som lokal proxy.
+
+Bakgrundsjobbet (contact.tasks.refresh_instagram_feed) hämtar de senaste
+inläggen från Graph API, sparar dem som InstagramPost och laddar ner varje
+bild EN gång som kvadratiska WebP-miniatyrer i MEDIA_ROOT/instagram/.
+Endpointen läser bara lokal data: ett cacheat flöde under en versionstoken,
+som också är svarets ETag. HTMX-anrop får flödet som färdigrenderad
+HTML-snutt (includes/instagram_feed.html), cachead per version.
+
+Stale-while-revalidate: efter INSTAGRAM_REFRESH_SECONDS köar nästa request
+en uppdatering (en gång, via cache.add) och serverar det som redan finns.
+Är Instagram nere visas de sparade inläggen och ett nytt försök görs om
+ERROR_RETRY_SECONDS. (AVIF kräver Pillow 11.2+ och används inte än.)
+"""
+import io
+import uuid
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template.loader import render_to_string
+from django.utils.dateparse import parse_datetime
+from PIL import Image, ImageOps
+
+# --- Konfiguration ---
+GRAPH_URL = "https://graph.instagram.com/me/media"
+GRAPH_FIELDS = "id,caption,media_type,media_url,thumbnail_url,permalink,timestamp"
+MAX_POSTS = 6
+FETCH_TIMEOUT = 10
+ERROR_RETRY_SECONDS = 300       # vid fel (eller jobb som aldrig körs): nytt försök om 5 min
+
+THUMBNAIL_SIZES = (320, 640)    # kvadratiska, px
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_DIR = "instagram"
+
+FRESH_KEY = "instagram:fresh"   # finns = färskt flöde eller uppdatering köad
+VERSION_KEY = "instagram:version"
+FEED_KEY = "instagram:feed:{version}"
+FRAGMENT_KEY = "instagram:html:{version}"
+FEED_SECONDS = 7 * 24 * 60 * 60
+MAX_AGE = 600                   # webbläsarens cache; därefter räcker ETag/304
+
+
+def _thumbnail_name(media_id, size):
+    return f"{THUMBNAIL_DIR}/{media_id}-{size}.webp"
+
+
+def save_thumbnails(media_id, image_url):
+    """Laddar ner bilden och sparar en WebP per storlek. Returnerar {"320": namn, ...}."""
+    r = requests.get(image_url, timeout=FETCH_TIMEOUT)
+    r.raise_for_status()
+    with Image.open(io.BytesIO(r.content)) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        thumbnails = {}
+        for size in THUMBNAIL_SIZES:
+            buffer = io.BytesIO()
+            ImageOps.fit(image, (size, size), Image.LANCZOS).save(buffer, "WEBP", quality=THUMBNAIL_QUALITY)
+            name = _thumbnail_name(media_id, size)
+            default_storage.delete(name)
+            thumbnails[str(size)] = default_storage.save(name, ContentFile(buffer.getvalue()))
+    return thumbnails
+
+
+def _delete_thumbnails(post):
+    for name in post.thumbnails.values():
+        default_storage.delete(name)
+
+
+def refresh():
+    """
+    Hämtar flödet från Instagram och uppdaterar InstagramPost. Nya inlägg
+    får miniatyrer, inlägg som fallit ur flödet tas bort med sina filer.
+    Returnerar en dict med ok, antal inlägg, nya miniatyrer och ev. fel.
+    """
+    from .models import InstagramPost
+
+    token = settings.INSTAGRAM_ACCESS_TOKEN
+    if not token:
+        return {"ok": True, "posts": 0, "downloaded": 0}
+
+    try:
+        r = requests.get(
+            GRAPH_URL,
+            params={"fields": GRAPH_FIELDS, "access_token": token, "limit": MAX_POSTS},
+            timeout=FETCH_TIMEOUT,
+        )
+        r.raise_for_status()
+        items = r.json().get("data", [])[:MAX_POSTS]
+    except Exception as e:
+        # Behåll de sparade inläggen
+        cache.set(FRESH_KEY, 1, ERROR_RETRY_SECONDS)
+        return {"ok": False, "posts": 0, "downloaded": 0, "error": repr(e)}
+
+    existing = {p.media_id: p for p in InstagramPost.objects.filter(media_id__in=[i["id"] for i in items])}
+    downloaded, errors = 0, []
+    for item in items:
+        post = existing.get(item["id"]) or InstagramPost(media_id=item["id"])
+        post.caption = item.get("caption") or ""
+        post.media_type = item.get("media_type") or ""
+        post.permalink = item.get("permalink") or ""
+        post.timestamp = parse_datetime(item.get("timestamp") or "") or post.timestamp
+        if not post.timestamp:
+            # Kan inte sparas – ladda inte ner miniatyrer som ingen rad pekar på
+            continue
+
+        # Videor har en stillbild i thumbnail_url; bilden laddas bara ner en gång
+        image_url = item.get("thumbnail_url") or item.get("media_url")
+        if not post.thumbnails and image_url:
+            try:
+                post.thumbnails = save_thumbnails(post.media_id, image_url)
+                downloaded += 1
+            except Exception as e:
+                errors.append(f"{post.media_id}: {e!r}")
+        post.save()
+
+    for post in InstagramPost.objects.exclude(media_id__in=[i["id"] for i in items]):
+        _delete_thumbnails(post)
+        post.delete()
+
+    invalidate()
+    cache.set(FRESH_KEY, 1, settings.INSTAGRAM_REFRESH_SECONDS)
+    result = {"ok": not errors, "posts": len(items), "downloaded": downloaded}
+    if errors:
+        result["error"] = "; ".join(errors)
+    return result
+
+
+def ensure_fresh():
+    """Köar en uppdatering om flödet är inaktuellt – väntar aldrig på den."""
+    if not settings.INSTAGRAM_ACCESS_TOKEN:
+        return
+    # Låset gäller tills jobbet satt en ny färskhetstid (eller ERROR_RETRY_SECONDS)
+    if cache.add(FRESH_KEY, 1, ERROR_RETRY_SECONDS):
+        from .tasks import refresh_instagram_feed
+        refresh_instagram_feed.enqueue()
+
+
+def invalidate():
+    """Nästa request läser om inläggen från databasen (ny version = ny ETag)."""
+    cache.delete(VERSION_KEY)
+
+
+def _serialize(post):
+    urls = {size: default_storage.url(name) for size, name in post.thumbnails.items()}
+    return {
+        "id": post.media_id,
+        "caption": post.caption,
+        "media_type": post.media_type,
+        "permalink": post.permalink,
+        "timestamp": post.timestamp.isoformat(),
+        # Samma nycklar som Graph API, men lokala filer
+        "media_url": urls[str(max(THUMBNAIL_SIZES))],
+        "thumbnail_url": urls[str(min(THUMBNAIL_SIZES))],
+        "thumbnails": urls,
+    }
+
+
+def get_feed():
+    """(version, inlägg) – ur cachen, eller en fråga mot InstagramPost vid ny version."""
+    from .models import InstagramPost
+
+    version = cache.get(VERSION_KEY)
+    posts = cache.get(FEED_KEY.format(version=version)) if version else None
+    if posts is None:
+        posts = [
+            _serialize(post)
+            for post in InstagramPost.objects.exclude(thumbnails={})[:MAX_POSTS]
+            if len(post.thumbnails) == len(THUMBNAIL_SIZES)
+        ]
+        version = uuid.uuid4().hex
+        cache.set(FEED_KEY.format(version=version), posts, FEED_SECONDS)
+        cache.set(VERSION_KEY, version, None)
+    return version, posts
+
+
+def get_fragment():
+    """(version, html) – flödet renderat som HTML-snutt, en gång per version."""
+    version, posts = get_feed()
+    key = FRAGMENT_KEY.format(version=version)
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string("includes/instagram_feed.html", {"posts": posts})
+        cache.set(key, html, FEED_SECONDS)
+    return version, html
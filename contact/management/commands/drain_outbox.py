@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from contact.tasks import drain_outbox
+
+
+class Command(BaseCommand):
+    help = 'Skickar väntande mail i utkorgen (kontakt- och uppringningsförfrågningar)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Max antal mail per körning')
+        parser.add_argument(
+            '--loop',
+            type=int,
+            default=0,
+            metavar='SEKUNDER',
+            help='Kör om och om igen med så här många sekunders paus (0 = en gång)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = drain_outbox(limit=options['limit'])
+            if sent or failed or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f'✓ {sent} skickade, {failed} misslyckade'))
+
+            if not options['loop']:
+                return
+            time.sleep(options['loop'])
@@ -0,0 +1,129 @@
+import re
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from contact.models import ContactSubmission, OutgoingMail
+
+ANONYMIZED_NAME = "Anonymiserad"
+REMOVED_IP = "Raderad"             # får inte börja med en hexsiffra, se IP_LINE_SQL
+
+# Raden "IP-adress: ..." i utkorgens mail (contact.views). Mönstren matchar
+# bara rader som fortfarande har en adress, inte "Okänd"/"Raderad" – så
+# varje tvättad rad faller ur urvalet och omgångarna tar slut.
+IP_LINE_SQL = r"IP-adress: *[0-9A-Fa-f:]"
+IP_LINE = re.compile(r"(IP-adress: *)[0-9A-Fa-f:][^\n]*")
+
+
+def _batches(queryset, batch_size):
+    """
+    Primärnycklar i små omgångar. Varje omgång hanteras i en egen kort
+    transaktion, så gallringen aldrig låser tabellen länge.
+    """
+    while True:
+        ids = list(queryset.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return
+        yield ids
+
+
+class Command(BaseCommand):
+    help = (
+        'Gallrar kontaktförfrågningar enligt GDPR: tar bort IP-adresser efter '
+        'CONTACT_IP_RETENTION_DAYS (även ur skickade mail) och raderar (eller '
+        'anonymiserar) förfrågningar och skickade mail efter CONTACT_RETENTION_DAYS'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.CONTACT_RETENTION_DAYS,
+            help=f'Spara förfrågningar så här många dagar (default: {settings.CONTACT_RETENTION_DAYS})',
+        )
+        parser.add_argument(
+            '--ip-days',
+            type=int,
+            default=settings.CONTACT_IP_RETENTION_DAYS,
+            help=f'Spara IP-adresser så här många dagar (default: {settings.CONTACT_IP_RETENTION_DAYS})',
+        )
+        parser.add_argument(
+            '--anonymize',
+            action='store_true',
+            help='Töm personuppgifterna i stället för att radera raderna (behåller statistik per sida/datum)',
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Rader per transaktion')
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.05,
+            help='Sekunders paus mellan omgångarna (ger andra frågor utrymme)',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Visa bara vad som skulle gallras')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        cutoff = now - timedelta(days=options['days'])
+        ip_cutoff = now - timedelta(days=options['ip_days'])
+
+        old = ContactSubmission.objects.filter(submitted_at__lt=cutoff)
+        if options['anonymize']:
+            old = old.exclude(name=ANONYMIZED_NAME)
+        ips = ContactSubmission.objects.filter(submitted_at__lt=ip_cutoff, ip_address__isnull=False)
+        done = OutgoingMail.objects.filter(status__in=[OutgoingMail.STATUS_SENT, OutgoingMail.STATUS_FAILED])
+        mails = done.filter(created_at__lt=cutoff)
+        # Mailen till byrån har IP-adressen i texten – den ska bort lika tidigt
+        mail_ips = done.filter(created_at__lt=ip_cutoff, body__regex=IP_LINE_SQL).exclude(pk__in=mails)
+
+        if options['dry_run']:
+            action = 'anonymiseras' if options['anonymize'] else 'raderas'
+            self.stdout.write(f'{old.count()} förfrågningar {action} (äldre än {options["days"]} dagar)')
+            self.stdout.write(f'{ips.count()} IP-adresser tas bort (äldre än {options["ip_days"]} dagar)')
+            self.stdout.write(f'{mail_ips.count()} IP-adresser tas bort ur skickade mail')
+            self.stdout.write(f'{mails.count()} skickade mail raderas')
+            return
+
+        # Mailen först – de pekar på förfrågningarna och innehåller samma uppgifter
+        deleted_mails = self.process(mails, lambda ids: OutgoingMail.objects.filter(pk__in=ids).delete()[0], options)
+
+        if options['anonymize']:
+            pruned = self.process(old, lambda ids: ContactSubmission.objects.filter(pk__in=ids).update(
+                name=ANONYMIZED_NAME,
+                org_number="",
+                email="",
+                phone="",
+                subject="",
+                message="",
+                ip_address=None,
+            ), options)
+        else:
+            pruned = self.process(old, lambda ids: ContactSubmission.objects.filter(pk__in=ids).delete()[0], options)
+
+        cleared = self.process(ips, lambda ids: ContactSubmission.objects.filter(pk__in=ids).update(ip_address=None), options)
+        cleared_mails = self.process(mail_ips, self.scrub_mail_ips, options)
+
+        action = 'anonymiserade' if options['anonymize'] else 'raderade'
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {pruned} förfrågningar {action}, {cleared} IP-adresser borttagna, '
+            f'{deleted_mails} mail raderade, {cleared_mails} mail utan IP-adress'
+        ))
+
+    @staticmethod
+    def scrub_mail_ips(ids):
+        mails = list(OutgoingMail.objects.filter(pk__in=ids).only("pk", "body"))
+        for mail in mails:
+            mail.body = IP_LINE.sub(rf"\g<1>{REMOVED_IP}", mail.body)
+        OutgoingMail.objects.bulk_update(mails, ["body"])
+
+    def process(self, queryset, apply, options):
+        total = 0
+        for ids in _batches(queryset, options['batch_size']):
+            with transaction.atomic():
+                apply(ids)
+            total += len(ids)
+            time.sleep(options['pause'])
+        return total
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from contact import instagram
+
+
+class Command(BaseCommand):
+    help = 'Hämtar Instagram-flödet och laddar ner nya bilder som lokala WebP-miniatyrer'
+
+    def handle(self, *args, **options):
+        if not settings.INSTAGRAM_ACCESS_TOKEN:
+            self.stdout.write('INSTAGRAM_ACCESS_TOKEN saknas – inget att hämta')
+            return
+
+        result = instagram.refresh()
+        if result.get('error'):
+            self.stdout.write(self.style.WARNING(f"  {result['error']}"))
+        if not result['ok'] and not result['posts']:
+            raise CommandError('Instagram-flödet kunde inte hämtas')
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {result['posts']} inlägg, {result['downloaded']} nya bilder nedladdade"
+        ))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0001_initial'),
+        ('wagtaildocs', '0014_alter_document_file_size'),
+        ('wagtailimages', '0027_image_description'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactpage',
+            name='hero_image',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtailimages.image', verbose_name='Hero-bild'),
+        ),
+        migrations.AddField(
+            model_name='contactpage',
+            name='hero_video',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtaildocs.document'),
+        ),
+        migrations.AddField(
+            model_name='contactsubmission',
+            name='org_number',
+            field=models.CharField(blank=True, help_text='Kundens organisationsnummer (valfritt).', max_length=32, verbose_name='Organisationsnummer'),
+        ),
+    ]
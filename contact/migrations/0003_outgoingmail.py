@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0002_contactpage_hero_image_contactpage_hero_video_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutgoingMail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('contact', 'Kontaktformulär'), ('callback', 'Uppringning')], max_length=20, verbose_name='Typ')),
+                ('subject', models.CharField(max_length=255, verbose_name='Ämne')),
+                ('body', models.TextField(verbose_name='Innehåll')),
+                ('from_email', models.CharField(max_length=255, verbose_name='Från')),
+                ('to', models.TextField(help_text='En adress per rad', verbose_name='Till')),
+                ('status', models.CharField(choices=[('pending', 'Väntar'), ('sending', 'Skickas'), ('sent', 'Skickat'), ('failed', 'Misslyckades')], default='pending', max_length=10, verbose_name='Status')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Försök')),
+                ('last_error', models.TextField(blank=True, verbose_name='Senaste fel')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Köad')),
+                ('claimed_at', models.DateTimeField(blank=True, null=True, verbose_name='Påbörjad')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Skickad')),
+                ('submission', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='outgoing_mails', to='contact.contactsubmission', verbose_name='Kontaktförfrågan')),
+            ],
+            options={
+                'verbose_name': 'Utgående mail',
+                'verbose_name_plural': 'Utgående mail',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='contact_out_status_04cc11_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0003_outgoingmail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contactsubmission',
+            index=models.Index(fields=['ip_address', 'submitted_at'], name='contact_con_ip_addr_33ad05_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactsubmission',
+            index=models.Index(fields=['-submitted_at'], name='contact_con_submitt_4f9689_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0004_contactsubmission_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstagramPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('media_id', models.CharField(max_length=64, unique=True, verbose_name='Instagram-id')),
+                ('caption', models.TextField(blank=True, verbose_name='Bildtext')),
+                ('media_type', models.CharField(max_length=32, verbose_name='Typ')),
+                ('permalink', models.URLField(max_length=500, verbose_name='Länk')),
+                ('timestamp', models.DateTimeField(verbose_name='Publicerad')),
+                ('thumbnails', models.JSONField(blank=True, default=dict, verbose_name='Miniatyrer')),
+                ('fetched_at', models.DateTimeField(auto_now=True, verbose_name='Senast hämtad')),
+            ],
+            options={
+                'verbose_name': 'Instagram-inlägg',
+                'verbose_name_plural': 'Instagram-inlägg',
+                'ordering': ['-timestamp'],
+            },
+        ),
+    ]
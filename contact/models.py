@@ -89,8 +89,111 @@ class ContactSubmission(models.Model):
     
     class Meta:
         ordering = ['-submitted_at']
+        indexes = [
+            # Uppslag per IP (missbruk) och gallring/listning per datum
+            models.Index(fields=["ip_address", "submitted_at"]),
+            models.Index(fields=["-submitted_at"]),
+        ]
         verbose_name = "Kontaktförfrågan"
         verbose_name_plural = "Kontaktförfrågningar"
     
     def __str__(self):
-        return f"{self.name} - {self.submitted_at.strftime('%Y-%m-%d %H:%M')}"
\ No newline at end of file
+        return f"{self.name} - {self.submitted_at.strftime('%Y-%m-%d %H:%M')}"
+
+class OutgoingMail(models.Model):
+    """
+    Utkorg (transactional outbox): mail sparas i samma transaktion som
+    inlämningen och skickas sedan av en bakgrundsworker, så att
+    formulär-requesten aldrig väntar på SMTP.
+    """
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Väntar"),
+        (STATUS_SENDING, "Skickas"),
+        (STATUS_SENT, "Skickat"),
+        (STATUS_FAILED, "Misslyckades"),
+    ]
+
+    KIND_CHOICES = [
+        ("contact", "Kontaktformulär"),
+        ("callback", "Uppringning"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name="Typ")
+    submission = models.ForeignKey(
+        ContactSubmission,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="outgoing_mails",
+        verbose_name="Kontaktförfrågan",
+    )
+
+    subject = models.CharField(max_length=255, verbose_name="Ämne")
+    body = models.TextField(verbose_name="Innehåll")
+    from_email = models.CharField(max_length=255, verbose_name="Från")
+    to = models.TextField(verbose_name="Till", help_text="En adress per rad")
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name="Status",
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Försök")
+    last_error = models.TextField(blank=True, verbose_name="Senaste fel")
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Köad")
+    claimed_at = models.DateTimeField(null=True, blank=True, verbose_name="Påbörjad")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Skickad")
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+        verbose_name = "Utgående mail"
+        verbose_name_plural = "Utgående mail"
+
+    def __str__(self):
+        return f"{self.subject} ({self.get_status_display()})"
+
+    @property
+    def recipients(self):
+        return [addr for addr in self.to.splitlines() if addr.strip()]
+
+    @property
+    def queue_wait(self):
+        """Hur länge mailet låg i kön innan det skickades."""
+        if self.sent_at:
+            return self.sent_at - self.created_at
+        return None
+
+
+class InstagramPost(models.Model):
+    """
+    Ett inlägg från Instagram-kontot, hämtat av bakgrundsjobbet
+    (contact.instagram). Bilden laddas ner en gång och sparas lokalt som
+    kvadratiska WebP-miniatyrer – Instagrams CDN-länkar slutar gälla.
+    """
+    media_id = models.CharField(max_length=64, unique=True, verbose_name="Instagram-id")
+    caption = models.TextField(blank=True, verbose_name="Bildtext")
+    media_type = models.CharField(max_length=32, verbose_name="Typ")
+    permalink = models.URLField(max_length=500, verbose_name="Länk")
+    timestamp = models.DateTimeField(verbose_name="Publicerad")
+
+    # {"320": "instagram/<id>-320.webp", ...} – relativt MEDIA_ROOT
+    thumbnails = models.JSONField(default=dict, blank=True, verbose_name="Miniatyrer")
+    fetched_at = models.DateTimeField(auto_now=True, verbose_name="Senast hämtad")
+
+    class Meta:
+        ordering = ['-timestamp']
+        verbose_name = "Instagram-inlägg"
+        verbose_name_plural = "Instagram-inlägg"
+
+    def __str__(self):
+        return f"{self.media_id} ({self.timestamp:%Y-%m-%d})"
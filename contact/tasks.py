@@ -0,0 +1,126 @@
+# contact/tasks.py
+from datetime import timedelta
+
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from django_tasks import task, default_task_backend
+
+from .models import OutgoingMail
+
+
+# --- Konfiguration för utkorgen ---
+OUTBOX_MAX_ATTEMPTS = 5             # försök innan mailet markeras som misslyckat
+OUTBOX_RETRY_MINUTES = 5            # väntetid innan nytt försök
+OUTBOX_STALE_MINUTES = 15           # "skickas" längre än så = workern dog, försök igen
+
+
+def queue_mail(kind, subject, body, from_email, to, submission=None):
+    """
+    Lägger ett mail i utkorgen. Anropas inne i samma transaktion som
+    inlämningen sparas i – jobbet köas först när transaktionen är committad.
+    """
+    mail = OutgoingMail.objects.create(
+        kind=kind,
+        submission=submission,
+        subject=subject,
+        body=body,
+        from_email=from_email,
+        to="\n".join(to),
+    )
+    transaction.on_commit(lambda: deliver_outgoing_mail.enqueue(mail.pk))
+    return mail
+
+
+def claim_mail(mail_id):
+    """
+    Tar atomiskt över ett väntande mail så att bara en worker skickar det.
+    Mail som fastnat i "skickas" (worker som dog) kan tas över igen.
+    """
+    stale = timezone.now() - timedelta(minutes=OUTBOX_STALE_MINUTES)
+    claimed = OutgoingMail.objects.filter(
+        Q(status=OutgoingMail.STATUS_PENDING)
+        | Q(status=OutgoingMail.STATUS_SENDING, claimed_at__lt=stale),
+        pk=mail_id,
+    ).update(
+        status=OutgoingMail.STATUS_SENDING,
+        claimed_at=timezone.now(),
+        attempts=F("attempts") + 1,
+    )
+    if not claimed:
+        return None
+    return OutgoingMail.objects.get(pk=mail_id)
+
+
+def send_outgoing_mail(mail_id):
+    """Skickar ett mail ur utkorgen. Returnerar True om det gick iväg."""
+    mail = claim_mail(mail_id)
+    if mail is None:
+        return False
+
+    try:
+        EmailMessage(
+            subject=mail.subject,
+            body=mail.body,
+            from_email=mail.from_email,
+            to=mail.recipients,
+        ).send(fail_silently=False)
+    except Exception as e:
+        failed = mail.attempts >= OUTBOX_MAX_ATTEMPTS
+        OutgoingMail.objects.filter(pk=mail.pk).update(
+            status=OutgoingMail.STATUS_FAILED if failed else OutgoingMail.STATUS_PENDING,
+            last_error=repr(e)[:1000],
+        )
+        if not failed and default_task_backend.supports_defer:
+            deliver_outgoing_mail.using(
+                run_after=timezone.now() + timedelta(minutes=OUTBOX_RETRY_MINUTES),
+            ).enqueue(mail.pk)
+        return False
+
+    OutgoingMail.objects.filter(pk=mail.pk).update(
+        status=OutgoingMail.STATUS_SENT,
+        sent_at=timezone.now(),
+        last_error="",
+    )
+    return True
+
+
+@task()
+def deliver_outgoing_mail(mail_id):
+    """Bakgrundsjobb: skickar ett mail ur utkorgen."""
+    return send_outgoing_mail(mail_id)
+
+
+def drain_outbox(limit=None):
+    """
+    Skickar allt som väntar i utkorgen (äldst först). Används av
+    `manage.py drain_outbox` för mail vars jobb gått förlorade.
+    """
+    stale = timezone.now() - timedelta(minutes=OUTBOX_STALE_MINUTES)
+    ids = (
+        OutgoingMail.objects.filter(
+            Q(status=OutgoingMail.STATUS_PENDING)
+            | Q(status=OutgoingMail.STATUS_SENDING, claimed_at__lt=stale)
+        )
+        .order_by("created_at")
+        .values_list("pk", flat=True)
+    )
+    if limit:
+        ids = ids[:limit]
+
+    sent = failed = 0
+    for pk in list(ids):
+        if send_outgoing_mail(pk):
+            sent += 1
+        else:
+            failed += 1
+    return sent, failed
+
+
+@task()
+def refresh_instagram_feed():
+    """Bakgrundsjobb: hämtar Instagram-flödet och laddar ner nya bilder (contact.instagram)."""
+    from . import instagram
+    return instagram.refresh()
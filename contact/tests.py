@@ -1,3 +1,357 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+from io import BytesIO, StringIO
+from smtplib import SMTPServerDisconnected
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone as django_timezone
+from PIL import Image
+
+from contact import instagram, tasks, views
+from contact.models import ContactSubmission, InstagramPost, OutgoingMail
+from core.perf import PerfTestCase, build_site
+
+
+class ContactBudgetTests(PerfTestCase):
+    """Query-budgetar för kontaktsidan och formulärens endpoints."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.pages = build_site()
+
+    def test_contact_page(self):
+        self.assertBudget("page.contact", self.measure(self.pages["contact"].url), queries=15)
+
+    def test_contact_submit(self):
+        result = self.measure("/api/contact/", "post", {
+            "page_id": self.pages["contact"].pk,
+            "name": "Anna Kund",
+            "email": "anna@example.se",
+            "message": "Hej! Vi behöver hjälp med bokslutet.",
+            "gdpr_consent": "on",
+        })
+        self.assertBudget("api.contact", result, queries=5)
+        self.assertEqual(ContactSubmission.objects.count(), self.runs + 1)
+        self.assertEqual(OutgoingMail.objects.filter(kind="contact").count(), self.runs + 1)
+
+    def test_callback_request(self):
+        result = self.measure("/api/callback-request/", "post", {
+            "page_id": self.pages["contact"].pk,
+            "name": "Anna Kund",
+            "phone": "070-123 45 67",
+            "preferred_time": "morning",
+        })
+        self.assertBudget("api.callback", result, queries=4)
+
+    def create_instagram_posts(self):
+        for i in range(instagram.MAX_POSTS):
+            InstagramPost.objects.create(
+                media_id=str(i),
+                media_type="IMAGE",
+                caption=f"Inlägg {i}",
+                permalink=f"https://www.instagram.com/p/{i}/",
+                timestamp=datetime(2026, 1, i + 1, tzinfo=timezone.utc),
+                thumbnails={str(size): f"instagram/{i}-{size}.webp" for size in instagram.THUMBNAIL_SIZES},
+            )
+        # Färskt flöde – ingen bakgrundsuppdatering köas
+        cache.set(instagram.FRESH_KEY, 1, 60)
+        instagram.invalidate()
+
+    @override_settings(INSTAGRAM_ACCESS_TOKEN="test-token")
+    def test_instagram_not_modified(self):
+        self.create_instagram_posts()
+
+        response = self.client.get("/api/instagram/")
+        self.assertEqual(len(response.json()["posts"]), instagram.MAX_POSTS)
+        self.assertEqual(response.json()["posts"][0]["thumbnail_url"], "/media/instagram/5-320.webp")
+
+        result = self.measure("/api/instagram/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertBudget("api.instagram.not_modified", result, queries=0, status=304)
+
+    @override_settings(INSTAGRAM_ACCESS_TOKEN="test-token")
+    def test_instagram_fragment(self):
+        self.create_instagram_posts()
+
+        result = self.measure("/api/instagram/", HTTP_HX_REQUEST="true")
+        self.assertBudget("htmx.instagram_fragment", result, queries=0)
+
+        response = self.client.get("/api/instagram/", HTTP_HX_REQUEST="true")
+        self.assertContains(response, 'srcset="/media/instagram/5-320.webp 320w, /media/instagram/5-640.webp 640w"')
+        self.assertIn("max-age=600", response["Cache-Control"])
+        self.assertIn("HX-Request", response["Vary"])
+        # JSON och HTML har olika ETag
+        self.assertNotEqual(response["ETag"], self.client.get("/api/instagram/")["ETag"])
+        self.assertEqual(
+            self.client.get("/api/instagram/", HTTP_HX_REQUEST="true", HTTP_IF_NONE_MATCH=response["ETag"]).status_code,
+            304,
+        )
+
+
+class InstagramRefreshTests(TestCase):
+    """Bakgrundsjobbets refresh() mot en stubbad Graph API."""
+
+    IMAGE_URL = "https://cdn.example.com/{}.jpg"
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix="harpans-instagram-")
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media_root, INSTAGRAM_ACCESS_TOKEN="test-token")
+        settings.enable()
+        self.addCleanup(settings.disable)
+        cache.clear()
+
+        buffer = BytesIO()
+        Image.new("RGB", (1080, 1350), "navy").save(buffer, "JPEG")
+        self.image = buffer.getvalue()
+        self.items = [
+            {"id": "1", "caption": "Bokslut", "media_type": "IMAGE", "media_url": self.IMAGE_URL.format(1),
+             "permalink": "https://www.instagram.com/p/1/", "timestamp": "2026-03-02T08:00:00+0000"},
+            {"id": "2", "caption": "Film", "media_type": "VIDEO", "media_url": "https://cdn.example.com/2.mp4",
+             "thumbnail_url": self.IMAGE_URL.format(2),
+             "permalink": "https://www.instagram.com/p/2/", "timestamp": "2026-03-01T08:00:00+0000"},
+            # Utan tidsstämpel – kan inte sparas och ska inte ge några filer
+            {"id": "3", "caption": "Trasig", "media_type": "IMAGE", "media_url": self.IMAGE_URL.format(3),
+             "permalink": "https://www.instagram.com/p/3/"},
+        ]
+
+    def fake_get(self, url, **kwargs):
+        response = mock.Mock(content=self.image)
+        response.json.return_value = {"data": self.items}
+        return response
+
+    def refresh(self):
+        with mock.patch.object(instagram.requests, "get", side_effect=self.fake_get) as get:
+            return instagram.refresh(), [call.args[0] for call in get.call_args_list]
+
+    def test_refresh_saves_thumbnails_and_bumps_version(self):
+        version, posts = instagram.get_feed()
+        self.assertEqual(posts, [])
+        cache.set(instagram.FRESH_KEY, 1, 60)
+        etag = self.client.get("/api/instagram/")["ETag"]
+
+        result, urls = self.refresh()
+        self.assertEqual(result, {"ok": True, "posts": 3, "downloaded": 2})
+        self.assertEqual(urls, [instagram.GRAPH_URL, self.IMAGE_URL.format(1), self.IMAGE_URL.format(2)])
+        self.assertEqual(sorted(InstagramPost.objects.values_list("media_id", flat=True)), ["1", "2"])
+
+        for media_id in ("1", "2"):
+            post = InstagramPost.objects.get(media_id=media_id)
+            self.assertEqual(set(post.thumbnails), {"320", "640"})
+            for size in instagram.THUMBNAIL_SIZES:
+                with default_storage.open(post.thumbnails[str(size)]) as f, Image.open(f) as image:
+                    self.assertEqual((image.format, image.size), ("WEBP", (size, size)))
+        # Inget föräldralöst 3-320/3-640
+        self.assertEqual(
+            sorted(default_storage.listdir(instagram.THUMBNAIL_DIR)[1]),
+            ["1-320.webp", "1-640.webp", "2-320.webp", "2-640.webp"],
+        )
+
+        # Ny version = ny ETag, och flödet läses om från databasen
+        new_version, posts = instagram.get_feed()
+        self.assertNotEqual(new_version, version)
+        self.assertEqual([p["id"] for p in posts], ["1", "2"])
+        self.assertEqual(posts[0]["thumbnail_url"], "/media/instagram/1-320.webp")
+        response = self.client.get("/api/instagram/")
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response["ETag"], f'"{new_version}"')
+
+    def test_known_posts_are_not_downloaded_again(self):
+        self.refresh()
+        result, urls = self.refresh()
+        self.assertEqual(result, {"ok": True, "posts": 3, "downloaded": 0})
+        self.assertEqual(urls, [instagram.GRAPH_URL])
+
+
+class RefusingBackend(BaseEmailBackend):
+    """Mailservern svarar alltid 421."""
+
+    def send_messages(self, messages):
+        raise SMTPServerDisconnected("421 Service not available")
+
+
+class OutboxTests(TestCase):
+    """Utkorgen: claims, fastnade mail och omförsök."""
+
+    def queue(self, **fields):
+        return OutgoingMail.objects.create(
+            kind="contact", subject="Ny förfrågan", body="Hej!",
+            from_email="noreply@harpans.se", to="info@harpans.se", **fields,
+        )
+
+    def test_claim_is_exclusive(self):
+        outgoing = self.queue()
+        self.assertIsNotNone(tasks.claim_mail(outgoing.pk))
+        self.assertIsNone(tasks.claim_mail(outgoing.pk))
+        self.assertFalse(tasks.send_outgoing_mail(outgoing.pk))
+        self.assertEqual(mail.outbox, [])
+
+    def test_stale_sending_is_claimed_again(self):
+        recent = self.queue(status=OutgoingMail.STATUS_SENDING, claimed_at=django_timezone.now())
+        stale = self.queue(
+            status=OutgoingMail.STATUS_SENDING,
+            claimed_at=django_timezone.now() - timedelta(minutes=tasks.OUTBOX_STALE_MINUTES + 1),
+        )
+        self.assertIsNone(tasks.claim_mail(recent.pk))
+        self.assertTrue(tasks.send_outgoing_mail(stale.pk))
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, OutgoingMail.STATUS_SENT)
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(EMAIL_BACKEND="contact.tests.RefusingBackend")
+    def test_fails_after_max_attempts(self):
+        outgoing = self.queue()
+        for attempt in range(1, tasks.OUTBOX_MAX_ATTEMPTS + 1):
+            self.assertFalse(tasks.send_outgoing_mail(outgoing.pk))
+            outgoing.refresh_from_db()
+            self.assertEqual(outgoing.attempts, attempt)
+        self.assertEqual(outgoing.status, OutgoingMail.STATUS_FAILED)
+        self.assertIn("421", outgoing.last_error)
+        # Misslyckade mail tas inte över igen
+        self.assertIsNone(tasks.claim_mail(outgoing.pk))
+
+    def test_callback_queue_error_is_logged(self):
+        with mock.patch("contact.views.queue_mail", side_effect=RuntimeError("db nere")), \
+                self.assertLogs("contact.views", "ERROR") as logs:
+            response = self.client.post("/api/callback-request/", {"name": "Anna Kund", "phone": "070-123 45 67"})
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("db nere", logs.output[0])
+
+    def test_admin_resend_resets_attempts(self):
+        outgoing = self.queue(
+            status=OutgoingMail.STATUS_FAILED, attempts=tasks.OUTBOX_MAX_ATTEMPTS, last_error="421",
+        )
+        admin_user = get_user_model().objects.create_superuser("admin", "admin@harpans.se", "lösen")
+        self.client.force_login(admin_user)
+        self.client.post(
+            reverse("admin:contact_outgoingmail_changelist"),
+            {"action": "resend", "_selected_action": [outgoing.pk]},
+        )
+        outgoing.refresh_from_db()
+        self.assertEqual((outgoing.status, outgoing.attempts, outgoing.last_error), (OutgoingMail.STATUS_PENDING, 0, ""))
+
+
+class RateLimitTests(TestCase):
+    """Bara lyckade inskick räknas mot gränsen."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.pages = build_site(blog_posts=0, team_members=0)
+
+    def setUp(self):
+        cache.clear()
+
+    def submit(self, **fields):
+        data = {
+            "page_id": self.pages["contact"].pk,
+            "name": "Anna Kund",
+            "email": "anna@example.se",
+            "message": "Hej! Vi behöver hjälp med bokslutet.",
+            "gdpr_consent": "on",
+        }
+        data.update(fields)
+        return self.client.post("/api/contact/", data)
+
+    def test_invalid_posts_are_not_counted(self):
+        for _ in range(views.MAX_CONTACT_ATTEMPTS):
+            self.assertEqual(self.submit(email="inte-en-adress").status_code, 400)
+        self.assertEqual(self.submit().status_code, 200)
+        self.assertEqual(ContactSubmission.objects.count(), 1)
+
+    def test_valid_posts_are_limited(self):
+        for _ in range(views.MAX_CONTACT_ATTEMPTS + 1):
+            self.assertEqual(self.submit().status_code, 200)
+        self.assertEqual(ContactSubmission.objects.count(), views.MAX_CONTACT_ATTEMPTS)
+
+    def test_missing_callback_fields_are_not_counted(self):
+        data = {"page_id": self.pages["contact"].pk, "name": "Anna Kund"}
+        for _ in range(views.CALLBACK_MAX_ATTEMPTS):
+            self.assertEqual(self.client.post("/api/callback-request/", data).status_code, 400)
+        data["phone"] = "070-123 45 67"
+        self.client.post("/api/callback-request/", data)
+        self.assertEqual(OutgoingMail.objects.filter(kind="callback").count(), 1)
+
+
+class PruneSubmissionsTests(TestCase):
+    """GDPR-gallringen (prune_submissions)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.pages = build_site(blog_posts=0, team_members=0)
+
+    def create(self, days_ago, kind="contact"):
+        """En förfrågan med sitt skickade mail, inskickad för `days_ago` dagar sedan."""
+        submission = ContactSubmission.objects.create(
+            page=self.pages["contact"], name="Anna Kund", email="anna@example.se",
+            message="Hej!", gdpr_consent=True, ip_address="192.0.2.10",
+        )
+        outgoing = OutgoingMail.objects.create(
+            kind=kind, submission=submission, subject="Ny förfrågan",
+            body="Namn: Anna Kund\nIP-adress: 192.0.2.10\nSida:      Kontakt",
+            from_email="noreply@harpans.se", to="info@harpans.se", status=OutgoingMail.STATUS_SENT,
+        )
+        when = django_timezone.now() - timedelta(days=days_ago)
+        ContactSubmission.objects.filter(pk=submission.pk).update(submitted_at=when)
+        OutgoingMail.objects.filter(pk=outgoing.pk).update(created_at=when)
+        return submission, outgoing
+
+    def prune(self, *args):
+        out = StringIO()
+        call_command("prune_submissions", "--days=365", "--ip-days=30", "--pause=0", *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_only_counts(self):
+        self.create(400)
+        self.create(40)
+        self.create(1)
+        output = self.prune("--dry-run")
+        self.assertIn("1 förfrågningar raderas", output)
+        self.assertIn("2 IP-adresser tas bort", output)
+        self.assertIn("1 IP-adresser tas bort ur skickade mail", output)
+        self.assertIn("1 skickade mail raderas", output)
+        self.assertEqual(ContactSubmission.objects.count(), 3)
+        self.assertEqual(OutgoingMail.objects.filter(body__contains="192.0.2.10").count(), 3)
+
+    def test_deletes_old_submissions_and_mails(self):
+        old, old_mail = self.create(400)
+        recent, recent_mail = self.create(1)
+        self.prune()
+        self.assertFalse(ContactSubmission.objects.filter(pk=old.pk).exists())
+        self.assertFalse(OutgoingMail.objects.filter(pk=old_mail.pk).exists())
+        self.assertTrue(ContactSubmission.objects.filter(pk=recent.pk).exists())
+        self.assertTrue(OutgoingMail.objects.filter(pk=recent_mail.pk).exists())
+
+    def test_anonymize_keeps_rows(self):
+        old, _ = self.create(400)
+        self.prune("--anonymize")
+        old.refresh_from_db()
+        self.assertEqual((old.name, old.email, old.message, old.ip_address), ("Anonymiserad", "", "", None))
+        self.assertEqual(OutgoingMail.objects.count(), 0)
+        # Redan anonymiserade rader tas inte igen
+        self.assertIn("✓ 0 förfrågningar anonymiserade", self.prune("--anonymize"))
+
+    def test_clears_ip_addresses_after_ip_cutoff(self):
+        submission, outgoing = self.create(40)
+        _, callback = self.create(40, kind="callback")
+        recent, recent_mail = self.create(1)
+        self.prune("--batch-size=1")
+
+        submission.refresh_from_db()
+        outgoing.refresh_from_db()
+        callback.refresh_from_db()
+        self.assertIsNone(submission.ip_address)
+        self.assertEqual(outgoing.body, "Namn: Anna Kund\nIP-adress: Raderad\nSida:      Kontakt")
+        self.assertIn("IP-adress: Raderad", callback.body)
+        # Yngre än IP-gränsen – orört
+        recent.refresh_from_db()
+        recent_mail.refresh_from_db()
+        self.assertEqual(recent.ip_address, "192.0.2.10")
+        self.assertIn("192.0.2.10", recent_mail.body)
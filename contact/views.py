@@ -1,16 +1,21 @@
-from datetime import timedelta
+import logging
 
-import requests
 from django.conf import settings
-from django.core.cache import cache
-from django.core.mail import send_mail
-from django.http import JsonResponse, HttpResponse
+from django.db import transaction
+from django.http import JsonResponse, HttpResponse, HttpResponseNotModified
 from django.shortcuts import get_object_or_404
-from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
 from django.views.decorators.http import require_POST, require_GET
 
+from core.ratelimit import get_client_ip, rate_limit
+
+from . import instagram
 from .forms import ContactForm
-from .models import ContactPage, ContactSubmission
+from .models import ContactPage
+from .tasks import queue_mail
+
+logger = logging.getLogger(__name__)
 
 
 # --- Konfiguration för rate limiting ---
@@ -21,26 +26,36 @@ CALLBACK_MAX_ATTEMPTS = 2           # Callback: max 2 försök
 CALLBACK_WINDOW_MINUTES = 45        # per 45 minuter
 
 
-def get_client_ip(request):
-    """Hämta klientens IP-adress (tar hänsyn till proxy/X-Forwarded-For)."""
-    x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(",")[0].strip()
-    else:
-        ip = request.META.get("REMOTE_ADDR")
-    return ip or "0.0.0.0"
+def contact_rate_limited(request):
+    # Vi svarar snällt, men sparar inget och skickar inget mail
+    return JsonResponse({
+        "success": True,
+        "message": "Tack! Vi har redan mottagit din förfrågan. "
+                   "För att undvika spam kan du skicka igen om en liten stund."
+    })
+
+
+def callback_rate_limited(request):
+    throttled_html = """
+    <div class="bg-green-50 border border-green-200 text-green-800 px-4 py-3 rounded-lg text-sm animate-fade-in">
+      <p><strong>Tack!</strong> Vi har redan mottagit din förfrågan. 
+      Om du inte hört något inom kort, ring oss gärna.</p>
+    </div>
+    """
+    return HttpResponse(throttled_html)
 
 
 # -------------------------------------------------------------------
 #  KONTAKTFORMULÄR (”Skicka meddelande”)
 # -------------------------------------------------------------------
 @require_POST
+@rate_limit("contact", MAX_CONTACT_ATTEMPTS, CONTACT_WINDOW_MINUTES * 60, contact_rate_limited)
 def contact_form_submit(request):
     """
     HTMX endpoint för kontaktformuläret.
     - Honeypot (fält "website") för bottar.
-    - Rate limit per IP med DB (ContactSubmission).
-    - Skickar snyggt mail till byråns adress.
+    - Rate limit per IP i cachen (core.ratelimit).
+    - Köar snyggt mail till byråns adress (utkorg, skickas i bakgrunden).
     """
     # 🕵️ Honeypot – om detta fält är ifyllt är det nästan säkert en bot
     honeypot = (request.POST.get("website") or "").strip()
@@ -55,31 +70,18 @@ def contact_form_submit(request):
 
     ip = get_client_ip(request)
 
-    # 🔹 Rate limit: max N submissions per IP under senaste X minuter
-    cutoff = timezone.now() - timedelta(minutes=CONTACT_WINDOW_MINUTES)
-    recent_count = ContactSubmission.objects.filter(
-        ip_address=ip,
-        submitted_at__gte=cutoff,
-    ).count()
-
-    if recent_count >= MAX_CONTACT_ATTEMPTS:
-        # Vi svarar snällt, men sparar inget och skickar inget mail
-        return JsonResponse({
-            "success": True,
-            "message": "Tack! Vi har redan mottagit din förfrågan. "
-                       "För att undvika spam kan du skicka igen om en liten stund."
-        })
-
     form = ContactForm(request.POST)
 
     if form.is_valid():
         submission = form.save(commit=False)
         submission.page = page
         submission.ip_address = ip
-        submission.save()
 
-        # Skicka email till byrån
-        try:
+        # Spara inlämningen och mailet till byrån i samma transaktion –
+        # själva utskicket sköts av bakgrundsworkern (contact.tasks).
+        with transaction.atomic():
+            submission.save()
+
             org_line = submission.org_number or "Ej angivet"
             phone_line = submission.phone or "Ej angivet"
             subject_line = submission.subject or "Ej angivet"
@@ -109,16 +111,14 @@ IP-adress: {submission.ip_address or "Okänd"}
 Sida:      {page.title}
             """.strip()
 
-            send_mail(
+            queue_mail(
+                kind="contact",
                 subject=f"Ny kontaktförfrågan från {submission.name}",
-                message=message,
+                body=message,
                 from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[page.email or settings.DEFAULT_FROM_EMAIL],
-                fail_silently=False,
+                to=[page.email or settings.DEFAULT_FROM_EMAIL],
+                submission=submission,
             )
-        except Exception as e:
-            # Logga ev. i framtiden
-            print(f"Email error (contact_form_submit): {e}")
 
         return JsonResponse({
             "success": True,
@@ -136,12 +136,13 @@ Sida:      {page.title}
 #  CALLBACK (”Vi ringer upp dig”)
 # -------------------------------------------------------------------
 @require_POST
+@rate_limit("callback", CALLBACK_MAX_ATTEMPTS, CALLBACK_WINDOW_MINUTES * 60, callback_rate_limited)
 def callback_request(request):
     """
     HTMX-endpoint för 'Vi ringer upp dig'-formuläret.
     - Honeypot (fält "website") för bottar.
-    - Rate limit per IP med cache.
-    - Skickar ett kort mail till byrån.
+    - Rate limit per IP i cachen (core.ratelimit).
+    - Köar ett kort mail till byrån (utkorg, skickas i bakgrunden).
     """
 
     # 🕵️ Honeypot igen
@@ -154,30 +155,6 @@ def callback_request(request):
         """
         return HttpResponse(html)
 
-    ip = get_client_ip(request)
-    cache_key = f"callback_rate_{ip}"
-    current = cache.get(cache_key, 0)
-
-    WINDOW_SECONDS = CALLBACK_WINDOW_MINUTES * 60
-
-    if current >= CALLBACK_MAX_ATTEMPTS:
-        throttled_html = """
-        <div class="bg-green-50 border border-green-200 text-green-800 px-4 py-3 rounded-lg text-sm animate-fade-in">
-          <p><strong>Tack!</strong> Vi har redan mottagit din förfrågan. 
-          Om du inte hört något inom kort, ring oss gärna.</p>
-        </div>
-        """
-        return HttpResponse(throttled_html)
-
-    # Uppdatera räknaren i cache
-    if current == 0:
-        cache.set(cache_key, 1, WINDOW_SECONDS)
-    else:
-        try:
-            cache.incr(cache_key)
-        except ValueError:
-            cache.set(cache_key, 1, WINDOW_SECONDS)
-
     name = (request.POST.get("name") or "").strip()
     phone = (request.POST.get("phone") or "").strip()
     email = (request.POST.get("email") or "").strip()
@@ -234,14 +211,15 @@ def callback_request(request):
     mail_body = "\n".join(body_lines)
 
     try:
-        result = send_mail(
-            subject=f"Uppringningsförfrågan från {name}",
-            message=mail_body,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[recipient],
-            fail_silently=False,
-        )
-        print("send_mail result (callback_request):", result)
+        # Köa mailet – workern skickar det, requesten väntar inte på SMTP
+        with transaction.atomic():
+            queue_mail(
+                kind="callback",
+                subject=f"Uppringningsförfrågan från {name}",
+                body=mail_body,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[recipient],
+            )
 
         success_html = """
         <div class="bg-green-50 border border-green-200 text-green-800 px-4 py-3 rounded-lg text-sm animate-fade-in">
@@ -249,8 +227,8 @@ def callback_request(request):
         </div>
         """
         return HttpResponse(success_html)
-    except Exception as e:
-        print("Callback email error:", repr(e))
+    except Exception:
+        logger.exception("Uppringningsförfrågan kunde inte köas")
         error_html = """
         <div class="bg-red-50 border border-red-200 text-red-800 px-4 py-3 rounded-lg text-sm animate-fade-in">
           <p><strong>Oj!</strong> Något gick fel när vi skulle skicka din förfrågan. 
@@ -265,37 +243,32 @@ def callback_request(request):
 # -------------------------------------------------------------------
 @require_GET
 def instagram_feed(request):
-    """HTMX endpoint för Instagram-feed."""
-    access_token = settings.INSTAGRAM_ACCESS_TOKEN
-
-    if not access_token:
-        return JsonResponse({"posts": []})
-
-    cache_key = f"instagram_feed_{access_token[:10]}"
-    cached_posts = cache.get(cache_key)
-
-    if cached_posts:
-        return JsonResponse({"posts": cached_posts})
-
-    try:
-        url = "https://graph.instagram.com/me/media"
-        params = {
-            "fields": "id,caption,media_type,media_url,permalink,timestamp",
-            "access_token": access_token,
-            "limit": 6,
-        }
-
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        posts = data.get("data", [])
-
-        # Cacha i 1 timme
-        cache.set(cache_key, posts, 3600)
-
-        return JsonResponse({"posts": posts})
+    """
+    Instagram-flödet, bara från lokal data (contact.instagram) – requesten
+    anropar aldrig Instagram. Inaktuellt flöde uppdateras i bakgrunden.
+    HTMX-anrop får en serverrenderad HTML-snutt, övriga JSON. ETag =
+    flödets version, så oförändrat flöde ger 304.
+    """
+    instagram.ensure_fresh()
+    if request.htmx:
+        version, html = instagram.get_fragment()
+        etag = f'"{version}-html"'
+    else:
+        version, posts = instagram.get_feed()
+        etag = f'"{version}"'
 
-    except Exception as e:
-        print(f"Instagram API error: {e}")
-        return JsonResponse({"posts": []})
+    if etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+        response = HttpResponseNotModified()
+    elif request.htmx:
+        response = HttpResponse(html)
+    else:
+        response = JsonResponse({"posts": posts})
+    response["ETag"] = etag
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=instagram.MAX_AGE,
+        stale_while_revalidate=settings.INSTAGRAM_REFRESH_SECONDS,
+    )
+    patch_vary_headers(response, ("HX-Request",))
+    return response
@@ -0,0 +1,56 @@
+# core/checks.py
+import logging
+
+from django.conf import settings
+from django.core import checks
+
+logger = logging.getLogger(__name__)
+
+# Cacher som lever i en enda process – varje gunicorn-worker får sin egen
+PER_PROCESS_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+# Delas mellan processer, men add() är inte atomisk – två processer kan båda
+# "få" samma rate limit-plats eller samma lås (RSS, Instagram, sökförslag)
+NON_ATOMIC_BACKENDS = {
+    'django.core.cache.backends.filebased.FileBasedCache',
+}
+
+SHARED_CACHE_HINT = 'Sätt REDIS_URL, eller CACHE_BACKEND=db (kör `manage.py createcachetable`).'
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Varnar när en per-process-cache används med flera workers: då hämtar
+    varje worker RSS-flöden själv och rate limits blir N gånger för generösa.
+    Filcachen varnas för alltid – webb och db_worker är redan två processer.
+    """
+    workers = getattr(settings, 'WEB_CONCURRENCY', 1)
+
+    warnings = []
+    for alias, conf in settings.CACHES.items():
+        backend = conf.get('BACKEND', '')
+        if backend in NON_ATOMIC_BACKENDS:
+            warnings.append(checks.Warning(
+                f"Cachen '{alias}' ({backend.rsplit('.', 1)[-1]}) har ingen atomisk add(): "
+                f"rate limits och uppdateringslås fungerar inte mellan processer.",
+                hint=SHARED_CACHE_HINT,
+                id='core.W001',
+            ))
+        elif backend in PER_PROCESS_BACKENDS and workers > 1:
+            warnings.append(checks.Warning(
+                f"Cachen '{alias}' ({backend.rsplit('.', 1)[-1]}) delas inte mellan processer, "
+                f"men WEB_CONCURRENCY={workers}.",
+                hint=SHARED_CACHE_HINT,
+                id='core.W001',
+            ))
+    return warnings
+
+
+def log_startup_warnings():
+    """Gunicorn kör inga system checks – logga cachevarningar när appen startar."""
+    for warning in check_shared_cache(None):
+        logger.warning('%s %s (%s)', warning.msg, warning.hint, warning.id)
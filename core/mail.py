@@ -0,0 +1,308 @@
+# core/mail.py
+"""
+SMTP-backend med en pool av varma, inloggade connections.
+
+Varje gunicorn-worker håller upp till EMAIL_POOL_SIZE öppna connections
+mellan requests, så kontaktformulär och utskick slipper TCP + STARTTLS +
+login för varje mail. Stora utskick sprids över EMAIL_POOL_PARALLEL
+connections samtidigt, med omförsök och backoff vid tillfälliga fel.
+send_iter() lämnar ut utfallet per mail så fort det är klart, så att
+utskick kan spara status per mottagare även när de skickas parallellt.
+
+Aktiveras med:
+    EMAIL_BACKEND = 'core.mail.PooledSMTPBackend'
+"""
+import logging
+import queue
+import smtplib
+import threading
+import time
+from collections import deque
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.smtp import EmailBackend as SMTPBackend
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class PoolStats:
+    """Räknare för poolen (per process). Latens mäts per mail, inklusive omförsök."""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.sent = 0
+            self.failed = 0
+            self.retries = 0
+            self.connections_opened = 0
+            self.connections_reused = 0
+            self.latencies.clear()
+
+    def record(self, latency, ok):
+        with self._lock:
+            self.latencies.append(latency)
+            if ok:
+                self.sent += 1
+            else:
+                self.failed += 1
+
+    def incr(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            counters = {
+                "sent": self.sent,
+                "failed": self.failed,
+                "retries": self.retries,
+                "connections_opened": self.connections_opened,
+                "connections_reused": self.connections_reused,
+            }
+
+        def pct(p):
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+        counters.update({
+            "latency_p50": pct(0.50),
+            "latency_p95": pct(0.95),
+            "latency_max": latencies[-1] if latencies else None,
+        })
+        return counters
+
+
+stats = PoolStats()
+
+# En pool per (host, port, användare, tls, ssl) – delas av alla backend-instanser i processen
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class _Lane:
+    """En öppen SMTP-connection (Djangos SMTP-backend) och när den senast användes."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.last_used = time.monotonic()
+
+    def close(self):
+        try:
+            self.backend.close()
+        except Exception:
+            pass
+
+
+class PooledSMTPBackend(BaseEmailBackend):
+    """
+    Drop-in ersättare för django.core.mail.backends.smtp.EmailBackend.
+
+    open()/close() påverkar inte poolen: connections lånas per anrop till
+    send_messages() och lämnas tillbaka öppna.
+    """
+
+    # Fel där det är lönt att försöka igen på en ny connection
+    RETRY_EXCEPTIONS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError)
+
+    def __init__(self, host=None, port=None, username=None, password=None,
+                 use_tls=None, fail_silently=False, use_ssl=None, timeout=None,
+                 **kwargs):
+        super().__init__(fail_silently=fail_silently)
+        self.smtp_kwargs = {
+            "host": host,
+            "port": port,
+            "username": username,
+            "password": password,
+            "use_tls": use_tls,
+            "use_ssl": use_ssl,
+            "timeout": timeout if timeout is not None else _setting("EMAIL_TIMEOUT", None) or 30,
+            **kwargs,
+        }
+        probe = SMTPBackend(**self.smtp_kwargs)
+        self.pool_key = (probe.host, probe.port, probe.username, probe.use_tls, probe.use_ssl)
+
+        self.pool_size = _setting("EMAIL_POOL_SIZE", 4)
+        self.parallel = _setting("EMAIL_POOL_PARALLEL", 4)
+        self.parallel_threshold = _setting("EMAIL_POOL_PARALLEL_THRESHOLD", 20)
+        self.max_retries = _setting("EMAIL_POOL_RETRIES", 3)
+        self.backoff = _setting("EMAIL_POOL_BACKOFF", 0.5)
+        self.max_idle = _setting("EMAIL_POOL_MAX_IDLE", 60)
+
+    # --- Pool ---
+
+    def _pool(self):
+        with _pools_lock:
+            return _pools.setdefault(self.pool_key, deque())
+
+    def _acquire(self):
+        pool = self._pool()
+        while True:
+            try:
+                lane = pool.pop()
+            except IndexError:
+                break
+
+            if time.monotonic() - lane.last_used < self.max_idle:
+                stats.incr("connections_reused")
+                return lane
+
+            # Länge oanvänd – servern kan ha stängt den. Testa med NOOP.
+            try:
+                if lane.backend.connection.noop()[0] == 250:
+                    stats.incr("connections_reused")
+                    return lane
+            except Exception:
+                pass
+            lane.close()
+
+        backend = SMTPBackend(fail_silently=False, **self.smtp_kwargs)
+        backend.open()
+        stats.incr("connections_opened")
+        return _Lane(backend)
+
+    def _release(self, lane):
+        lane.last_used = time.monotonic()
+        pool = self._pool()
+        with _pools_lock:
+            if len(pool) < self.pool_size:
+                pool.append(lane)
+                return
+        lane.close()
+
+    # --- Sändning ---
+
+    def _send_one(self, lane, message):
+        """
+        Skickar ett mail med omförsök och exponentiell backoff.
+        Returnerar (lane, skickat?, fel) – lane är None om connectionen dog.
+        """
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                if lane is None:
+                    lane = self._acquire()
+                sent = lane.backend._send(message)
+            except self.RETRY_EXCEPTIONS + (smtplib.SMTPResponseException,) as e:
+                # 4xx är tillfälliga fel, 5xx permanenta
+                if isinstance(e, smtplib.SMTPResponseException) and not (400 <= e.smtp_code < 500):
+                    stats.record(time.monotonic() - start, False)
+                    return lane, False, e
+                if lane is not None:
+                    lane.close()
+                    lane = None
+                if attempt >= self.max_retries:
+                    stats.record(time.monotonic() - start, False)
+                    return None, False, e
+                attempt += 1
+                stats.incr("retries")
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+                continue
+            except smtplib.SMTPException as e:
+                # T.ex. SMTPRecipientsRefused – connectionen går att återanvända
+                stats.record(time.monotonic() - start, False)
+                return lane, False, e
+
+            latency = time.monotonic() - start
+            stats.record(latency, True)
+            logger.debug("Mail till %s skickat på %.3fs", message.recipients(), latency)
+            return lane, bool(sent), None
+
+    def _iter_serial(self, messages, stop=None):
+        """Skickar i tur och ordning på en connection och lämnar ut (mail, skickat?, fel)."""
+        lane = None
+        try:
+            for message in messages:
+                if stop is not None and stop.is_set():
+                    return
+                lane, sent, error = self._send_one(lane, message)
+                yield message, sent, error
+        finally:
+            if lane is not None:
+                self._release(lane)
+
+    def _send_serial(self, messages):
+        num_sent = 0
+        with closing(self._iter_serial(messages)) as results:
+            for message, sent, error in results:
+                if error is not None:
+                    if not self.fail_silently:
+                        raise error
+                    logger.warning("Mail till %s kunde inte skickas: %r", message.recipients(), error)
+                    continue
+                if sent:
+                    num_sent += 1
+        return num_sent
+
+    def send_messages(self, email_messages):
+        if not email_messages:
+            return 0
+
+        email_messages = list(email_messages)
+        if len(email_messages) < self.parallel_threshold or self.parallel <= 1:
+            return self._send_serial(email_messages)
+
+        # Stort utskick: dela upp på N connections som skickar parallellt
+        lanes = min(self.parallel, len(email_messages))
+        slices = [email_messages[i::lanes] for i in range(lanes)]
+        with ThreadPoolExecutor(max_workers=lanes) as executor:
+            return sum(executor.map(self._send_serial, slices))
+
+    def send_iter(self, email_messages):
+        """
+        Som send_messages(), men lämnar ut (mail, skickat?, fel) för varje
+        mail så fort det är klart – i den ordning de blir klara. Fel kastas
+        inte, oavsett fail_silently. Slutar anroparen iterera (t.ex. vid en
+        krasch) skickas inga fler mail, bara de som redan är på väg.
+        """
+        email_messages = list(email_messages)
+        if len(email_messages) < self.parallel_threshold or self.parallel <= 1:
+            yield from self._iter_serial(email_messages)
+            return
+
+        lanes = min(self.parallel, len(email_messages))
+        results = queue.Queue()
+        stop = threading.Event()
+
+        def run(messages):
+            try:
+                for result in self._iter_serial(messages, stop):
+                    results.put(result)
+            finally:
+                results.put(None)
+
+        with ThreadPoolExecutor(max_workers=lanes) as executor:
+            for i in range(lanes):
+                executor.submit(run, email_messages[i::lanes])
+            try:
+                running = lanes
+                while running:
+                    result = results.get()
+                    if result is None:
+                        running -= 1
+                    else:
+                        yield result
+            finally:
+                stop.set()
+
+
+def close_pool():
+    """Stänger alla connections i poolen (t.ex. vid avstängning eller i tester)."""
+    with _pools_lock:
+        lanes = [lane for pool in _pools.values() for lane in pool]
+        _pools.clear()
+    for lane in lanes:
+        lane.close()
@@ -0,0 +1,122 @@
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.ratelimit import hit
+
+
+def naive_hit(key, limit, window):
+    # Den gamla get-sedan-incr-räknaren (callback_request), för jämförelse
+    current = cache.get(key, 0)
+    if current >= limit:
+        return False
+    if current == 0:
+        cache.set(key, 1, window)
+    else:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, window)
+    return True
+
+
+def _hammer(args):
+    """Kör `requests` anrop per nyckel fördelat på `threads` trådar. Returnerar (släppta per nyckel, latenser)."""
+    run_id, keys, requests, threads, limit, window, naive = args
+    limiter = naive_hit if naive else hit
+
+    def one(i):
+        key = f"bench:{run_id}:{i % keys}"
+        start = time.perf_counter()
+        allowed = bool(limiter(key, limit, window))
+        return i % keys, allowed, time.perf_counter() - start
+
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(one, range(keys * requests)))
+    finally:
+        connection.close()
+
+    admitted = [0] * keys
+    for key, allowed, _ in results:
+        admitted[key] += allowed
+    return admitted, [latency for _, _, latency in results]
+
+
+class Command(BaseCommand):
+    help = (
+        'Lasttest för core.ratelimit: många samtidiga requests per nyckel mot '
+        'den konfigurerade cachen. Avslutar med fel om någon nyckel släpps '
+        'igenom fler gånger än gränsen.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keys', type=int, default=10, help='Antal klienter (IP-adresser)')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per klient')
+        parser.add_argument('--threads', type=int, default=32, help='Samtidiga trådar per process')
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=1,
+            help='Antal processer (som gunicorn-workers) – kräver delad cache för att hålla gränsen',
+        )
+        parser.add_argument('--limit', type=int, default=5, help='Tillåtna requests per fönster')
+        parser.add_argument('--window', type=int, default=600, help='Fönstrets längd i sekunder')
+        parser.add_argument('--compare', action='store_true', help='Kör även den gamla get-sedan-incr-räknaren')
+
+    def handle(self, *args, **options):
+        backend = type(cache).__name__
+        self.stdout.write(
+            f"Cache: {backend}, {options['processes']} process(er) x {options['threads']} trådar, "
+            f"{options['keys']} klienter x {options['requests']} requests, gräns {options['limit']}/{options['window']} s"
+        )
+        self.stdout.write(f"{'Limiter':<28} {'Släppta/klient':>15} {'Req/s':>10} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+
+        runs = [('core.ratelimit (glidande)', False)]
+        if options['compare']:
+            runs.append(('get + incr (gamla)', True))
+
+        over = False
+        for label, naive in runs:
+            admitted, latencies, elapsed = self.run(options, naive)
+            latencies.sort()
+            p50 = latencies[len(latencies) // 2] * 1000
+            p95 = latencies[int(len(latencies) * 0.95)] * 1000
+            rate = len(latencies) / elapsed
+
+            spread = f"{min(admitted)}–{max(admitted)}"
+            self.stdout.write(f"{label:<28} {spread:>15} {rate:>10.0f} {p50:>10.2f} {p95:>10.2f}")
+            if not naive and max(admitted) > options['limit']:
+                over = True
+
+        if over:
+            raise CommandError(
+                f"Gränsen {options['limit']} överskreds – cachen ({backend}) delas inte mellan "
+                f"processerna eller saknar atomisk add."
+            )
+        self.stdout.write(self.style.SUCCESS(f"✓ Ingen klient släpptes igenom mer än {options['limit']} gånger"))
+
+    def run(self, options, naive):
+        run_id = uuid.uuid4().hex[:8]
+        args = (run_id, options['keys'], options['requests'], options['threads'],
+                options['limit'], options['window'], naive)
+
+        start = time.perf_counter()
+        if options['processes'] > 1:
+            # Samma nycklar i alla processer – som N gunicorn-workers bakom nginx
+            requests = options['requests'] // options['processes']
+            connection.close()
+            with multiprocessing.get_context('fork').Pool(options['processes']) as pool:
+                results = pool.map(_hammer, [args[:2] + (requests,) + args[3:]] * options['processes'])
+        else:
+            results = [_hammer(args)]
+        elapsed = time.perf_counter() - start
+
+        admitted = [sum(r[0][k] for r in results) for k in range(options['keys'])]
+        latencies = [latency for r in results for latency in r[1]]
+        return admitted, latencies, elapsed
@@ -0,0 +1,83 @@
+import time
+
+from django.core.mail import EmailMessage
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from core import mail as pooled_mail
+from core.smtp_stub import LocalSMTPServer
+
+
+class Command(BaseCommand):
+    help = (
+        'Mäter genomströmning (mail/s) för Djangos SMTP-backend och '
+        'PooledSMTPBackend mot en lokal SMTP-stub'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=500, help='Antal mail per körning')
+        parser.add_argument(
+            '--delay',
+            type=float,
+            default=5.0,
+            help='Simulerad latens per SMTP-kommando i ms (default: 5)',
+        )
+        parser.add_argument(
+            '--parallel',
+            nargs='+',
+            type=int,
+            default=[1, 2, 4, 8],
+            help='Antal parallella connections att mäta',
+        )
+
+    def handle(self, *args, **options):
+        n = options['messages']
+        messages = [
+            EmailMessage(
+                subject=f'Benchmark {i}',
+                body='Hej!\n\n' + 'Lorem ipsum dolor sit amet. ' * 40,
+                from_email='noreply@harpans.se',
+                to=[f'bench-{i}@example.invalid'],
+            )
+            for i in range(n)
+        ]
+
+        with LocalSMTPServer(delay=options['delay'] / 1000) as server:
+            smtp = {
+                'EMAIL_HOST': '127.0.0.1',
+                'EMAIL_PORT': server.port,
+                'EMAIL_USE_TLS': False,
+                'EMAIL_HOST_USER': '',
+                'EMAIL_HOST_PASSWORD': '',
+            }
+
+            self.stdout.write(f"{'Backend':<40} {'Mail/s':>10} {'p50 (ms)':>10} {'p95 (ms)':>10} {'Conn':>6}")
+
+            # Referens: Djangos backend, ny connection per mail (som send_mail())
+            with override_settings(EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend', **smtp):
+                server.connections = 0
+                start = time.perf_counter()
+                for msg in messages:
+                    msg.connection = None
+                    msg.send()
+                rate = n / (time.perf_counter() - start)
+            self.stdout.write(f"{'smtp.EmailBackend (send_mail per mail)':<40} {rate:>10.0f} {'':>10} {'':>10} {server.connections:>6}")
+
+            for parallel in options['parallel']:
+                pooled_mail.close_pool()
+                pooled_mail.stats.reset()
+                server.connections = 0
+
+                with override_settings(EMAIL_POOL_PARALLEL=parallel, EMAIL_POOL_PARALLEL_THRESHOLD=2, **smtp):
+                    backend = pooled_mail.PooledSMTPBackend()
+                    start = time.perf_counter()
+                    sent = backend.send_messages(messages)
+                    rate = sent / (time.perf_counter() - start)
+
+                s = pooled_mail.stats.snapshot()
+                self.stdout.write(
+                    f"{f'PooledSMTPBackend x{parallel}':<40} {rate:>10.0f} "
+                    f"{s['latency_p50'] * 1000:>10.1f} {s['latency_p95'] * 1000:>10.1f} {server.connections:>6}"
+                )
+
+            pooled_mail.close_pool()
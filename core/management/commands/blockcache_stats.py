@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core import block_cache
+
+
+class Command(BaseCommand):
+    help = 'Visar träffgrad och sparad renderingstid för StreamField-blockcachen (core.block_cache)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Nollställ räknarna efter utskriften')
+
+    def handle(self, *args, **options):
+        stats = block_cache.get_stats()
+        total = stats['hits'] + stats['misses']
+        self.stdout.write(f"Block renderade:  {total}")
+        self.stdout.write(f"Träffar:          {stats['hits']} ({stats['hit_ratio']:.1%})")
+        self.stdout.write(f"Missar:           {stats['misses']}")
+        self.stdout.write(f"Sparad tid:       {stats['saved_ms']:.0f} ms")
+
+        if options['reset']:
+            block_cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS('✓ Räknarna nollställda'))
@@ -0,0 +1,113 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core.models import AktuelltPage, RssFeed
+from core.services import skv_rss
+
+
+def discover_feed_urls():
+    """Alla unika RSS-länkar i publicerade Aktuellt-sidor (i sidordning)."""
+    urls = {}
+    for page in AktuelltPage.objects.live().order_by('path'):
+        for block in page.feeds:
+            url = (block.value.get('feed_url') or '').strip()
+            if url and skv_rss.is_allowed(url):
+                urls.setdefault(url, None)
+    return list(urls)
+
+
+def _refresh(feed, cache_seconds):
+    # Samma lås som request-vägen, så en webbworker inte hämtar samtidigt
+    if not cache.add(skv_rss.lock_key(feed), 1, skv_rss.LOCK_SECONDS):
+        return {'ok': True, 'locked': True}
+    try:
+        return skv_rss.refresh_feed(feed, cache_seconds)
+    finally:
+        cache.delete(skv_rss.lock_key(feed))
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Hämtar alla RSS-flöden från Aktuellt-sidorna parallellt och sparar dem i databasen'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Antal parallella hämtningar')
+        parser.add_argument(
+            '--cache-seconds',
+            type=int,
+            default=1800,
+            help='Hur länge ett hämtat flöde räknas som färskt (default: 1800)',
+        )
+        parser.add_argument(
+            '--max-age',
+            type=int,
+            default=7200,
+            metavar='SEKUNDER',
+            help='Flöden utan lyckad hämtning på så här länge räknas som inaktuella (default: 7200)',
+        )
+        parser.add_argument(
+            '--loop',
+            type=int,
+            default=0,
+            metavar='SEKUNDER',
+            help='Kör om och om igen med så här många sekunders paus (0 = en gång)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            stale = self.refresh_all(options)
+
+            if not options['loop']:
+                if stale:
+                    raise CommandError(f'{len(stale)} flöden är inaktuella: ' + ', '.join(stale))
+                return
+            time.sleep(options['loop'])
+
+    def refresh_all(self, options):
+        urls = discover_feed_urls()
+        if not urls:
+            self.stdout.write('Inga RSS-flöden hittades på publicerade Aktuellt-sidor')
+            return []
+
+        feeds = []
+        for url in urls:
+            feed, _ = RssFeed.objects.get_or_create(url=url)
+            feeds.append(feed)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers'], thread_name_prefix='refresh-feeds') as pool:
+            results = list(pool.map(lambda f: _refresh(f, options['cache_seconds']), feeds))
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(f"{'Flöde':<60} {'Status':>7} {'Inlägg':>7} {'Fetch (ms)':>11} {'Parse (ms)':>11}")
+        for feed, info in zip(feeds, results):
+            if info.get('locked'):
+                status = 'låst'
+            elif not info['ok']:
+                status = 'fel'
+            else:
+                status = str(info['status'])
+            self.stdout.write(
+                f"{feed.url[:60]:<60} {status:>7} {info.get('items', 0):>7} "
+                f"{info.get('fetch', 0) * 1000:>11.0f} {info.get('parse', 0) * 1000:>11.0f}"
+            )
+            if info.get('error'):
+                self.stdout.write(self.style.WARNING(f'  {info["error"]}'))
+
+        limit = timezone.now() - timedelta(seconds=options['max_age'])
+        stale = [
+            f.url for f in RssFeed.objects.filter(url__in=urls)
+            if f.last_success_at is None or f.last_success_at < limit
+        ]
+
+        ok = sum(1 for info in results if info['ok'])
+        self.stdout.write(self.style.SUCCESS(f'✓ {ok}/{len(feeds)} flöden uppdaterade på {elapsed:.1f} s'))
+        for url in stale:
+            self.stdout.write(self.style.ERROR(f'✗ Inaktuellt: {url}'))
+        return stale
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core.services import skv_rss
+
+
+class Command(BaseCommand):
+    help = 'Visar hur ofta Aktuellt-flödena var färska, inaktuella eller saknades (core.services.skv_rss)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Nollställ räknarna efter utskriften')
+
+    def handle(self, *args, **options):
+        stats = skv_rss.get_stats()
+        reads = stats['hit'] + stats['stale'] + stats['miss']
+        self.stdout.write(f"Flödesläsningar:  {reads}")
+        self.stdout.write(f"Färska:           {stats['hit']} ({stats['hit_ratio']:.1%})")
+        self.stdout.write(f"Inaktuella:       {stats['stale']}")
+        self.stdout.write(f"Aldrig hämtade:   {stats['miss']}")
+        self.stdout.write(f"Hämtningar:       {stats['refresh']} ({stats['not_modified']} oförändrade, {stats['error']} fel)")
+
+        if options['reset']:
+            skv_rss.reset_stats()
+            self.stdout.write(self.style.SUCCESS('✓ Räknarna nollställda'))
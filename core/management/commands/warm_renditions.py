@@ -0,0 +1,72 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core import renditions
+
+
+def _warm(args):
+    # Körs i en egen process – egen DB-anslutning som stängs efteråt
+    try:
+        return renditions.generate(*args)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Förgenererar alla bildrenditions som templatesen använder (hero, teamfoton, '
+        'bilder i blogginlägg och "Om oss") för publicerade sidor, parallellt i flera processer'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=multiprocessing.cpu_count(),
+            help='Antal processer (default: antal kärnor)',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Lista bara bilderna och formaten')
+
+    def handle(self, *args, **options):
+        images = renditions.live_images()
+        jobs = [(image_id, sorted(specs)) for image_id, specs in sorted(images.items())]
+        total_specs = sum(len(specs) for _, specs in jobs)
+        self.stdout.write(f"{len(jobs)} bilder, {total_specs} renditions att kontrollera")
+
+        if options['dry_run']:
+            for image_id, specs in jobs:
+                self.stdout.write(f"  #{image_id}: {', '.join(specs)}")
+            return
+        if not jobs:
+            # Inga publicerade sidor med bilder – ingen processpool att starta
+            self.stdout.write(self.style.SUCCESS("✓ Inga bilder att förgenerera"))
+            return
+
+        start = time.perf_counter()
+        created = failed = 0
+        connection.close()   # ärvs inte av processerna
+        with ProcessPoolExecutor(
+            max_workers=max(1, options['processes']),
+            mp_context=multiprocessing.get_context('fork'),
+        ) as pool:
+            futures = [pool.submit(_warm, job) for job in jobs]
+            for done, future in enumerate(as_completed(futures), start=1):
+                image_id, title, new, ms, error = future.result()
+                if error:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(f"[{done}/{len(jobs)}] #{image_id} {title}: {error}"))
+                    continue
+                created += new
+                self.stdout.write(f"[{done}/{len(jobs)}] #{image_id} {title}: {new} nya ({ms:.0f} ms)")
+
+        elapsed = time.perf_counter() - start
+        if failed:
+            raise CommandError(f"{failed} bilder misslyckades ({created} renditions skapade på {elapsed:.1f} s)")
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {created} nya renditions för {len(jobs)} bilder på {elapsed:.1f} s "
+            f"({options['processes']} process(er))"
+        ))
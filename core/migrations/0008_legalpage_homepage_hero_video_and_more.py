@@ -0,0 +1,71 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:33
+
+import django.db.models.deletion
+import wagtail.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_alter_homepage_options_and_more'),
+        ('wagtailcore', '0095_groupsitepermission'),
+        ('wagtaildocs', '0014_alter_document_file_size'),
+        ('wagtailimages', '0027_image_description'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LegalPage',
+            fields=[
+                ('page_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='wagtailcore.page')),
+                ('body', wagtail.fields.RichTextField(blank=True, verbose_name='Innehåll')),
+            ],
+            options={
+                'verbose_name': 'Juridisk sida',
+                'verbose_name_plural': 'Juridiska sidor',
+            },
+            bases=('wagtailcore.page',),
+        ),
+        migrations.AddField(
+            model_name='homepage',
+            name='hero_video',
+            field=models.ForeignKey(blank=True, help_text='MP4-video för hero-bakgrund. Lämna tom för att använda bild.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtaildocs.document', verbose_name='Hero video'),
+        ),
+        migrations.AddField(
+            model_name='navigationsettings',
+            name='aktuellt_page',
+            field=models.ForeignKey(blank=True, help_text='Välj sidan för Aktuellt (Skatteverket-flöde)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtailcore.page', verbose_name='Aktuellt-sida'),
+        ),
+        migrations.AddField(
+            model_name='servicespage',
+            name='hero_image',
+            field=models.ForeignKey(blank=True, help_text='Stor toppbild för sidan', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtailimages.image', verbose_name='Hero-bild'),
+        ),
+        migrations.AddField(
+            model_name='servicespage',
+            name='hero_video',
+            field=models.ForeignKey(blank=True, help_text='MP4-video för hero-bakgrund. Lämna tom för att använda bild.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtaildocs.document', verbose_name='Hero video'),
+        ),
+        migrations.AlterField(
+            model_name='servicespage',
+            name='services',
+            field=wagtail.fields.StreamField([('service', 8)], blank=True, block_lookup={0: ('wagtail.blocks.CharBlock', (), {'help_text': 'Lucide-ikon, t.ex. calculator', 'label': 'Ikon'}), 1: ('wagtail.blocks.CharBlock', (), {'label': 'Titel'}), 2: ('wagtail.blocks.TextBlock', (), {'label': 'Beskrivning'}), 3: ('wagtail.blocks.CharBlock', (), {'label': 'Funktion'}), 4: ('wagtail.blocks.ListBlock', (3,), {'label': 'Funktioner/Fördelar'}), 5: ('wagtail.blocks.CharBlock', (), {'label': 'Prisinformation', 'required': False}), 6: ('wagtail.blocks.CharBlock', (), {'default': 'Läs mer', 'label': 'Knapptext'}), 7: ('wagtail.blocks.URLBlock', (), {'label': 'Knapp-länk', 'required': False}), 8: ('wagtail.blocks.StructBlock', [[('icon', 0), ('title', 1), ('description', 2), ('features', 4), ('price_info', 5), ('cta_text', 6), ('cta_link', 7)]], {'icon': 'briefcase', 'label': 'Tjänst'})}, verbose_name='Tjänster'),
+        ),
+        migrations.CreateModel(
+            name='AktuelltPage',
+            fields=[
+                ('page_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='wagtailcore.page')),
+                ('hero_lede', models.CharField(blank=True, default='Nyheter, notiser och pressmeddelanden från Skatteverket.', max_length=255, verbose_name='Hero ingress')),
+                ('intro', wagtail.fields.RichTextField(blank=True, verbose_name='Intro (valfritt)')),
+                ('feeds', wagtail.fields.StreamField([('feed', 4)], blank=True, block_lookup={0: ('wagtail.blocks.CharBlock', (), {'default': 'Skatteverket', 'label': 'Rubrik', 'required': False}), 1: ('wagtail.blocks.URLBlock', (), {'label': 'RSS-länk'}), 2: ('wagtail.blocks.IntegerBlock', (), {'default': 12, 'label': 'Antal', 'max_value': 50, 'min_value': 1, 'required': False}), 3: ('wagtail.blocks.CharBlock', (), {'help_text': 'Visas under rubriken', 'label': 'Valfri text (liten notis)', 'required': False}), 4: ('wagtail.blocks.StructBlock', [[('title', 0), ('feed_url', 1), ('max_items', 2), ('note', 3)]], {})}, verbose_name='Flöden')),
+                ('body', wagtail.fields.StreamField([('heading', 0), ('paragraph', 1)], blank=True, block_lookup={0: ('wagtail.blocks.CharBlock', (), {'label': 'Rubrik'}), 1: ('wagtail.blocks.RichTextBlock', (), {'label': 'Text'})}, verbose_name='Extra innehåll (valfritt)')),
+                ('hero_image', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtailimages.image', verbose_name='Hero-bild')),
+                ('hero_video', models.ForeignKey(blank=True, help_text='MP4-video för hero-bakgrund. Lämna tom för att använda bild.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtaildocs.document', verbose_name='Hero video')),
+            ],
+            options={
+                'verbose_name': 'Aktuellt',
+            },
+            bases=('wagtailcore.page',),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_legalpage_homepage_hero_video_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RssFeed',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500, unique=True, verbose_name='RSS-länk')),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=64)),
+                ('fresh_until', models.DateTimeField(blank=True, null=True)),
+                ('last_fetched_at', models.DateTimeField(blank=True, null=True, verbose_name='Senast hämtad')),
+                ('last_success_at', models.DateTimeField(blank=True, null=True, verbose_name='Senast lyckad')),
+                ('last_error', models.TextField(blank=True, verbose_name='Senaste fel')),
+            ],
+            options={
+                'verbose_name': 'RSS-flöde',
+                'verbose_name_plural': 'RSS-flöden',
+            },
+        ),
+        migrations.CreateModel(
+            name='RssFeedItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('guid', models.CharField(max_length=500)),
+                ('title', models.CharField(blank=True, max_length=500)),
+                ('link', models.URLField(blank=True, max_length=1000)),
+                ('published', models.CharField(blank=True, max_length=64)),
+                ('summary', models.CharField(blank=True, max_length=180)),
+                ('published_dt', models.DateTimeField(blank=True, null=True)),
+                ('first_seen_at', models.DateTimeField(auto_now_add=True)),
+                ('feed', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='core.rssfeed')),
+            ],
+            options={
+                'verbose_name': 'RSS-inlägg',
+                'verbose_name_plural': 'RSS-inlägg',
+                'indexes': [models.Index(fields=['feed', '-published_dt', '-id'], name='core_rssitem_feed_latest')],
+                'constraints': [models.UniqueConstraint(fields=('feed', 'guid'), name='core_rssfeeditem_unique_guid')],
+            },
+        ),
+    ]
@@ -1,4 +1,7 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import Case, Subquery, When
+from django.utils.cache import add_never_cache_headers
 from django.utils.text import slugify
 from wagtail.models import Page
 from wagtail.fields import RichTextField, StreamField
@@ -7,11 +10,9 @@ from wagtail import blocks
 from wagtail.images.blocks import ImageChooserBlock
 from wagtail.contrib.settings.models import BaseSiteSetting, register_setting
 from wagtail.documents.models import Document
-import random
-from datetime import datetime
+from wagtail.search import index
 
 from wagtail.admin.panels import FieldPanel
-from core.services.skv_rss import get_rss_items
 
 # =============================================================================
 # BASE PAGE CLASS - All sidor ärver från denna
@@ -158,6 +159,9 @@ class HomePage(BasePage):
     OBSERVERA: HomePage använder sin egen unika hero (home_page.html)
     och har INTE hero_video field - den är speciell!
     """
+
+    # Helsidescachen töms när team-sidan publiceras (featured-medlemmen)
+    page_cache_depends_on = ("team.TeamPage",)
     
     # Hero section
     hero_title = models.CharField(
@@ -336,38 +340,31 @@ class HomePage(BasePage):
     
     def get_context(self, request):
         """Hämtar EN slumpmässig featured team-medlem"""
+        from team.models import TeamMember, TeamPage
+
         context = super().get_context(request)
 
-        # 1) Hämta navigation settings
+        # Team-sida vald i settings, annars första live TeamPage (som subquery)
         nav = NavigationSettings.for_request(request)
-        team_page = None
-
-        # Om team-sida är vald i settings, använd den
-        if getattr(nav, "team_page", None):
-            team_page = nav.team_page.specific
+        if nav.team_page_id:
+            members = TeamMember.objects.filter(page_id=nav.team_page_id)
         else:
-            # Fallback: första live TeamPage
-            from team.models import TeamPage
-            team_page = TeamPage.objects.live().first()
-
-        featured_member = None
-
-        if team_page:
-            # Alla medlemmar på den valda team-sidan
-            members_qs = team_page.team_members.all()
-
-            # Försök först med de som är "available"
-            available_members = [m for m in members_qs if m.availability_status == "available"]
-
-            # Om inga är available → ta alla
-            if not available_members:
-                available_members = list(members_qs)
-
-            # Slumpa en
-            if available_members:
-                featured_member = random.choice(available_members)
+            first_team_page = TeamPage.objects.live().order_by("path").values("pk")[:1]
+            members = TeamMember.objects.filter(page_id=Subquery(first_team_page))
+
+        # Slumpa i databasen: i första hand bland "available", annars bland alla
+        context["featured_member"] = (
+            members.select_related("photo")
+            .prefetch_related("photo__renditions")
+            .order_by(
+                Case(When(availability_status="available", then=0), default=1),
+                "?",
+            )
+            .first()
+        )
 
-        context["featured_member"] = featured_member
+        # Eget Instagram-flöde när token finns, annars Common Ninja-widgeten
+        context["instagram_feed"] = bool(settings.INSTAGRAM_ACCESS_TOKEN)
         return context
 
 
@@ -416,6 +413,12 @@ class ServicesPage(BasePage):
         ], icon='briefcase', label='Tjänst'))
     ], blank=True, use_json_field=True, verbose_name="Tjänster")
 
+    # Vikter i PostgreSQL-sökningen: titel (2) A, ingress B, brödtext C
+    search_fields = Page.search_fields + [
+        index.SearchField('intro', boost=1.5),
+        index.SearchField('services', boost=1),
+    ]
+
     content_panels = Page.content_panels + [
         FieldPanel('hero_image'),
         FieldPanel('hero_video'),  # ← VIDEO FIELD!
@@ -441,6 +444,10 @@ class LegalPage(BasePage):
         verbose_name="Innehåll"
     )
 
+    search_fields = Page.search_fields + [
+        index.SearchField("body", boost=1),
+    ]
+
     content_panels = Page.content_panels + [
         FieldPanel("body"),
     ]
@@ -520,35 +527,106 @@ class AktuelltPage(BasePage):
         FieldPanel("body"),
     ]
 
+    # Max väntetid (sekunder) på flödena innan sidan renderas ändå
+    feed_deadline = 3.0
+    timeline_limit = 9
+    # Flödena uppdateras utan publicering – kortare tid i helsidescachen
+    page_cache_seconds = 300
+
     def get_context(self, request, *args, **kwargs):
+        from core.services.skv_rss import get_many_rss_items, get_timeline
+
         ctx = super().get_context(request, *args, **kwargs)
 
         feed_sections = []
-        all_items = []
 
-        for b in self.feeds:
-            v = b.value
-            items = get_rss_items(v["feed_url"], v.get("max_items") or 12)
-            title = v.get("title") or "Flöde"
-
-            for it in items:
-                all_items.append({**it, "source": title})
+        feeds = [b.value for b in self.feeds]
+        results = get_many_rss_items(
+            [(v["feed_url"], v.get("max_items") or 12) for v in feeds],
+            deadline=self.feed_deadline,
+        )
 
+        for v, items in zip(feeds, results):
             feed_sections.append({
-                "title": title,
+                "title": v.get("title") or "Flöde",
                 "note": v.get("note") or "",
-                "items": items,
+                "items": items or [],
+                # Hann inte hämtas före deadline – sektionen laddas om via HTMX
+                "loading": items is None,
             })
 
-        # Sortera på publiceringsdatum (senaste först)
-        all_items.sort(
-            key=lambda it: it.get("published_dt") or datetime.min,
-            reverse=True,
-        )
-
         ctx["feed_sections"] = feed_sections
-        ctx["latest_items"] = all_items[:9]
+        # Senaste först över alla flöden – sammanslagen och cachad per sidversion
+        ctx["latest_items"] = get_timeline(
+            f"{self.pk}:{self.latest_revision_id}",
+            [(s["title"], items) for s, items in zip(feed_sections, results)],
+            self.timeline_limit,
+        )
         return ctx
 
+    def serve(self, request, *args, **kwargs):
+        response = super().serve(request, *args, **kwargs)
+        # Sektioner som fortfarande laddar får inte hamna i någon cache
+        sections = getattr(response, "context_data", None) or {}
+        if any(s["loading"] for s in sections.get("feed_sections", [])):
+            add_never_cache_headers(response)
+        return response
+
     class Meta:
         verbose_name = "Aktuellt"
+
+
+# =============================================================================
+# RSS - lagrade flöden och inlägg (fylls av core.services.skv_rss)
+# =============================================================================
+class RssFeed(models.Model):
+    """Ett RSS-flöde som hämtas från Skatteverket, med HTTP-validatorer och hämtstatus."""
+
+    url = models.URLField(max_length=500, unique=True, verbose_name="RSS-länk")
+
+    # Validatorer för villkorlig GET (If-None-Match / If-Modified-Since)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+
+    # Stale-while-revalidate: före fresh_until räknas flödet som färskt
+    fresh_until = models.DateTimeField(null=True, blank=True)
+    last_fetched_at = models.DateTimeField(null=True, blank=True, verbose_name="Senast hämtad")
+    last_success_at = models.DateTimeField(null=True, blank=True, verbose_name="Senast lyckad")
+    last_error = models.TextField(blank=True, verbose_name="Senaste fel")
+
+    class Meta:
+        verbose_name = "RSS-flöde"
+        verbose_name_plural = "RSS-flöden"
+
+    def __str__(self):
+        return self.url
+
+
+class RssFeedItem(models.Model):
+    """Ett inlägg i ett flöde. Upsertas per (flöde, guid), så historiken växer över tid."""
+
+    feed = models.ForeignKey(RssFeed, on_delete=models.CASCADE, related_name="items")
+    guid = models.CharField(max_length=500)
+
+    title = models.CharField(max_length=500, blank=True)
+    link = models.URLField(max_length=1000, blank=True)
+    published = models.CharField(max_length=64, blank=True)
+    summary = models.CharField(max_length=180, blank=True)
+    published_dt = models.DateTimeField(null=True, blank=True)
+
+    first_seen_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["feed", "guid"], name="core_rssfeeditem_unique_guid"),
+        ]
+        indexes = [
+            # Matchar skv_rss.get_latest_items (DESC, NULLS FIRST i Postgres) –
+            # frågan filtrerar bort odaterade inlägg i stället för NULLS LAST
+            models.Index(fields=["feed", "-published_dt", "-id"], name="core_rssitem_feed_latest"),
+        ]
+        verbose_name = "RSS-inlägg"
+        verbose_name_plural = "RSS-inlägg"
+
+    def __str__(self):
+        return self.title
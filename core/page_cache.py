@@ -0,0 +1,196 @@
+# core/page_cache.py
+"""
+Helsidescache för Wagtail-sidor (anonyma GET/HEAD).
+
+Svaret från en Wagtail-sida sparas i Django-cachen, nycklat på värd, sökväg
+(inkl. querystring) och HTMX-headers. En träff serveras direkt i middlewaren –
+utan trädlookup, get_context eller templaterendering.
+
+Invalidering sker via versionstokens i stället för att leta upp nycklar:
+  * en per sida      – byts när sidan, en förälder/ättling eller en sida den
+                       beror på (Page.page_cache_depends_on) publiceras
+  * en global        – byts när NavigationSettings/Site ändras eller en sida
+                       som länkas från base.html (nav, footer) publiceras
+En cachad post som sparats med en äldre token används aldrig igen.
+
+CSRF-token i formulären (callback-modalen finns på varje sida) sparas som
+platshållare och ersätts med besökarens egen token vid varje träff.
+
+Aktiveras med core.page_cache.PageCacheMiddleware sist i MIDDLEWARE.
+PAGE_CACHE_SECONDS = 0 stänger av cachen.
+"""
+import hashlib
+import re
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+GLOBAL_VERSION_KEY = "pagecache:v:global"
+CSRF_PLACEHOLDER = "__PAGE_CACHE_CSRF__"
+CSRF_INPUT_RE = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+# HTMX-requests kan få andra svar (t.ex. hx-select i Aktuellt) – del av nyckeln
+HTMX_HEADERS = ("HTTP_HX_REQUEST", "HTTP_HX_TARGET", "HTTP_HX_BOOSTED", "HTTP_HX_HISTORY_RESTORE_REQUEST")
+VARY_HEADERS = ("HX-Request", "HX-Target", "HX-Boosted", "HX-History-Restore-Request")
+
+# Headers som inte sparas (sätts per request av yttre middleware)
+SKIP_HEADERS = {"set-cookie", "vary", "etag", "x-page-cache"}
+
+
+def _page_version_key(page_id):
+    return f"pagecache:v:page:{page_id}"
+
+
+def _entry_key(request):
+    parts = [request.get_host(), request.get_full_path()]
+    parts += [request.META.get(h, "") for h in HTMX_HEADERS]
+    digest = hashlib.md5("|".join(parts).encode("utf-8")).hexdigest()
+    return f"pagecache:entry:{digest}"
+
+
+def _versions(page_id):
+    """Aktuella tokens för (global, sida). Saknade tokens skapas."""
+    keys = [GLOBAL_VERSION_KEY, _page_version_key(page_id)]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, uuid.uuid4().hex, None)
+            found[key] = cache.get(key)
+    return found[keys[0]], found[keys[1]]
+
+
+def invalidate_all():
+    cache.set(GLOBAL_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def invalidate_pages(page_ids):
+    cache.set_many({_page_version_key(pk): uuid.uuid4().hex for pk in page_ids}, None)
+
+
+def is_cacheable_request(request):
+    if not getattr(settings, "PAGE_CACHE_SECONDS", 0):
+        return False
+    if request.method not in ("GET", "HEAD"):
+        return False
+    # Inloggade (Wagtail-userbar, förhandsvisning) och besökare med session
+    # (t.ex. meddelanden) får alltid ett färskt svar
+    return settings.SESSION_COOKIE_NAME not in request.COOKIES
+
+
+def _is_cacheable_response(request, response):
+    page = getattr(request, "page_cache_page", None)
+    if page is None or response.status_code != 200 or response.streaming:
+        return False
+    if response.cookies or getattr(request, "is_preview", False):
+        return False
+    cache_control = response.get("Cache-Control", "")
+    return not any(d in cache_control for d in ("private", "no-cache", "no-store"))
+
+
+def _etag(content):
+    return '"%s"' % hashlib.md5(content).hexdigest()
+
+
+def _not_modified(request, etag):
+    # Utan CSRF-cookie stämmer inte token i webbläsarens kopia – skicka nytt svar
+    if settings.CSRF_COOKIE_NAME not in request.COOKIES:
+        return False
+    return etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+
+
+class PageCacheMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not is_cacheable_request(request):
+            return self.get_response(request)
+
+        key = _entry_key(request)
+        entry = cache.get(key)
+        if entry is not None and _versions(entry["page_id"]) == entry["versions"]:
+            return self.serve_cached(request, entry)
+
+        response = self.get_response(request)
+        if _is_cacheable_response(request, response):
+            self.store(request, response, key)
+        return response
+
+    def serve_cached(self, request, entry):
+        if _not_modified(request, entry["etag"]):
+            response = HttpResponseNotModified()
+        else:
+            content = entry["content"].replace(CSRF_PLACEHOLDER.encode(), get_token(request).encode())
+            response = HttpResponse(content, status=200)
+            for header, value in entry["headers"]:
+                response[header] = value
+        response["ETag"] = entry["etag"]
+        response["X-Page-Cache"] = "hit"
+        patch_vary_headers(response, VARY_HEADERS)
+        return response
+
+    def store(self, request, response, key):
+        page = request.page_cache_page
+        # Versionerna läses före sparandet – publiceras sidan under tiden blir posten ogiltig direkt
+        versions = _versions(page.pk)
+        content = CSRF_INPUT_RE.sub(r"\g<1>%s\g<2>" % CSRF_PLACEHOLDER, response.content.decode(response.charset))
+        content = content.encode(response.charset)
+        etag = _etag(content)
+
+        timeout = getattr(page, "page_cache_seconds", None) or settings.PAGE_CACHE_SECONDS
+        cache.set(key, {
+            "page_id": page.pk,
+            "versions": versions,
+            "etag": etag,
+            "content": content,
+            "headers": [(h, v) for h, v in response.items() if h.lower() not in SKIP_HEADERS],
+        }, timeout)
+
+        response["ETag"] = etag
+        response["X-Page-Cache"] = "miss"
+        patch_vary_headers(response, VARY_HEADERS)
+
+
+# --- Invalidering ---
+
+def nav_page_ids():
+    """Sidor som länkas från base.html på alla sidor (navigation och footer)."""
+    from core.models import NavigationSettings
+
+    fields = ("services_page_id", "team_page_id", "blog_page_id", "contact_page_id", "aktuellt_page_id")
+    ids = set()
+    for row in NavigationSettings.objects.values_list(*fields):
+        ids.update(pk for pk in row if pk)
+    return ids
+
+
+def related_page_ids(page):
+    """
+    Sidor vars cachade svar visar något av `page`: sidan själv, föräldrar
+    (listor, t.ex. bloggindex), ättlingar (brödsmulor) och sidtyper som
+    deklarerar ett beroende via `page_cache_depends_on`.
+    """
+    from wagtail.models import Page, get_page_models
+
+    ids = set(Page.objects.ancestor_of(page, inclusive=True).values_list("pk", flat=True))
+    ids.update(Page.objects.descendant_of(page).values_list("pk", flat=True))
+
+    label = page.specific_class._meta.label
+    for model in get_page_models():
+        if label in getattr(model, "page_cache_depends_on", ()):
+            ids.update(model.objects.values_list("pk", flat=True))
+    return ids
+
+
+def invalidate_page(page):
+    # Sidor som syns i nav/footer (och integritetspolicyn via slugurl) finns på alla sidor
+    if page.pk in nav_page_ids() or page.slug == "integritetspolicy":
+        invalidate_all()
+    else:
+        invalidate_pages(related_page_ids(page))
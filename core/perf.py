@@ -0,0 +1,261 @@
+# core/perf.py
+"""
+Verktyg för prestandatesterna (queries, renderingstid och svarsstorlek).
+
+`build_site()` bygger ett realistiskt sidträd, `PerfTestCase.measure()` mäter
+en URL och `assertBudget()` fäller testet när antalet queries överstiger
+budgeten. Alla mätningar samlas i en JSON-rapport som kan jämföras mellan
+commits:
+
+    PERF_REPORT=perf-main.json python manage.py test core blog team contact
+
+Utan PERF_REPORT skrivs rapporten till <tempdir>/harpans-perf-report.json.
+"""
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from wagtail.images.models import Image
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.models import Page, Site
+
+_results = {}
+_client_ips = itertools.count(1)
+
+
+def report_path():
+    return os.environ.get("PERF_REPORT") or os.path.join(tempfile.gettempdir(), "harpans-perf-report.json")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5,
+        ).stdout.strip()
+    except OSError:
+        return ""
+
+
+def write_report():
+    """Skriver alla mätningar hittills i processen (anropas efter varje testklass)."""
+    data = {
+        "commit": _git_commit(),
+        "created": timezone.now().isoformat(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "results": dict(sorted(_results.items())),
+    }
+    path = report_path()
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+    return path
+
+
+# --- Fixtures ---
+
+LOREM = (
+    "Redovisning, bokslut och deklaration för små och medelstora företag. "
+    "Vi hjälper dig med moms, löner och rådgivning så att du kan fokusera på verksamheten. "
+)
+
+
+def _richtext(paragraphs):
+    return "".join(f"<p>{LOREM * 3}</p>" for _ in range(paragraphs))
+
+
+def build_site(blog_posts=3, team_members=20, feed_urls=()):
+    """
+    Bygger ett komplett sidträd som på harpans.se: startsida, tjänster,
+    integritetspolicy, team, blogg, kontakt och (om feed_urls anges) Aktuellt.
+    Returnerar en dict med sidorna.
+    """
+    from blog.models import BlogIndexPage, BlogPost
+    from contact.models import ContactPage
+    from core.models import AktuelltPage, HomePage, LegalPage, NavigationSettings, ServicesPage
+    from team.models import TeamMember, TeamPage
+
+    image = Image.objects.create(title="Foto", file=get_test_image_file(size=(800, 600)))
+
+    root = Page.objects.get(depth=1)
+    home = root.add_child(instance=HomePage(
+        title="Harpans Redovisning", slug="harpans", hero_image=image,
+        hero_subtitle=_richtext(1), about_text=_richtext(2),
+    ))
+    Site.objects.all().delete()
+    site = Site.objects.create(hostname="localhost", root_page=home, is_default_site=True, site_name="Harpans")
+
+    pages = {"home": home, "image": image}
+
+    pages["services"] = home.add_child(instance=ServicesPage(
+        title="Tjänster", slug="tjanster", hero_image=image, intro=_richtext(1),
+        services=[
+            ("service", {
+                "icon": "calculator", "title": f"Tjänst {i}", "description": LOREM,
+                "features": ["Bokföring", "Moms", "Bokslut", "Deklaration"],
+                "price_info": "Från 1 500 kr/mån", "cta_text": "Läs mer", "cta_link": "",
+            })
+            for i in range(8)
+        ],
+    ))
+    pages["legal"] = home.add_child(instance=LegalPage(
+        title="Integritetspolicy", slug="integritetspolicy", body=_richtext(20),
+    ))
+
+    team = home.add_child(instance=TeamPage(title="Team", slug="team", hero_image=image))
+    statuses = ["available", "limited", "vacation", "unavailable"]
+    TeamMember.objects.bulk_create(
+        TeamMember(
+            page=team, sort_order=i, name=f"Anna Andersson {i}", title="Redovisningskonsult",
+            bio=_richtext(1), photo=image, email=f"anna{i}@harpans.se", phone="070-123 45 67",
+            calendly_url="https://calendly.com/harpans", availability_status=statuses[i % 4],
+        )
+        for i in range(team_members)
+    )
+    pages["team"] = team
+
+    blog = home.add_child(instance=BlogIndexPage(title="Blogg", slug="blogg", hero_image=image, intro=_richtext(1)))
+    now = timezone.now()
+    for i in range(blog_posts):
+        post = blog.add_child(instance=BlogPost(
+            title=f"Nyhet om moms och skatter {i}", slug=f"nyhet-{i}",
+            date=now - timedelta(days=i), intro=LOREM[:200], send_notification=False,
+            body=[
+                ("heading", "Bakgrund"),
+                ("paragraph", _richtext(3)),
+                ("image", image),
+                ("quote", LOREM),
+                ("heading", "Så påverkas du"),
+                ("paragraph", _richtext(4)),
+            ],
+        ))
+        pages.setdefault("post", post)
+    pages["blog"] = blog
+
+    pages["contact"] = home.add_child(instance=ContactPage(
+        title="Kontakt", slug="kontakt", hero_image=image, intro=_richtext(1),
+        address="Storgatan 1\n123 45 Staden", phone="010-123 45 67", email="info@harpans.se",
+    ))
+
+    aktuellt = None
+    if feed_urls:
+        aktuellt = home.add_child(instance=AktuelltPage(
+            title="Aktuellt", slug="aktuellt", hero_image=image,
+            feeds=[
+                ("feed", {"title": f"Flöde {i}", "feed_url": url, "max_items": 12, "note": ""})
+                for i, url in enumerate(feed_urls)
+            ],
+        ))
+        pages["aktuellt"] = aktuellt
+
+    # Publicera en revision per sida, som i admin – add_child() ger ingen
+    # live_revision_id, och då används aldrig blockcachen (core.block_cache)
+    for page in Page.objects.filter(depth__gt=1).specific():
+        page.save_revision().publish()
+    for page in pages.values():
+        if isinstance(page, Page):
+            page.refresh_from_db()
+
+    nav = NavigationSettings.for_site(site)
+    nav.services_page = pages["services"]
+    nav.team_page = team
+    nav.blog_page = blog
+    nav.contact_page = pages["contact"]
+    nav.aktuellt_page = aktuellt
+    nav.booking_url = "https://calendly.com/harpans"
+    nav.linkedin_url = "https://www.linkedin.com/company/harpans"
+    nav.save()
+
+    return pages
+
+
+# --- Testbas ---
+
+class PerfTestCase(TestCase):
+    """
+    Bas för budgettesterna. Helsidescachen är avstängd (vi mäter
+    renderingen), blockcachen på som i produktion, och bilder/renditions
+    hamnar i en temporär MEDIA_ROOT.
+    """
+    runs = 5
+
+    @classmethod
+    def setUpClass(cls):
+        cls._media_root = tempfile.mkdtemp(prefix="harpans-perf-")
+        cls._perf_settings = override_settings(
+            MEDIA_ROOT=cls._media_root,
+            PAGE_CACHE_SECONDS=0,
+            BLOCK_CACHE_SECONDS=24 * 60 * 60,
+            RSS_FETCH_ON_REQUEST=False,
+        )
+        cls._perf_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._perf_settings.disable()
+        shutil.rmtree(cls._media_root, ignore_errors=True)
+        write_report()
+
+    def setUp(self):
+        super().setUp()
+        # Sid- och revisions-id:n återanvänds mellan testklasserna
+        cache.clear()
+
+    def measure(self, url, method="get", data=None, **extra):
+        """
+        Mäter en request efter en uppvärmning: queries, median- och maxtid
+        (ms) samt storlek. Varje request får en egen IP så att rate
+        limits inte slår till.
+        """
+        call = getattr(self.client, method)
+        times = []
+        for run in range(self.runs + 1):
+            n = next(_client_ips)
+            extra["REMOTE_ADDR"] = f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}"
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = call(url, data, **extra) if data is not None else call(url, **extra)
+                elapsed = (time.perf_counter() - start) * 1000
+            if run:
+                times.append(elapsed)
+
+        return {
+            "url": url,
+            "method": method.upper(),
+            "status": response.status_code,
+            "queries": len(queries),
+            "time_ms": round(statistics.median(times), 2),
+            "time_ms_max": round(max(times), 2),
+            "bytes": len(response.content),
+            "_sql": [q["sql"] for q in queries.captured_queries],
+        }
+
+    def assertBudget(self, name, result, queries, status=200):
+        sql = result.pop("_sql")
+        result["query_budget"] = queries
+        _results[name] = result
+
+        self.assertEqual(result["status"], status, f"{name}: {result['url']} gav {result['status']}")
+        self.assertLessEqual(
+            result["queries"], queries,
+            f"{name}: {result['queries']} queries (budget {queries})\n" + "\n".join(sql),
+        )
@@ -0,0 +1,91 @@
+# core/ratelimit.py
+"""
+Rate limiting med glidande fönster, helt i cachen (inga DB-anrop).
+
+Varje tillåten request reserverar en "plats" i det aktuella fönstret med
+cache.add(), som är atomisk i Redis, LocMem och databascachen. Högst
+`limit` requests kan alltså få en plats, även när många kommer samtidigt.
+Förra fönstrets platser räknas in viktat efter hur långt in i det nya
+fönstret vi är (sliding window counter), så en burst vid fönstergränsen
+inte ger dubbla gränsen.
+
+Bara lyckade requests räknas: ger vyn något annat än 2xx (ogiltigt
+formulär, 404, 500) lämnas platsen tillbaka, så en användare som rättar
+ett valideringsfel inte spärras av sina egna felaktiga försök.
+
+    @require_POST
+    @rate_limit("callback", limit=2, window=45 * 60, on_limited=already_received)
+    def callback_request(request): ...
+
+OBS: FileBasedCache har ingen atomisk add – använd Redis eller db i produktion.
+"""
+import math
+import time
+from functools import wraps
+
+from django.core.cache import cache
+
+
+def get_client_ip(request):
+    """Hämta klientens IP-adress (tar hänsyn till proxy/X-Forwarded-For)."""
+    x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
+    if x_forwarded_for:
+        ip = x_forwarded_for.split(",")[0].strip()
+    else:
+        ip = request.META.get("REMOTE_ADDR")
+    return ip or "0.0.0.0"
+
+
+def _slot_keys(key, window_index, limit):
+    return [f"rl:{key}:{window_index}:{i}" for i in range(limit)]
+
+
+def hit(key, limit, window, now=None):
+    """
+    Registrerar en request för `key`. Returnerar den reserverade platsens
+    nyckel om requesten ryms inom `limit` per `window` sekunder, annars
+    None (och inget räknas).
+    """
+    now = time.time() if now is None else now
+    current = int(now // window)
+    elapsed = (now % window) / window
+
+    previous = len(cache.get_many(_slot_keys(key, current - 1, limit)))
+    allowed = math.floor(limit - previous * (1 - elapsed))
+
+    # Fönstret lever två perioder så nästa fönster kan väga in det
+    for slot in _slot_keys(key, current, allowed):
+        if cache.add(slot, 1, window * 2):
+            return slot
+    return None
+
+
+def release(slot):
+    """Lämnar tillbaka en plats från hit() – requesten räknas inte."""
+    cache.delete(slot)
+
+
+def rate_limit(scope, limit, window, on_limited, key=get_client_ip):
+    """
+    Dekorator för vyer. `key(request)` avgör vem som räknas (default: IP),
+    `on_limited(request)` ger svaret när gränsen är nådd. Svar utanför 2xx
+    räknas inte mot gränsen.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            # Platsen reserveras före vyn, så samtidiga requests inte kan
+            # passera gränsen – och lämnas tillbaka om vyn inte lyckades
+            slot = hit(f"{scope}:{key(request)}", limit, window)
+            if slot is None:
+                return on_limited(request)
+            try:
+                response = view(request, *args, **kwargs)
+            except BaseException:
+                release(slot)
+                raise
+            if not 200 <= response.status_code < 300:
+                release(slot)
+            return response
+        return wrapped
+    return decorator
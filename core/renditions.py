@@ -0,0 +1,83 @@
+# core/renditions.py
+"""
+Förgenerering av bildrenditions, så att första besökaren efter en
+uppladdning inte får vänta på att Pillow skalar om en 2560px-bild.
+
+Vilka bilder som används och i vilka format härleds från de publicerade
+sidorna och teammedlemmarnas foton. Formaten speglar templatesen – lägg
+till här när en template börjar använda en ny spec.
+
+Används av `manage.py warm_renditions` (alla sidor, parallellt i flera
+processer) och av bakgrundsjobbet som körs vid publicering (core.tasks).
+"""
+import time
+from collections import defaultdict
+
+from wagtail.images import get_image_model
+from wagtail.models import Page
+
+# --- Specs per användning (se templatesen) ---
+# Hero: partials/hero.html (width-2560, poster width-1920), home_page.html
+# (fill-1920x900) och blog_post.html (fill-1920x1080) – alla varianter, så
+# en bild som flyttas mellan sidtyper redan är varm.
+HERO_SPECS = ("width-2560", "width-1920", "fill-1920x900", "fill-1920x1080")
+# team_page.html (fill-400x500) och startsidans utvalda medarbetare (fill-600x800)
+TEAM_PHOTO_SPECS = ("fill-400x500", "fill-600x800")
+# Bildblock i blogginlägg (blog/partials/body_block.html)
+BLOG_BODY_SPECS = ("original",)
+# Block i teamsidans "Om oss" (team/partials/about_block.html)
+TEAM_ABOUT_SPECS = {"image": ("width-1200",), "team_highlight": ("width-600",)}
+
+
+def page_images(page):
+    """{image_id: {specs}} för en (specific) sida: hero, blockbilder och teamfoton."""
+    images = defaultdict(set)
+
+    if getattr(page, "hero_image_id", None):
+        images[page.hero_image_id].update(HERO_SPECS)
+
+    # BlogPost: bild-id:n räknas fram vid save (blog.body_stats)
+    for image_id in getattr(page, "image_ids", None) or ():
+        images[image_id].update(BLOG_BODY_SPECS)
+
+    # TeamPage
+    if hasattr(page, "team_members"):
+        for photo_id in page.team_members.exclude(photo=None).values_list("photo_id", flat=True):
+            images[photo_id].update(TEAM_PHOTO_SPECS)
+    about = getattr(page, "about_content", None)
+    for block in about.raw_data if about else ():
+        value = block.get("value")
+        image_id = value.get("image") if isinstance(value, dict) else value
+        if block.get("type") in TEAM_ABOUT_SPECS and image_id:
+            images[image_id].update(TEAM_ABOUT_SPECS[block["type"]])
+
+    return images
+
+
+def live_images():
+    """{image_id: {specs}} för alla publicerade sidor."""
+    images = defaultdict(set)
+    for page in Page.objects.live().specific().iterator(chunk_size=100):
+        for image_id, specs in page_images(page).items():
+            images[image_id] |= specs
+    return images
+
+
+def generate(image_id, specs):
+    """
+    Skapar de renditions som saknas för en bild. Returnerar
+    (image_id, titel, antal nya, tid i ms, fel eller None).
+    """
+    start = time.perf_counter()
+    title, created, error = "", 0, None
+    try:
+        image = get_image_model().objects.get(pk=image_id)
+        title = image.title
+        existing = set(image.renditions.filter(filter_spec__in=specs).values_list("filter_spec", flat=True))
+        missing = [spec for spec in specs if spec not in existing]
+        if missing:
+            image.get_renditions(*missing)
+        created = len(missing)
+    except Exception as e:
+        error = repr(e)
+    return image_id, title, created, (time.perf_counter() - start) * 1000, error
@@ -0,0 +1,106 @@
+# core/rss_stub.py
+"""
+Minimal lokal RSS-server för tester och benchmarks (jfr core.smtp_stub).
+
+Varje sökväg är ett eget flöde med `items` genererade inlägg. Svarar med
+ETag, Last-Modified och 304 Not Modified, och kan simulera latens per request.
+
+    with LocalRSSServer(items=50) as server:
+        url = server.url("moms")      # http://127.0.0.1:PORT/moms.xml
+        server.requests               # antal GET (inkl. 304)
+        server.last_headers           # headers i senaste GET
+"""
+import http.server
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+
+BUILT_AT = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+LAST_MODIFIED = format_datetime(BUILT_AT, usegmt=True)
+
+
+def render_feed(name, items, now=None):
+    now = now or BUILT_AT
+    entries = []
+    for i in range(items):
+        published = format_datetime(now - timedelta(hours=i * 7))
+        entries.append(
+            f"<item><title>{name} nyhet {i}</title>"
+            f"<link>https://skatteverket.se/{name}/{i}</link>"
+            f"<guid>{name}-{i}</guid>"
+            f"<pubDate>{published}</pubDate>"
+            f"<description>Sammanfattning av nyhet {i} i flödet {name}. {'Lorem ipsum dolor sit amet. ' * 6}</description>"
+            f"</item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel>'
+        f"<title>{name}</title>" + "".join(entries) + "</channel></rss>"
+    ).encode("utf-8")
+
+
+class _RSSHandler(http.server.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.last_headers = dict(self.headers)
+        if server.delay:
+            time.sleep(server.delay)
+
+        name = self.path.strip("/").removesuffix(".xml") or "feed"
+        etag = f'"{name}-{server.items}"'
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match == etag or (if_none_match is None and self.headers.get("If-Modified-Since") == LAST_MODIFIED):
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        body = render_feed(name, server.items)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalRSSServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, items=20, delay=0.0):
+        super().__init__((host, port), _RSSHandler)
+        self.items = items          # inlägg per flöde
+        self.delay = delay          # sekunder per request (simulerad latens)
+        self.requests = 0
+        self.last_headers = {}
+        self.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def url(self, name):
+        return f"http://127.0.0.1:{self.port}/{name}.xml"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -1,56 +1,373 @@
 from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, wait
+import atexit
 import hashlib
+import heapq
+import threading
+import time
 
-from datetime import datetime
+from datetime import datetime, timedelta, timezone as dt_timezone
 from calendar import timegm
+from itertools import islice
 
 import feedparser
 import requests
+from django.conf import settings
 from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
 from django.utils.html import strip_tags
 
 ALLOWED_HOSTS = {"skatteverket.se", "www7.skatteverket.se", "www4.skatteverket.se"}
 
-def get_rss_items(url: str, limit: int = 8, cache_seconds: int = 1800):
+
+def get_allowed_hosts():
+    """Tillåtna flödesvärdar – kan skrivas över med RSS_ALLOWED_HOSTS (t.ex. lokal stub i tester)."""
+    return getattr(settings, "RSS_ALLOWED_HOSTS", ALLOWED_HOSTS)
+
+
+# Delad trådpool för parallell hämtning. Trådar som inte hinner klart före
+# sidans deadline jobbar vidare och fyller databasen till nästa besökare.
+FETCH_WORKERS = 8
+_executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="skv-rss")
+
+# Stale-while-revalidate: efter cache_seconds serveras lagrade inlägg medan
+# EN worker hämtar nytt i bakgrunden (RssFeed.fresh_until).
+ERROR_RETRY_SECONDS = 300       # vid fel: behåll gammal data och försök igen om 5 min
+LOCK_SECONDS = 30               # max tid en worker får hålla uppdateringslåset
+FETCH_TIMEOUT = 6
+
+# Sammanslagen tidslinje ("Senaste uppdateringarna") per sida. Versionen
+# räknas upp när ett flöde fått nya inlägg, så gamla tidslinjer blir oåtkomliga.
+TIMELINE_VERSION_KEY = "rss:skv:timeline-version"
+
+# Räknare för träffar, stale, missar, hämtningar, 304:or och fel. De räknas i
+# processens minne och läggs till räknarna i cachen (delas mellan workers)
+# högst en gång per STATS_FLUSH_SECONDS och när processen avslutas, se
+# get_stats() och `manage.py rss_stats`.
+STATS_FLUSH_SECONDS = 60
+STATS_KEYS = {
+    name: f"rss:skv:stats:{name}"
+    for name in ("hit", "stale", "miss", "refresh", "not_modified", "error")
+}
+
+_stats = dict.fromkeys(STATS_KEYS, 0)   # ej skickat till cachen än
+_stats_lock = threading.Lock()
+_stats_flushed = time.monotonic()
+
+
+def _incr(key, delta):
+    if delta and not cache.add(key, delta, timeout=None):
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            cache.set(key, delta, timeout=None)
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+        due = time.monotonic() - _stats_flushed >= STATS_FLUSH_SECONDS
+    if due:
+        flush_stats()
+
+
+def flush_stats():
+    """Lägger processens räknare till räknarna i cachen."""
+    global _stats, _stats_flushed
+    with _stats_lock:
+        counts = _stats
+        _stats = dict.fromkeys(STATS_KEYS, 0)
+        _stats_flushed = time.monotonic()
+    for name, delta in counts.items():
+        _incr(STATS_KEYS[name], delta)
+
+
+def get_stats():
+    """
+    Räknarna för alla workers sedan senaste reset (andra processer räknas
+    in när de skickat sina räknare), plus andelen färska läsningar.
+    """
+    flush_stats()
+    values = cache.get_many(list(STATS_KEYS.values()))
+    stats = {name: values.get(key, 0) for name, key in STATS_KEYS.items()}
+    reads = stats["hit"] + stats["stale"] + stats["miss"]
+    stats["hit_ratio"] = stats["hit"] / reads if reads else 0.0
+    return stats
+
+
+def reset_stats():
+    global _stats
+    with _stats_lock:
+        _stats = dict.fromkeys(STATS_KEYS, 0)
+    cache.delete_many(list(STATS_KEYS.values()))
+
+
+atexit.register(flush_stats)
+
+
+def is_allowed(url: str) -> bool:
     p = urlparse(url)
-    if p.scheme not in {"http", "https"} or p.hostname not in ALLOWED_HOSTS:
-        return []
+    return p.scheme in {"http", "https"} and p.hostname in get_allowed_hosts()
+
+
+def _parse_entry(e):
+    # Försök få ett riktigt datetime-objekt
+    published_dt = None
+    if e.get("published_parsed"):
+        published_dt = datetime.fromtimestamp(timegm(e.published_parsed), tz=dt_timezone.utc)
+    elif e.get("updated_parsed"):
+        published_dt = datetime.fromtimestamp(timegm(e.updated_parsed), tz=dt_timezone.utc)
+
+    title = (e.get("title") or "").strip()
+    link = e.get("link") or ""
+    published = e.get("published") or e.get("updated") or ""
+
+    guid = e.get("id") or link
+    if not guid:
+        guid = hashlib.sha256(f"{title}|{published}".encode("utf-8")).hexdigest()
+
+    return {
+        "guid": guid[:500],
+        "title": title[:500],
+        "link": link[:1000],
+        "published": published[:64],
+        "summary": strip_tags(e.get("summary") or "")[:180],
+        "published_dt": published_dt,
+    }
+
+
+def fetch_feed(feed):
+    """
+    Hämtar ett flöde och upsertar dess inlägg (per guid). Returnerar en
+    dict med status, antal inlägg, bytes och tider (fetch/parse i sekunder).
+
+    ETag/Last-Modified från förra hämtningen skickas med, så oförändrade
+    flöden kostar varken överföring eller parsning.
+    """
+    from core.models import RssFeedItem
+
+    headers = {"User-Agent": "HarpansRedovisning/1.0 (+https://harpans.se)"}
+    if feed.etag:
+        headers["If-None-Match"] = feed.etag
+    if feed.last_modified:
+        headers["If-Modified-Since"] = feed.last_modified
+
+    start = time.perf_counter()
+    r = requests.get(feed.url, timeout=FETCH_TIMEOUT, headers=headers)
+    info = {"status": r.status_code, "items": 0, "bytes": len(r.content),
+            "fetch": time.perf_counter() - start, "parse": 0.0}
+
+    if r.status_code == 304:
+        _count("not_modified")
+        return info
+
+    r.raise_for_status()
+
+    start = time.perf_counter()
+    parsed = feedparser.parse(r.text)
+    items = {}
+    for e in parsed.entries or []:
+        item = _parse_entry(e)
+        items[item["guid"]] = RssFeedItem(feed=feed, **item)
+    info["parse"] = time.perf_counter() - start
+
+    if items:
+        RssFeedItem.objects.bulk_create(
+            items.values(),
+            update_conflicts=True,
+            unique_fields=["feed", "guid"],
+            update_fields=["title", "link", "published", "summary", "published_dt"],
+        )
+
+    feed.etag = r.headers.get("ETag", "")[:255]
+    feed.last_modified = r.headers.get("Last-Modified", "")[:64]
+    info["items"] = len(items)
+    return info
 
-    url_key = hashlib.sha256(url.encode("utf-8")).hexdigest()
-    cache_key = f"rss:skv:{url_key}:{limit}"
 
-    cached = cache.get(cache_key)
-    if cached is not None:
-        return cached
+def refresh_feed(feed, cache_seconds: int = 1800):
+    """
+    Uppdaterar ett flöde och dess fräschhetsstatus. Vid fel behålls de
+    lagrade inläggen och ett nytt försök görs om ERROR_RETRY_SECONDS.
+    Returnerar samma dict som fetch_feed, plus "ok" och ev. "error".
+    """
+    from core.models import RssFeed
 
+    _count("refresh")
+    now = timezone.now()
     try:
-        r = requests.get(
-            url,
-            timeout=6,
-            headers={"User-Agent": "HarpansRedovisning/1.0 (+https://harpans.se)"},
+        info = fetch_feed(feed)
+    except Exception as e:
+        _count("error")
+        RssFeed.objects.filter(pk=feed.pk).update(
+            last_fetched_at=now,
+            last_error=repr(e)[:1000],
+            fresh_until=now + timedelta(seconds=ERROR_RETRY_SECONDS),
         )
-        r.raise_for_status()
-
-        feed = feedparser.parse(r.text)
-        items = []
-        for e in (feed.entries or [])[:limit]:
-            # Försök få ett riktigt datetime-objekt
-            published_dt = None
-            if e.get("published_parsed"):
-                published_dt = datetime.utcfromtimestamp(timegm(e.published_parsed))
-            elif e.get("updated_parsed"):
-                published_dt = datetime.utcfromtimestamp(timegm(e.updated_parsed))
-
-            items.append({
-                "title": (e.get("title") or "").strip(),
-                "link": e.get("link") or "",
-                "published": e.get("published") or e.get("updated") or "",
-                "summary": strip_tags(e.get("summary") or "")[:180],
-                "published_dt": published_dt,   # ← NYTT
-            })
-
-        cache.set(cache_key, items, cache_seconds)
-        return items
-    except Exception:
-        cache.set(cache_key, [], 300)  # kort cache vid fel
-        return []
+        return {"ok": False, "error": repr(e)}
+
+    if info["items"]:
+        _bump_timeline_version()
+
+    RssFeed.objects.filter(pk=feed.pk).update(
+        etag=feed.etag,
+        last_modified=feed.last_modified,
+        last_fetched_at=now,
+        last_success_at=now,
+        last_error="",
+        fresh_until=now + timedelta(seconds=cache_seconds),
+    )
+    return {"ok": True, **info}
+
+
+def fetch_on_request():
+    """
+    Får webbrequests hämta flöden själva? Sätt RSS_FETCH_ON_REQUEST=False när
+    `manage.py refresh_feeds --loop` körs, så rör requests aldrig nätverket.
+    """
+    return getattr(settings, "RSS_FETCH_ON_REQUEST", True)
+
+
+def lock_key(feed):
+    return f"rss:skv:lock:{feed.pk}"
+
+
+def _refresh_in_background(feed, cache_seconds):
+    try:
+        return refresh_feed(feed, cache_seconds)
+    finally:
+        cache.delete(lock_key(feed))
+        # Trådpoolens trådar lever vidare – lämna inte DB-connections öppna
+        connection.close()
+
+
+ITEM_FIELDS = ("id", "title", "link", "published", "summary", "published_dt")
+
+
+def get_latest_items(feed, limit: int):
+    """
+    De `limit` senaste inläggen i ett lagrat flöde, odaterade sist. Samma
+    ordning som indexet core_rssitem_feed_latest (utan NULLS LAST), så
+    Postgres läser de N senaste direkt ur det utan att sortera; odaterade
+    inlägg hämtas bara om de daterade inte räcker.
+    """
+    items = list(
+        feed.items.filter(published_dt__isnull=False)
+        .order_by("-published_dt", "-id")
+        .values(*ITEM_FIELDS)[:limit]
+    )
+    if len(items) < limit:
+        items += feed.items.filter(published_dt__isnull=True).order_by("-id").values(*ITEM_FIELDS)[:limit - len(items)]
+    return items
+
+
+def get_many_rss_items(feeds, deadline: float = 3.0, cache_seconds: int = 1800):
+    """
+    Läser flera flöden ur databasen med EN gemensam deadline för sidan.
+
+    `feeds` är en lista med (url, limit). Färska flöden läses direkt,
+    inaktuella läses direkt och uppdateras i bakgrunden (en worker per
+    flöde, via cache-lås), och flöden som aldrig hämtats hämtas parallellt
+    upp till `deadline`. Returnerar en lista i samma ordning med items per
+    flöde, eller None för flöden som inte hann bli klara – dem visar sidan
+    som "laddar".
+    """
+    from core.models import RssFeed
+
+    urls = {url for url, _ in feeds if is_allowed(url)}
+    stored = {f.url: f for f in RssFeed.objects.filter(url__in=urls)}
+    for url in urls - stored.keys():
+        stored[url], _ = RssFeed.objects.get_or_create(url=url)
+
+    now = timezone.now()
+    pending = {}
+    for url, feed in stored.items():
+        if feed.fresh_until and now < feed.fresh_until:
+            _count("hit")
+            continue
+
+        never_fetched = feed.last_success_at is None
+        _count("miss" if never_fetched else "stale")
+
+        if not fetch_on_request():
+            # Schemalagd worker sköter hämtningen – servera det vi har
+            continue
+
+        if cache.add(lock_key(feed), 1, LOCK_SECONDS):
+            future = _executor.submit(_refresh_in_background, feed, cache_seconds)
+            if never_fetched:
+                pending[url] = future
+        elif never_fetched:
+            # Någon annan hämtar redan flödet – visa "laddar" i stället för att vänta
+            pending[url] = None
+
+    if pending:
+        done, _ = wait([f for f in pending.values() if f is not None], timeout=deadline)
+    else:
+        done = set()
+
+    results = []
+    for url, limit in feeds:
+        if url not in stored:
+            results.append([])
+            continue
+        if url in pending and pending[url] not in done:
+            results.append(None)
+            continue
+        results.append(get_latest_items(stored[url], limit))
+    return results
+
+
+def _bump_timeline_version():
+    try:
+        cache.incr(TIMELINE_VERSION_KEY)
+    except ValueError:
+        cache.set(TIMELINE_VERSION_KEY, 1, None)
+
+
+def _sort_key(item):
+    # Som get_latest_items: datum, sedan id – odaterade sist
+    return item.get("published_dt") or datetime.min.replace(tzinfo=dt_timezone.utc), item.get("id", 0)
+
+
+def _tagged(items, source):
+    for it in items:
+        yield {**it, "source": source}
+
+
+def merge_timeline(sections, limit: int):
+    """
+    k-vägs merge av redan datumsorterade flöden (senaste först). `sections`
+    är en lista med (källa, items). Bara de `limit` första inläggen kopieras
+    och märks med källa – resten av flödena rörs aldrig.
+    """
+    merged = heapq.merge(
+        *(_tagged(items, source) for source, items in sections),
+        key=_sort_key,
+        reverse=True,
+    )
+    return list(islice(merged, limit))
+
+
+def get_timeline(key: str, sections, limit: int, cache_seconds: int = 1800):
+    """
+    Sammanslagen tidslinje ur cachen; byggs bara om efter att något flöde
+    fått nya inlägg. `key` ska identifiera sidan och dess flödesuppsättning.
+    Ofullständiga tidslinjer (flöden som fortfarande laddar) cachas inte.
+    """
+    if any(items is None for _, items in sections):
+        return merge_timeline([(s, items) for s, items in sections if items], limit)
+
+    version = cache.get_or_set(TIMELINE_VERSION_KEY, 1, None)
+    cache_key = f"rss:skv:timeline:{key}:{version}"
+    timeline = cache.get(cache_key)
+    if timeline is None:
+        timeline = merge_timeline(sections, limit)
+        cache.set(cache_key, timeline, cache_seconds)
+    return timeline
+
+
+def get_rss_items(url: str, limit: int = 8, cache_seconds: int = 1800):
+    """De senaste `limit` inläggen för ett flöde (väntar max FETCH_TIMEOUT på en kall hämtning)."""
+    return get_many_rss_items([(url, limit)], deadline=FETCH_TIMEOUT, cache_seconds=cache_seconds)[0] or []
@@ -0,0 +1,46 @@
+# core/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from wagtail.models import Page, Site
+from wagtail.signals import page_published, page_slug_changed, page_unpublished, post_page_move
+
+from . import page_cache
+from .models import NavigationSettings
+from .tasks import warm_page_renditions
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def invalidate_published_page(sender, instance, **kwargs):
+    """Ny/ändrad/avpublicerad sida – töm cachen för den och sidor som visar den."""
+    page_cache.invalidate_page(instance)
+
+
+@receiver(page_published)
+def warm_published_page_renditions(sender, instance, **kwargs):
+    # Bildskalningen görs i bakgrunden när publiceringen är committad
+    transaction.on_commit(lambda: warm_page_renditions.enqueue(instance.pk))
+
+
+@receiver(pre_delete, sender=Page)
+def invalidate_deleted_page(sender, instance, **kwargs):
+    # pre_delete: trädet finns kvar så föräldrar och ättlingar kan slås upp
+    if instance.live:
+        page_cache.invalidate_page(instance)
+
+
+@receiver(post_page_move)
+@receiver(page_slug_changed)
+def invalidate_moved_page(sender, instance, **kwargs):
+    # URL:er ändras för hela underträdet och kan länkas var som helst
+    page_cache.invalidate_all()
+
+
+@receiver(post_save, sender=NavigationSettings)
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+def invalidate_site_settings(sender, **kwargs):
+    """Navigation och footer finns på alla sidor."""
+    page_cache.invalidate_all()
@@ -0,0 +1,112 @@
+# core/smtp_stub.py
+"""
+Minimal lokal SMTP-server för tester och benchmarks (i stil med aiosmtpd).
+
+Tar emot mail i minnet, kan simulera nätverkslatens per kommando och
+kan be klienter komma tillbaka senare (421) eller avvisa avsändaren
+permanent (5xx) för att testa omförsök.
+
+    with LocalSMTPServer(delay=0.02) as server:
+        ... EMAIL_HOST='127.0.0.1', EMAIL_PORT=server.port ...
+        server.messages  # [(mail_from, [rcpt, ...], data), ...]
+"""
+import socketserver
+import threading
+import time
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+
+        self.reply("220 localhost ESMTP stub")
+        mail_from, rcpts = None, []
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip()
+            verb = command[:4].upper()
+
+            if server.delay:
+                time.sleep(server.delay)
+
+            if verb in ("EHLO", "HELO"):
+                self.wfile.write(b"250-localhost\r\n250 8BITMIME\r\n")
+            elif verb == "MAIL":
+                with server.lock:
+                    reject = server.fail_next > 0
+                    if reject:
+                        server.fail_next -= 1
+                if reject and server.fail_code >= 500:
+                    # Permanent fel – connectionen lever vidare
+                    self.reply(f"{server.fail_code} Sender rejected")
+                    continue
+                if reject:
+                    self.reply(f"{server.fail_code} Try again later")
+                    return
+                mail_from, rcpts = command[10:].strip(" <>"), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                rcpts.append(command[8:].strip(" <>"))
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if not chunk or chunk == b".\r\n":
+                        break
+                    data.append(chunk)
+                with server.lock:
+                    server.messages.append((mail_from, rcpts, b"".join(data)))
+                self.reply("250 OK queued")
+            elif verb in ("RSET", "NOOP"):
+                mail_from, rcpts = None, []
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0):
+        super().__init__((host, port), _SMTPHandler)
+        self.delay = delay          # sekunder per SMTP-kommando (simulerad RTT)
+        self.fail_next = 0          # antal MAIL FROM som avvisas innan vi accepterar igen
+        self.fail_code = 421        # 4xx stänger connectionen, 5xx avvisar bara mailet
+        self.messages = []
+        self.connections = 0
+        self.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
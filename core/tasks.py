@@ -0,0 +1,18 @@
+# core/tasks.py
+from django_tasks import task
+from wagtail.models import Page
+
+from . import renditions
+
+
+@task()
+def warm_page_renditions(page_id):
+    """
+    Genererar renditions för en nypublicerad sida (hero, blockbilder,
+    teamfoton), så första besökaren slipper vänta på bildskalningen.
+    """
+    page = Page.objects.filter(pk=page_id).specific().first()
+    if page is None:
+        return
+    for image_id, specs in renditions.page_images(page).items():
+        renditions.generate(image_id, sorted(specs))
@@ -0,0 +1,12 @@
+# core/templatetags/block_cache.py
+from django import template
+
+from core import block_cache
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def render_blocks(context, page, field, template_name):
+    """{% render_blocks page "body" "blog/partials/body_block.html" %} – se core.block_cache."""
+    return block_cache.render_blocks(context, page, field, template_name)
@@ -1,3 +1,640 @@
-from django.test import TestCase
+import re
+import smtplib
+import statistics
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+from django.middleware.csrf import _does_token_match
+from django.core.management.base import CommandError
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone as django_timezone
+from wagtail.images.models import Image
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.models import Page
+from wagtail.rich_text import RichText
+
+from core import block_cache
+from core import checks as core_checks
+from core import mail as pooled_mail
+from core import page_cache
+from core import renditions
+from core.management.commands import refresh_feeds, warm_renditions
+from core.models import AktuelltPage, LegalPage, NavigationSettings, RssFeed
+from core.perf import PerfTestCase, build_site
+from core.rss_stub import LocalRSSServer
+from core.smtp_stub import LocalSMTPServer
+from core.services import skv_rss
+from search import analytics, suggest
+from search.models import SearchQueryStat
+
+
+@override_settings(RSS_ALLOWED_HOSTS={"127.0.0.1"})
+class CorePageBudgetTests(PerfTestCase):
+    """Query-budgetar för core-sidorna (startsida, tjänster, policy, Aktuellt)."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.rss = LocalRSSServer(items=50).start()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.rss.stop()
+
+    @classmethod
+    def setUpTestData(cls):
+        urls = [cls.rss.url(name) for name in ("moms", "skatt", "arbetsgivare", "foretag", "deklaration")]
+        # Sökindexet uppdateras on_commit
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.pages = build_site(feed_urls=urls)
+
+        # Flödena hämtas från stubben i förväg – requesten läser bara databasen
+        from core.models import RssFeed
+        for url in urls:
+            skv_rss.refresh_feed(RssFeed.objects.create(url=url))
+
+    def test_home(self):
+        self.assertBudget("page.home", self.measure(self.pages["home"].url), queries=16)
+
+    def test_services(self):
+        self.assertBudget("page.services", self.measure(self.pages["services"].url), queries=16)
+
+    def test_legal(self):
+        self.assertBudget("page.legal", self.measure(self.pages["legal"].url), queries=15)
+
+    def test_aktuellt(self):
+        result = self.measure(self.pages["aktuellt"].url)
+        self.assertBudget("page.aktuellt", result, queries=22)
+        self.assertEqual(self.rss.requests, 5, "Aktuellt får inte hämta flöden under requesten")
+
+    def test_home_page_cache_hit(self):
+        with override_settings(PAGE_CACHE_SECONDS=600):
+            result = self.measure(self.pages["home"].url)
+        self.assertBudget("page.home.cached", result, queries=0)
+
+    def test_search(self):
+        result = self.measure("/sok/?query=moms")
+        self.assertBudget("page.search", result, queries=13)
+        self.assertContains(self.client.get("/sok/?query=moms"), "Nyhet om moms och skatter 0")
+
+        # Statistiken buffras i processen och skrivs i klump utanför requesten
+        with self.captureOnCommitCallbacks(execute=True):
+            analytics.flush()
+        self.assertEqual(SearchQueryStat.objects.get(query_string="moms").hits, self.runs + 2)
+
+    def test_api_search_suggest(self):
+        suggest.invalidate()
+        result = self.measure("/api/search/suggest/?query=integ")
+        self.assertBudget("api.search_suggest", result, queries=0)
+
+    def test_robots(self):
+        self.assertBudget("url.robots", self.measure("/robots.txt"), queries=0)
+
+    def test_security_txt(self):
+        self.assertBudget("url.security_txt", self.measure("/.well-known/security.txt"), queries=0)
+
+    def test_api_instagram(self):
+        self.assertBudget("api.instagram", self.measure("/api/instagram/"), queries=0)
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    """core.W001 – cachen måste delas mellan processer och ha atomisk add()."""
+
+    LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    FILE = {"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": "/tmp/x"}}
+    DB = {"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "cache"}}
+
+    def warning_ids(self, caches, workers):
+        with override_settings(CACHES=caches, WEB_CONCURRENCY=workers):
+            return [w.id for w in core_checks.check_shared_cache(None)]
+
+    def test_locmem_warns_only_with_several_workers(self):
+        self.assertEqual(self.warning_ids(self.LOCMEM, 1), [])
+        self.assertEqual(self.warning_ids(self.LOCMEM, 3), ["core.W001"])
+
+    def test_file_cache_always_warns(self):
+        self.assertEqual(self.warning_ids(self.FILE, 1), ["core.W001"])
+        self.assertEqual(self.warning_ids(self.FILE, 3), ["core.W001"])
+
+    def test_db_cache_passes(self):
+        self.assertEqual(self.warning_ids(self.DB, 3), [])
+
+    def test_hint_does_not_recommend_file_cache(self):
+        with override_settings(CACHES=self.LOCMEM, WEB_CONCURRENCY=3):
+            hint = core_checks.check_shared_cache(None)[0].hint
+        self.assertNotIn("file", hint)
+
+
+class PooledSMTPBackendTests(SimpleTestCase):
+    """core.mail.PooledSMTPBackend mot den lokala SMTP-stubben."""
+
+    def setUp(self):
+        self.server = LocalSMTPServer().start()
+        self.addCleanup(self.server.stop)
+        pooled_mail.close_pool()
+        pooled_mail.stats.reset()
+        self.addCleanup(pooled_mail.close_pool)
+        settings = override_settings(
+            EMAIL_HOST="127.0.0.1", EMAIL_PORT=self.server.port, EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="", EMAIL_HOST_PASSWORD="", EMAIL_POOL_BACKOFF=0,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def messages(self, n):
+        return [EmailMessage("Test", "Hej!", "noreply@harpans.se", [f"kund{i}@example.se"]) for i in range(n)]
+
+    def test_connection_is_reused(self):
+        backend = pooled_mail.PooledSMTPBackend()
+        self.assertEqual(backend.send_messages(self.messages(2)), 2)
+        self.assertEqual(backend.send_messages(self.messages(1)), 1)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(pooled_mail.stats.snapshot()["connections_reused"], 1)
+
+    def test_retries_temporary_failure(self):
+        self.server.fail_next = 1
+        self.assertEqual(pooled_mail.PooledSMTPBackend().send_messages(self.messages(1)), 1)
+        self.assertEqual(len(self.server.messages), 1)
+        self.assertEqual(pooled_mail.stats.snapshot()["retries"], 1)
+
+    def test_no_retry_on_permanent_failure(self):
+        self.server.fail_next, self.server.fail_code = 1, 550
+        with self.assertRaises(smtplib.SMTPSenderRefused) as raised:
+            pooled_mail.PooledSMTPBackend().send_messages(self.messages(1))
+        self.assertEqual(raised.exception.smtp_code, 550)
+        self.assertEqual(pooled_mail.stats.snapshot()["retries"], 0)
+        self.assertEqual(self.server.messages, [])
+
+    @override_settings(EMAIL_POOL_PARALLEL=3, EMAIL_POOL_PARALLEL_THRESHOLD=2)
+    def test_send_iter_reports_each_message_in_parallel(self):
+        self.server.fail_next, self.server.fail_code = 1, 550
+        messages = self.messages(9)
+        results = list(pooled_mail.PooledSMTPBackend().send_iter(messages))
+        self.assertCountEqual([message for message, _, _ in results], messages)
+        self.assertEqual(sum(1 for _, sent, error in results if sent and error is None), 8)
+        self.assertEqual(len(self.server.messages), 8)
+        self.assertEqual(self.server.connections, 3)
+
+
+@override_settings(PAGE_CACHE_SECONDS=600)
+class PageCacheTests(TestCase):
+    """core.page_cache: invalidering, vem som får cachade svar, CSRF och 304."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.pages = build_site(blog_posts=2, team_members=2, feed_urls=["https://www.skatteverket.se/rss/moms"])
+
+    def setUp(self):
+        cache.clear()
+
+    def cache_status(self, url, client=None, **extra):
+        return (client or self.client).get(url, **extra).get("X-Page-Cache")
+
+    def assertCached(self, *urls):
+        for url in urls:
+            self.cache_status(url)
+            self.assertEqual(self.cache_status(url), "hit", url)
+
+    def test_publishing_post_invalidates_blog_index_and_home(self):
+        home, blog = self.pages["home"].url, self.pages["blog"].url
+        self.assertCached(home, blog)
+
+        self.pages["post"].save_revision().publish()
+        self.assertEqual(self.cache_status(blog), "miss")
+        self.assertEqual(self.cache_status(home), "miss")
+
+    def test_navigation_settings_save_drops_every_entry(self):
+        urls = [self.pages[name].url for name in ("home", "services", "contact", "post")]
+        self.assertCached(*urls)
+
+        NavigationSettings.objects.get().save()
+        for url in urls:
+            self.assertEqual(self.cache_status(url), "miss", url)
+
+    def test_editor_with_session_bypasses_cache(self):
+        from django.contrib.auth import get_user_model
+
+        editor = Client()
+        editor.force_login(get_user_model().objects.create_superuser("redaktor", "red@harpans.se", "lösen"))
+        home = self.pages["home"].url
+        self.assertIsNone(self.cache_status(home, editor))
+        self.assertIsNone(self.cache_status(home, editor))
+        # Redaktörens svar sparades inte
+        self.assertEqual(self.cache_status(home), "miss")
+
+    def test_csrf_placeholder_is_replaced_per_visitor(self):
+        home = self.pages["home"].url
+        Client().get(home)
+
+        visitor = Client()
+        response = visitor.get(home)
+        self.assertEqual(response["X-Page-Cache"], "hit")
+        html = response.content.decode()
+        self.assertNotIn(page_cache.CSRF_PLACEHOLDER, html)
+        tokens = re.findall(r'name="csrfmiddlewaretoken" value="([^"]+)"', html)
+        self.assertTrue(tokens)
+        secret = visitor.cookies["csrftoken"].value
+        self.assertTrue(all(_does_token_match(token, secret) for token in tokens))
+
+    def test_not_modified_only_with_csrf_cookie(self):
+        home = self.pages["home"].url
+        etag = self.client.get(home)["ETag"]
+
+        self.assertEqual(self.client.get(home, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # Utan CSRF-cookie skulle webbläsarens kopia ha en token som inte gäller
+        response = Client().get(home, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Page-Cache"], "hit")
+
+    def test_aktuellt_not_stored_while_loading(self):
+        aktuellt = self.pages["aktuellt"].url
+        with mock.patch("core.services.skv_rss.get_many_rss_items", return_value=[None]):
+            response = self.client.get(aktuellt)
+            self.assertIn("no-cache", response["Cache-Control"])
+            self.assertIsNone(response.get("X-Page-Cache"))
+            self.assertIsNone(self.cache_status(aktuellt))
+
+        # När flödena finns sparas sidan som vanligt
+        with mock.patch("core.services.skv_rss.get_many_rss_items", return_value=[[]]):
+            self.assertCached(aktuellt)
+
+
+@override_settings(BLOCK_CACHE_SECONDS=600, PAGE_CACHE_SECONDS=0)
+class BlockCacheTests(TestCase):
+    """core.block_cache: träffar, ny revision och buffrad statistik."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.pages = build_site(blog_posts=1, team_members=0)
+
+    def setUp(self):
+        cache.clear()
+        block_cache.reset_stats()
+        block_cache.flush()
+        self.post = self.pages["post"]
+        self.blocks = len(self.post.body)
+
+    def body(self):
+        # CSRF-token maskeras om per request
+        return re.sub(rb'value="[^"]{64}"', b"", self.client.get(self.post.url).content)
+
+    def test_second_render_is_served_from_cache(self):
+        first = self.body()
+        self.assertEqual(block_cache.get_stats()["misses"], self.blocks)
+
+        with mock.patch.object(block_cache, "_render", side_effect=AssertionError("renderades igen")):
+            second = self.body()
+        self.assertEqual(first, second)
+        self.assertEqual(block_cache.get_stats()["hits"], self.blocks)
+
+    def test_new_revision_renders_again(self):
+        self.client.get(self.post.url)
+        self.post.body[0] = ("heading", "Ny rubrik efter publicering")
+        self.post.save_revision().publish()
+
+        self.assertContains(self.client.get(self.post.url), "Ny rubrik efter publicering")
+        self.assertEqual(block_cache.get_stats()["misses"], 2 * self.blocks)
+
+    def test_stats_are_buffered_in_process(self):
+        self.client.get(self.post.url)
+        self.client.get(self.post.url)
+        # Inget skrivet till cachen under requesten – räknarna skickas i klump
+        self.assertIsNone(cache.get(block_cache.STATS_KEYS["misses"]))
+        block_cache.flush()
+        self.assertEqual(cache.get(block_cache.STATS_KEYS["misses"]), self.blocks)
+        self.assertEqual(cache.get(block_cache.STATS_KEYS["hits"]), self.blocks)
+
+    def test_only_fast_cache_backends(self):
+        request = RequestFactory().get(self.post.url)
+        self.assertEqual(block_cache.cache_revision(self.post, request), self.post.live_revision_id)
+        with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "cache"}}):
+            self.assertIsNone(block_cache.cache_revision(self.post, request))
+
+
+@override_settings(PAGE_CACHE_SECONDS=0)
+class SuggestIndexTests(TestCase):
+    """search.suggest: ett ombygge i taget, föregående index under tiden, svarstid."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.pages = build_site(blog_posts=20, team_members=0)
+
+    def setUp(self):
+        cache.clear()
+        suggest._current = suggest.EMPTY
+        suggest._lookup.cache_clear()
+
+    def titles(self, query):
+        return [title for title, _ in suggest.suggest(query)]
+
+    def test_rebuild_releases_lock(self):
+        self.assertIn("Integritetspolicy", self.titles("integ"))
+        self.assertIsNone(cache.get(suggest.REBUILD_LOCK_KEY))
+        self.assertIsNotNone(cache.get(suggest.VERSION_KEY))
+
+    def test_previous_index_served_while_rebuilding(self):
+        self.titles("integ")
+        suggest.invalidate()
+        cache.add(suggest.REBUILD_LOCK_KEY, 1)   # en annan worker bygger
+        with mock.patch.object(suggest, "build_index", side_effect=AssertionError("byggdes två gånger")):
+            self.assertIn("Integritetspolicy", self.titles("integ"))
+            # Ny process utan index i minnet: senaste bygget ur cachen
+            suggest._current = suggest.EMPTY
+            self.assertIn("Integritetspolicy", self.titles("integ"))
+
+    def test_no_suggestions_before_first_build(self):
+        cache.add(suggest.REBUILD_LOCK_KEY, 1)
+        with mock.patch.object(suggest, "build_index", side_effect=AssertionError("byggdes under låset")):
+            self.assertEqual(self.titles("integ"), [])
+
+    def test_suggest_p99_under_20_ms(self):
+        prefixes = ["ny", "nyh", "mo", "mom", "moms", "sk", "ska", "in", "int", "tj", "te", "ko", "om m", "xyz"]
+        self.client.get("/api/search/suggest/?query=ny")    # bygger indexet
+        times = []
+        for i in range(300):
+            start = time.perf_counter()
+            self.client.get(f"/api/search/suggest/?query={prefixes[i % len(prefixes)]}")
+            times.append((time.perf_counter() - start) * 1000)
+        p99 = statistics.quantiles(times, n=100)[98]
+        self.assertLess(p99, 20, f"p99 {p99:.1f} ms")
+
+
+@override_settings(RSS_ALLOWED_HOSTS={"127.0.0.1"}, RSS_FETCH_ON_REQUEST=True)
+class RssFeedStoreTests(TestCase):
+    """core.services.skv_rss mot den lokala RSS-stubben."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.rss = LocalRSSServer(items=5).start()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.rss.stop()
+
+    def setUp(self):
+        cache.clear()
+        skv_rss.reset_stats()
+        self.url = self.rss.url("moms")
+        self.feed = RssFeed.objects.create(url=self.url)
+
+    def make_stale(self):
+        RssFeed.objects.filter(pk=self.feed.pk).update(fresh_until=django_timezone.now() - timedelta(seconds=1))
+
+    def read(self):
+        """En request-läsning; bakgrundsuppdateringar fångas i stället för att köras."""
+        with mock.patch.object(skv_rss._executor, "submit") as submit:
+            items = skv_rss.get_many_rss_items([(self.url, 3)])[0]
+        return items, submit
+
+    def test_fresh_feed_is_a_hit(self):
+        skv_rss.refresh_feed(self.feed)
+        requests = self.rss.requests
+        items, submit = self.read()
+        self.assertEqual([item["title"] for item in items], ["moms nyhet 0", "moms nyhet 1", "moms nyhet 2"])
+        submit.assert_not_called()
+        self.assertEqual(self.rss.requests, requests)
+        self.assertEqual(skv_rss.get_stats()["hit"], 1)
+
+    def test_stale_feed_served_while_one_refresh_runs(self):
+        skv_rss.refresh_feed(self.feed)
+        self.make_stale()
+        requests = self.rss.requests
+
+        items, submit = self.read()
+        # Lagrade inlägg direkt – hämtningen är köad, inte väntad på
+        self.assertEqual(len(items), 3)
+        self.assertEqual(self.rss.requests, requests)
+        submit.assert_called_once()
+        self.assertIsNotNone(cache.get(skv_rss.lock_key(self.feed)))
+
+        # Låset är taget: nästa läsning köar ingen ny hämtning
+        items, submit = self.read()
+        self.assertEqual(len(items), 3)
+        submit.assert_not_called()
+        self.assertEqual(skv_rss.get_stats()["stale"], 2)
+
+    def test_background_refresh_releases_lock(self):
+        self.make_stale()
+        cache.add(skv_rss.lock_key(self.feed), 1, skv_rss.LOCK_SECONDS)
+        with mock.patch.object(skv_rss, "connection"):
+            info = skv_rss._refresh_in_background(self.feed, 1800)
+        self.assertTrue(info["ok"])
+        self.assertIsNone(cache.get(skv_rss.lock_key(self.feed)))
+        self.feed.refresh_from_db()
+        self.assertGreater(self.feed.fresh_until, django_timezone.now())
+
+    def test_conditional_get(self):
+        first = skv_rss.refresh_feed(self.feed)
+        self.assertEqual((first["status"], first["items"]), (200, 5))
+        self.feed.refresh_from_db()
+        self.assertEqual(self.feed.etag, '"moms-5"')
+        self.assertEqual(self.feed.last_modified, "Wed, 01 Jan 2025 12:00:00 GMT")
+        version = cache.get(skv_rss.TIMELINE_VERSION_KEY)
+
+        second = skv_rss.refresh_feed(self.feed)
+        self.assertEqual(self.rss.last_headers["If-None-Match"], '"moms-5"')
+        self.assertEqual(self.rss.last_headers["If-Modified-Since"], "Wed, 01 Jan 2025 12:00:00 GMT")
+        self.assertEqual((second["status"], second["items"]), (304, 0))
+        self.assertEqual(cache.get(skv_rss.TIMELINE_VERSION_KEY), version)
+        self.assertEqual(self.feed.items.count(), 5)
+        self.assertEqual(skv_rss.get_stats()["not_modified"], 1)
+
+    def test_same_guid_updates_row_and_keeps_history(self):
+        skv_rss.refresh_feed(self.feed)
+        self.feed.items.filter(guid="moms-0").update(title="Gammal rubrik")
+
+        # Flödet visar nu bara de 3 senaste – samma guid:er som förut
+        self.addCleanup(setattr, self.rss, "items", self.rss.items)
+        self.rss.items = 3
+        self.feed.refresh_from_db()
+        skv_rss.refresh_feed(self.feed)
+
+        self.assertEqual(self.feed.items.count(), 5)
+        self.assertEqual(self.feed.items.get(guid="moms-0").title, "moms nyhet 0")
+        self.assertTrue(self.feed.items.filter(guid="moms-4").exists())
+
+    def test_latest_items_put_undated_last(self):
+        skv_rss.refresh_feed(self.feed)
+        self.feed.items.create(guid="utan-datum", title="Utan datum")
+        titles = [item["title"] for item in skv_rss.get_latest_items(self.feed, 6)]
+        self.assertEqual(titles, [f"moms nyhet {i}" for i in range(5)] + ["Utan datum"])
+
+    def test_merge_timeline_newest_first_ties_by_id(self):
+        day = django_timezone.now().replace(microsecond=0)
+        moms = [
+            {"id": 4, "title": "m4", "published_dt": day},
+            {"id": 1, "title": "m1", "published_dt": day - timedelta(days=2)},
+            {"id": 7, "title": "m7", "published_dt": None},
+        ]
+        skatt = [
+            {"id": 5, "title": "s5", "published_dt": day},
+            {"id": 3, "title": "s3", "published_dt": day - timedelta(days=1)},
+        ]
+        timeline = skv_rss.merge_timeline([("Moms", moms), ("Skatt", skatt)], 10)
+        self.assertEqual([item["title"] for item in timeline], ["s5", "m4", "s3", "m1", "m7"])
+        self.assertEqual(timeline[0]["source"], "Skatt")
+        self.assertEqual(len(skv_rss.merge_timeline([("Moms", moms), ("Skatt", skatt)], 2)), 2)
+
+    def test_timeline_rebuilt_only_after_new_items(self):
+        sections = lambda: [("Moms", skv_rss.get_latest_items(self.feed, 3))]
+        merge = mock.patch.object(skv_rss, "merge_timeline", wraps=skv_rss.merge_timeline)
+        skv_rss.refresh_feed(self.feed)
+        with merge as merged:
+            skv_rss.get_timeline("sida", sections(), 3)
+            skv_rss.get_timeline("sida", sections(), 3)
+            self.assertEqual(merged.call_count, 1)
+
+            # 304 – inga nya inlägg, samma tidslinje
+            skv_rss.refresh_feed(self.feed)
+            skv_rss.get_timeline("sida", sections(), 3)
+            self.assertEqual(merged.call_count, 1)
+
+            # Nya inlägg räknar upp versionen
+            self.feed.etag = self.feed.last_modified = ""
+            skv_rss.refresh_feed(self.feed)
+            skv_rss.get_timeline("sida", sections(), 3)
+            self.assertEqual(merged.call_count, 2)
+
+    def test_timeline_key_follows_page_revision(self):
+        page = build_site(blog_posts=0, team_members=0, feed_urls=[self.url])["aktuellt"]
+        skv_rss.refresh_feed(self.feed)
+        request = RequestFactory().get(page.url)
+        with mock.patch.object(skv_rss, "merge_timeline", wraps=skv_rss.merge_timeline) as merged:
+            page.get_context(request)
+            page.get_context(request)
+            self.assertEqual(merged.call_count, 1)
+
+            page.save_revision()
+            page.get_context(request)
+            self.assertEqual(merged.call_count, 2)
+
+    def test_stats_are_shared_through_cache(self):
+        skv_rss.refresh_feed(self.feed)
+        self.read()
+        # Inget skrivet till cachen förrän processen skickar sina räknare
+        self.assertIsNone(cache.get(skv_rss.STATS_KEYS["hit"]))
+        skv_rss.flush_stats()
+        self.assertEqual(cache.get(skv_rss.STATS_KEYS["hit"]), 1)
+        self.assertEqual(cache.get(skv_rss.STATS_KEYS["refresh"]), 1)
+
+        out = StringIO()
+        call_command("rss_stats", "--reset", stdout=out)
+        self.assertIn("Färska:           1 (100.0%)", out.getvalue())
+        self.assertEqual(skv_rss.get_stats()["hit"], 0)
+
+
+class RenditionWarmingTests(PerfTestCase):
+    """Renditions förgenereras vid publicering (core.tasks) och av warm_renditions."""
+
+    def specs(self, image):
+        return set(image.renditions.values_list("filter_spec", flat=True))
+
+    def warm(self, *args):
+        out = StringIO()
+        call_command("warm_renditions", *args, stdout=out)
+        return out.getvalue()
+
+    def test_publish_creates_template_renditions(self):
+        # Hero, teamfoton och bildblock i blogginlägg – samma bild på alla sidor
+        with self.captureOnCommitCallbacks(execute=True):
+            pages = build_site(blog_posts=1, team_members=1)
+        self.assertEqual(
+            self.specs(pages["image"]),
+            {*renditions.HERO_SPECS, *renditions.TEAM_PHOTO_SPECS, *renditions.BLOG_BODY_SPECS},
+        )
+
+        # "Om oss": bildblock och team_highlight har egna format
+        about = Image.objects.create(title="Kontoret", file=get_test_image_file())
+        highlight = Image.objects.create(title="Värderingar", file=get_test_image_file())
+        team = pages["team"]
+        team.about_content = [
+            ("image", about),
+            ("team_highlight", {"title": "Våra värderingar", "text": RichText("<p>Nära och personligt.</p>"),
+                                "image": highlight}),
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            team.save_revision().publish()
+        self.assertEqual(self.specs(about), set(renditions.TEAM_ABOUT_SPECS["image"]))
+        self.assertEqual(self.specs(highlight), set(renditions.TEAM_ABOUT_SPECS["team_highlight"]))
+
+    def test_command_without_images(self):
+        legal = Page.objects.get(depth=1).add_child(instance=LegalPage(title="Villkor", slug="villkor"))
+        legal.save_revision().publish()
+        self.assertEqual(renditions.page_images(legal), {})
+
+        with mock.patch.object(warm_renditions, "ProcessPoolExecutor") as pool:
+            output = self.warm()
+        pool.assert_not_called()
+        self.assertIn("0 bilder, 0 renditions att kontrollera", output)
+        self.assertIn("✓ Inga bilder att förgenerera", output)
+
+    def test_command_dry_run_lists_specs(self):
+        pages = build_site(blog_posts=0, team_members=0)
+        output = self.warm("--dry-run")
+        self.assertIn(f"1 bilder, {len(renditions.HERO_SPECS)} renditions att kontrollera", output)
+        self.assertIn(f"#{pages['image'].pk}: {', '.join(sorted(renditions.HERO_SPECS))}", output)
+        self.assertFalse(pages["image"].renditions.exists())
+
+
+class LoopDone(Exception):
+    """Bryter `refresh_feeds --loop` efter första varvet."""
+
+
+@override_settings(RSS_ALLOWED_HOSTS={"127.0.0.1"})
+class RefreshFeedsCommandTests(TransactionTestCase):
+    """manage.py refresh_feeds – hämtar i trådar, så testet committar på riktigt."""
+
+    serialized_rollback = True      # Wagtails rotsida och rotsamling från migreringarna
+
+    @classmethod
+    def setUpClass(cls):
+        cls.rss = LocalRSSServer(items=5).start()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.rss.stop()
+
+    def setUp(self):
+        cache.clear()
+        self.urls = [self.rss.url("moms"), self.rss.url("skatt")]
+        self.pages = build_site(blog_posts=0, team_members=0, feed_urls=self.urls + ["https://example.com/rss.xml"])
+
+    def refresh(self, *args):
+        out = StringIO()
+        call_command("refresh_feeds", *args, stdout=out)
+        return out.getvalue()
+
+    def test_discovers_allowed_urls_on_live_pages(self):
+        draft = self.pages["home"].add_child(instance=AktuelltPage(
+            title="Utkast", slug="utkast", live=False,
+            feeds=[("feed", {"title": "Utkast", "feed_url": self.rss.url("utkast"), "max_items": 5, "note": ""})],
+        ))
+        self.assertFalse(draft.live)
+        self.assertEqual(refresh_feeds.discover_feed_urls(), self.urls)
+
+    def test_fresh_feeds_pass(self):
+        output = self.refresh()
+        self.assertIn("✓ 2/2 flöden uppdaterade", output)
+        self.assertEqual(RssFeed.objects.get(url=self.urls[0]).items.count(), 5)
+
+    def test_stale_feeds_raise(self):
+        with mock.patch.object(skv_rss, "fetch_feed", side_effect=ConnectionError("nere")):
+            with self.assertRaisesMessage(CommandError, "2 flöden är inaktuella"):
+                self.refresh()
+
+    def test_loop_keeps_running_with_stale_feeds(self):
+        with mock.patch.object(skv_rss, "fetch_feed", side_effect=ConnectionError("nere")), \
+                mock.patch.object(refresh_feeds.time, "sleep", side_effect=LoopDone) as sleep:
+            with self.assertRaises(LoopDone):
+                self.refresh("--loop", "600")
+        sleep.assert_called_once_with(600)
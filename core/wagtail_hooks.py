@@ -0,0 +1,7 @@
+from wagtail import hooks
+
+
+@hooks.register('before_serve_page')
+def mark_page_for_cache(page, request, serve_args, serve_kwargs):
+    # Talar om för PageCacheMiddleware vilken sida svaret hör till
+    request.page_cache_page = page
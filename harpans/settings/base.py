@@ -28,10 +28,12 @@ INSTALLED_APPS = [
     'team',
     'blog.apps.BlogConfig',
     'contact',
+    'search',
     
     'wagtail.contrib.forms',
     'wagtail.contrib.redirects',
     'wagtail.contrib.settings',
+    'wagtail.contrib.search_promotions',
     'wagtail.embeds',
     'wagtail.sites',
     'wagtail.users',
@@ -45,6 +47,8 @@ INSTALLED_APPS = [
     'modelcluster',
     'taggit',
     'django_htmx',
+    'django_tasks',
+    'django_tasks.backends.database',
     
     'django.contrib.admin',
     'django.contrib.auth',
@@ -66,6 +70,7 @@ MIDDLEWARE = [
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'wagtail.contrib.redirects.middleware.RedirectMiddleware',
     'django_htmx.middleware.HtmxMiddleware',
+    'core.page_cache.PageCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'harpans.urls'
@@ -145,6 +150,79 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@harpans.se')
 
+# SMTP-pool (core.mail.PooledSMTPBackend)
+EMAIL_POOL_SIZE = config('EMAIL_POOL_SIZE', default=4, cast=int)            # varma connections per process
+EMAIL_POOL_PARALLEL = config('EMAIL_POOL_PARALLEL', default=4, cast=int)    # connections för stora utskick
+EMAIL_POOL_RETRIES = config('EMAIL_POOL_RETRIES', default=3, cast=int)
+EMAIL_POOL_BACKOFF = config('EMAIL_POOL_BACKOFF', default=0.5, cast=float)  # sekunder, dubblas per försök
+EMAIL_POOL_MAX_IDLE = 60                                                    # NOOP-kontroll efter så här många sekunder
+
+# Bakgrundsjobb (django-tasks) – kör worker med `python manage.py db_worker`
+TASKS = {
+    'default': {
+        'BACKEND': config('TASKS_BACKEND', default='django_tasks.backends.database.DatabaseBackend'),
+    }
+}
+
+# Skatteverkets RSS-flöden (core.services.skv_rss)
+# Sätt till False när `python manage.py refresh_feeds --loop 600` körs som service –
+# då läser sidorna bara databasen och rör aldrig nätverket.
+RSS_FETCH_ON_REQUEST = config('RSS_FETCH_ON_REQUEST', default=True, cast=bool)
+
+# Gallring av kontaktförfrågningar (GDPR) – `python manage.py prune_submissions`
+CONTACT_RETENTION_DAYS = config('CONTACT_RETENTION_DAYS', default=365, cast=int)        # raderas efter
+CONTACT_IP_RETENTION_DAYS = config('CONTACT_IP_RETENTION_DAYS', default=30, cast=int)   # IP-adress tas bort efter
+
+# Cache – måste delas mellan gunicorn-workers (rate limits, RSS-lås, helsidescache).
+# CACHE_BACKEND: redis (kräver REDIS_URL) | db (kräver `createcachetable`) | file | locmem
+# (file saknar atomisk add() – ger varningen core.W001, använd inte i produktion)
+REDIS_URL = config('REDIS_URL', default='')
+CACHE_BACKEND = config('CACHE_BACKEND', default='redis' if REDIS_URL else 'locmem')
+CACHE_VERSION = config('CACHE_VERSION', default=1, cast=int)   # höj för att ogiltigförklara all cache
+CACHE_BACKENDS = {
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        # Redis nere ska ge cachemiss, inte hängande requests
+        'OPTIONS': {'socket_connect_timeout': 2, 'socket_timeout': 2},
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'harpans_cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('CACHE_DIR', default='/var/tmp/harpans_cache'),
+    },
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+CACHES = {
+    'default': {**CACHE_BACKENDS[CACHE_BACKEND], 'KEY_PREFIX': 'harpans', 'VERSION': CACHE_VERSION},
+}
+
+# Antal gunicorn-workers (gunicorn läser samma variabel) – används av core.checks
+WEB_CONCURRENCY = config('WEB_CONCURRENCY', default=1, cast=int)
+
+# Helsidescache för anonyma besökare (core.page_cache) – 0 stänger av
+PAGE_CACHE_SECONDS = config('PAGE_CACHE_SECONDS', default=600, cast=int)
+
+# Sök (search.views) – Wagtails databasbackend: PostgreSQL-fulltext i produktion
+# (tsvector med svensk stemming, GIN-index, fältvikter via boost i search_fields),
+# SQLite FTS5 i dev och tester. Efter ändrade search_fields: `manage.py update_index`
+WAGTAILSEARCH_BACKENDS = {
+    'default': {
+        'BACKEND': 'wagtail.search.backends.database',
+        'SEARCH_CONFIG': 'swedish',
+    }
+}
+
+# Fragmentcache för StreamField-block per publicerad revision (core.block_cache) – 0 stänger av.
+# Används bara med CACHE_BACKEND=redis/locmem; med db renderas blocken direkt.
+BLOCK_CACHE_SECONDS = config('BLOCK_CACHE_SECONDS', default=24 * 60 * 60, cast=int)
+
 # Security
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
@@ -152,6 +230,8 @@ X_FRAME_OPTIONS = 'SAMEORIGIN'
 
 # Instagram
 INSTAGRAM_ACCESS_TOKEN = config('INSTAGRAM_ACCESS_TOKEN', default='')
+# Hur ofta flödet hämtas om i bakgrunden (contact.instagram) – requests anropar aldrig Instagram
+INSTAGRAM_REFRESH_SECONDS = config('INSTAGRAM_REFRESH_SECONDS', default=3600, cast=int)
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
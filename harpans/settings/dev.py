@@ -5,6 +5,17 @@ ALLOWED_HOSTS = ['localhost', '127.0.0.1']
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# Kör bakgrundsjobb direkt i dev (ingen worker behövs)
+TASKS = {
+    'default': {
+        'BACKEND': 'django_tasks.backends.immediate.ImmediateBackend',
+    }
+}
+
+# Ingen helsides- eller blockcache i dev – templateändringar ska synas direkt
+PAGE_CACHE_SECONDS = 0
+BLOCK_CACHE_SECONDS = 0
+
 # Debug Toolbar
 try:
     import debug_toolbar
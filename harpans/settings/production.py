@@ -38,6 +38,12 @@ DATABASES = {
     }
 }
 
+# Cache – delad mellan workers: Redis om REDIS_URL är satt, annars databasen
+CACHE_BACKEND = config('CACHE_BACKEND', default='redis' if REDIS_URL else 'db')
+CACHES = {
+    'default': {**CACHE_BACKENDS[CACHE_BACKEND], 'KEY_PREFIX': 'harpans', 'VERSION': CACHE_VERSION},
+}
+
 # Static files
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATIC_URL = '/static/'
@@ -48,7 +54,7 @@ MEDIA_ROOT = BASE_DIR / 'media'
 MEDIA_URL = '/media/'
 
 # Email
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='core.mail.PooledSMTPBackend')
 EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')
 EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
 EMAIL_USE_TLS = True
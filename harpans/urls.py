@@ -10,6 +10,7 @@ from wagtail.documents import urls as wagtaildocs_urls
 
 from contact.views import contact_form_submit, instagram_feed, callback_request
 from blog.views import blog_subscribe, blog_unsubscribe
+from search.views import search, search_suggest
 
 
 # --- Extra “utility” views ---
@@ -21,6 +22,8 @@ def robots_txt(request):
         # Blocka admin-paneler
         "Disallow: /harpans-kontor/",
         "Disallow: /harpans-django-backend/",
+        # Sökresultat är oändligt många URL:er
+        "Disallow: /sok/",
     ]
     return HttpResponse("\n".join(lines), content_type="text/plain")
 
@@ -43,11 +46,13 @@ urlpatterns = [
     path("documents/", include(wagtaildocs_urls)),
     path("api/blog/subscribe/", blog_subscribe, name="blog_subscribe"),
     path("blog/unsubscribe/<str:token>/", blog_unsubscribe, name="blog_unsubscribe"),
+    path("sok/", search, name="search"),
 
     # API endpoints
     path("api/contact/", contact_form_submit, name="contact_submit"),
     path("api/callback-request/", callback_request, name="callback_request"),
     path("api/instagram/", instagram_feed, name="instagram_feed"),
+    path("api/search/suggest/", search_suggest, name="search_suggest"),
 
     # robots.txt & security.txt
     path("robots.txt", robots_txt, name="robots_txt"),
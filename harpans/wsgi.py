@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "harpans.settings.dev")
 
 application = get_wsgi_application()
+
+from core.checks import log_startup_warnings  # noqa: E402 (kräver laddade appar)
+
+log_startup_warnings()
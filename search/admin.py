@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from .models import SearchQueryStat
+
+
+@admin.register(SearchQueryStat)
+class SearchQueryStatAdmin(admin.ModelAdmin):
+    list_display = ('query_string', 'date', 'hits', 'zero_results', 'avg_ms_display', 'max_ms')
+    list_filter = ('date',)
+    search_fields = ('query_string',)
+    date_hierarchy = 'date'
+    readonly_fields = ('query_string', 'date', 'hits', 'zero_results', 'total_ms', 'max_ms')
+
+    @admin.display(description='Snittid (ms)')
+    def avg_ms_display(self, obj):
+        return f'{obj.avg_ms:.1f}'
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,61 @@
+# search/analytics.py
+"""
+Buffrad sökstatistik. Varje sökning räknas i processens minne (antal,
+noll träffar, svarstid) och buffern skickas i klump till
+search.tasks.write_search_stats – högst en gång per FLUSH_SECONDS eller
+när MAX_BUFFERED_QUERIES olika frågor samlats, och när processen avslutas.
+
+Statistiken matar Wagtails sökpromotions (populära sökord i admin) och
+`manage.py search_report` (långsammaste och mest missade frågorna).
+"""
+import atexit
+import threading
+import time
+
+from django.db import transaction
+from django.utils import timezone
+from wagtail.search.utils import normalise_query_string
+
+# --- Konfiguration ---
+FLUSH_SECONDS = 60
+MAX_BUFFERED_QUERIES = 500
+
+_buffer = {}            # (fråga, datum) -> [sökningar, noll träffar, total ms, max ms]
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def record(query, elapsed_ms, result_count):
+    """Räknar en sökning. Skickar buffern när det är dags (efter commit)."""
+    query = normalise_query_string(query)
+    if not query:
+        return
+    key = (query, timezone.localdate().isoformat())
+
+    with _lock:
+        stat = _buffer.setdefault(key, [0, 0, 0.0, 0.0])
+        stat[0] += 1
+        stat[1] += result_count == 0
+        stat[2] += elapsed_ms
+        stat[3] = max(stat[3], elapsed_ms)
+        due = len(_buffer) >= MAX_BUFFERED_QUERIES or time.monotonic() - _last_flush >= FLUSH_SECONDS
+
+    if due:
+        transaction.on_commit(flush)
+
+
+def flush():
+    """Skickar allt i buffern till bakgrundsjobbet. Returnerar antal rader."""
+    global _buffer, _last_flush
+    with _lock:
+        rows = [[query, date, *stat] for (query, date), stat in _buffer.items()]
+        _buffer = {}
+        _last_flush = time.monotonic()
+
+    if rows:
+        from .tasks import write_search_stats
+        write_search_stats.enqueue(rows)
+    return len(rows)
+
+
+atexit.register(flush)
@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import FloatField, Max, Sum
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from search import analytics
+from search.models import SearchQueryStat
+
+
+class Command(BaseCommand):
+    help = 'Visar de vanligaste, långsammaste och mest missade sökfrågorna (search.models.SearchQueryStat)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Antal dagar bakåt (standard: 30)')
+        parser.add_argument('--limit', type=int, default=10, help='Antal frågor per lista (standard: 10)')
+
+    def handle(self, *args, **options):
+        # Den här processens buffer skrivs först, så rapporten är aktuell i dev
+        analytics.flush()
+
+        since = timezone.localdate() - timedelta(days=options['days'] - 1)
+        limit = options['limit']
+        period = SearchQueryStat.objects.filter(date__gte=since)
+        stats = (
+            period.values('query_string')
+            .annotate(
+                searches=Sum('hits'),
+                misses=Sum('zero_results'),
+                slowest=Max('max_ms'),
+                avg_ms=Sum('total_ms') / Cast(Sum('hits'), FloatField()),
+            )
+        )
+
+        totals = period.aggregate(searches=Sum('hits'), misses=Sum('zero_results'))
+        self.stdout.write(f"Sökningar sedan {since}: {totals['searches'] or 0} ({totals['misses'] or 0} utan träffar)")
+
+        self._section('Vanligaste', stats.order_by('-searches', 'query_string')[:limit])
+        self._section('Långsammaste (snitt)', stats.order_by('-avg_ms', 'query_string')[:limit])
+        self._section('Utan träffar', stats.filter(misses__gt=0).order_by('-misses', 'query_string')[:limit])
+
+        self.stdout.write(self.style.SUCCESS('✓ Rapport klar'))
+
+    def _section(self, title, rows):
+        self.stdout.write(f"\n{title}:")
+        rows = list(rows)
+        if not rows:
+            self.stdout.write('  –')
+        for row in rows:
+            self.stdout.write(
+                f"  {row['query_string'][:40]:<40} {row['searches']:>6} sök  "
+                f"{row['misses']:>5} utan träff  {row['avg_ms']:>7.1f} ms snitt  {row['slowest']:>7.1f} ms max"
+            )
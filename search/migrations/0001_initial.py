@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchQueryStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query_string', models.CharField(max_length=255, verbose_name='Sökfråga')),
+                ('date', models.DateField(verbose_name='Datum')),
+                ('hits', models.PositiveIntegerField(default=0, verbose_name='Sökningar')),
+                ('zero_results', models.PositiveIntegerField(default=0, verbose_name='Utan träffar')),
+                ('total_ms', models.FloatField(default=0, verbose_name='Total tid (ms)')),
+                ('max_ms', models.FloatField(default=0, verbose_name='Längsta tid (ms)')),
+            ],
+            options={
+                'verbose_name': 'Sökstatistik',
+                'verbose_name_plural': 'Sökstatistik',
+                'indexes': [models.Index(fields=['date'], name='search_sear_date_4a5ae9_idx')],
+                'constraints': [models.UniqueConstraint(fields=('query_string', 'date'), name='search_stat_unique_query_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import models
+from wagtail.search.utils import MAX_QUERY_STRING_LENGTH
+
+
+class SearchQueryStat(models.Model):
+    """
+    Sökstatistik per fråga och dag: antal sökningar, hur många som gav
+    noll träffar och svarstid. Buffras i minnet och skrivs i klump
+    (search.analytics / search.tasks) – aldrig en skrivning per sökning.
+    """
+    query_string = models.CharField(max_length=MAX_QUERY_STRING_LENGTH, verbose_name="Sökfråga")
+    date = models.DateField(verbose_name="Datum")
+    hits = models.PositiveIntegerField(default=0, verbose_name="Sökningar")
+    zero_results = models.PositiveIntegerField(default=0, verbose_name="Utan träffar")
+    total_ms = models.FloatField(default=0, verbose_name="Total tid (ms)")
+    max_ms = models.FloatField(default=0, verbose_name="Längsta tid (ms)")
+
+    class Meta:
+        verbose_name = "Sökstatistik"
+        verbose_name_plural = "Sökstatistik"
+        constraints = [
+            models.UniqueConstraint(fields=["query_string", "date"], name="search_stat_unique_query_day"),
+        ]
+        indexes = [
+            models.Index(fields=["date"]),
+        ]
+
+    @property
+    def avg_ms(self):
+        return self.total_ms / self.hits if self.hits else 0
+
+    def __str__(self):
+        return f"{self.query_string} ({self.date})"
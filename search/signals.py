@@ -0,0 +1,19 @@
+# search/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from wagtail.models import Page
+from wagtail.signals import page_published, page_slug_changed, page_unpublished, post_page_move
+
+from . import suggest
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+@receiver(post_page_move)
+@receiver(page_slug_changed)
+@receiver(post_delete, sender=Page)
+def invalidate_suggest_index(sender, **kwargs):
+    """Titlar och URL:er i sökförslagen – kastas när ändringen är committad, byggs om vid nästa förslag."""
+    transaction.on_commit(suggest.invalidate)
@@ -0,0 +1,146 @@
+# search/suggest.py
+"""
+Sökförslag medan man skriver (/api/search/suggest/).
+
+Titlarna på alla publicerade sidor ligger i ett sorterat prefixindex: en
+post per ord i titeln (normaliserat: gemener, utan accenter, så "tjanst"
+hittar "Tjänster"). Ett prefix slås upp med bisect – ingen databas och
+ingen fulltextsökning per tangenttryckning.
+
+Indexet kastas när en sida publiceras, avpubliceras, flyttas eller tas
+bort (search.signals) och byggs om vid nästa förslag. Det sparas i
+Django-cachen under en versionstoken, så alla workers delar samma bygge.
+Bara en request i taget bygger om (lås med cache.add); övriga serverar
+föregående index under tiden i stället för att också bygga. Varje
+process håller senaste versionen i minnet, och svaren per prefix ligger
+i en LRU-cache.
+"""
+import unicodedata
+import uuid
+from bisect import bisect_left
+from functools import lru_cache
+
+from django.core.cache import cache
+from wagtail.models import Page
+
+# --- Konfiguration ---
+MAX_SUGGESTIONS = 8
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_LENGTH = 50
+MAX_SCAN = 500              # indexposter som gås igenom per prefix (korta prefix)
+LRU_SIZE = 2048             # prefix per process
+
+VERSION_KEY = "search:suggest:version"      # aktuell version, tas bort vid publicering
+LATEST_KEY = "search:suggest:latest"        # senast byggda version, serveras under ombygget
+INDEX_KEY = "search:suggest:index:{version}"
+INDEX_SECONDS = 7 * 24 * 60 * 60
+REBUILD_LOCK_KEY = "search:suggest:rebuilding"
+REBUILD_LOCK_SECONDS = 30   # längre än ett bygge; släpps direkt efteråt
+
+EMPTY = (None, ([], []))
+
+_current = (None, None)     # (version, index) i den här processen
+
+
+def normalize(text):
+    """Gemener utan diakritiska tecken: "Tjänster" → "tjanster"."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).strip()
+
+
+def build_index():
+    """
+    Bygger indexet av publicerade sidor: (keys, pages) där keys är en
+    sorterad lista med (titel från ett ord och framåt, sidindex) och pages
+    en lista med (titel, url).
+    """
+    pages, keys = [], []
+    for page in Page.objects.live().filter(depth__gt=1).only("title", "url_path", "path", "depth").order_by("path"):
+        url = page.get_url()
+        if not url:
+            continue
+        position = len(pages)
+        pages.append((page.title, url))
+        # En post per ordstart: "Nyhet om moms" hittas på "nyh", "om m" och "moms"
+        words = normalize(page.title).split()
+        keys.extend((" ".join(words[i:]), position) for i in range(len(words)))
+    keys.sort()
+    return keys, pages
+
+
+def invalidate():
+    """Nästa förslag bygger om indexet (efter publicering m.m.)."""
+    cache.delete(VERSION_KEY)
+
+
+def rebuild():
+    """Bygger om indexet under en ny version. Returnerar (version, index)."""
+    version, index = uuid.uuid4().hex, build_index()
+    cache.set(INDEX_KEY.format(version=version), index, INDEX_SECONDS)
+    cache.set_many({VERSION_KEY: version, LATEST_KEY: version}, None)
+    return version, index
+
+
+def _previous():
+    """Senast byggda index – ur processens minne, annars ur cachen."""
+    if _current[0] is not None:
+        return _current
+    version = cache.get(LATEST_KEY)
+    index = cache.get(INDEX_KEY.format(version=version)) if version else None
+    return (version, index) if index is not None else EMPTY
+
+
+def get_index():
+    """
+    (version, index) – från processens minne om versionen är oförändrad.
+    Medan en annan request bygger om serveras föregående index (eller inga
+    förslag alls, om inget index har byggts än).
+    """
+    global _current
+    version = cache.get(VERSION_KEY)
+    if version is not None and version == _current[0]:
+        return _current
+
+    index = cache.get(INDEX_KEY.format(version=version)) if version else None
+    if index is None:
+        if not cache.add(REBUILD_LOCK_KEY, 1, REBUILD_LOCK_SECONDS):
+            _current = _previous()
+            return _current
+        try:
+            version, index = rebuild()
+        finally:
+            cache.delete(REBUILD_LOCK_KEY)
+    _current = (version, index)
+    return _current
+
+
+@lru_cache(maxsize=LRU_SIZE)
+def _lookup(version, prefix):
+    # Nyckeln innehåller versionen – en ny publicering ger nya poster i LRU:n
+    current_version, index = _current
+    if current_version != version:
+        index = cache.get(INDEX_KEY.format(version=version)) or ([], [])
+    keys, pages = index
+    matches, seen = [], set()
+    start = bisect_left(keys, (prefix,))
+    for word, position in keys[start:start + MAX_SCAN]:
+        if not word.startswith(prefix):
+            break
+        if position not in seen:
+            seen.add(position)
+            matches.append(position)
+
+    # Titlar som börjar med prefixet först, sedan korta titlar
+    matches.sort(key=lambda i: (not normalize(pages[i][0]).startswith(prefix), len(pages[i][0]), i))
+    return tuple(pages[i] for i in matches[:MAX_SUGGESTIONS])
+
+
+def suggest(query):
+    """Upp till MAX_SUGGESTIONS (titel, url) för sidor vars titel har ett ord som börjar med `query`."""
+    prefix = normalize(query)[:MAX_PREFIX_LENGTH]
+    if len(prefix) < MIN_PREFIX_LENGTH:
+        return ()
+    version, _ = get_index()
+    if version is None:
+        return ()
+    return _lookup(version, prefix)
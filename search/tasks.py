@@ -0,0 +1,57 @@
+# search/tasks.py
+from datetime import date as Date
+
+from django.db import transaction
+from django_tasks import task
+from wagtail.contrib.search_promotions.models import Query, QueryDailyHits
+
+from .models import SearchQueryStat
+
+
+@task()
+def write_search_stats(rows):
+    """
+    Skriver en buffer från search.analytics i klump: rader är
+    [fråga, datum, sökningar, noll träffar, total ms, max ms]. Uppdaterar
+    både SearchQueryStat och Wagtails QueryDailyHits (sökpromotions).
+    """
+    rows = [(query, Date.fromisoformat(day), *stat) for query, day, *stat in rows]
+    queries = {row[0] for row in rows}
+    days = {row[1] for row in rows}
+
+    with transaction.atomic():
+        stats = {
+            (s.query_string, s.date): s
+            for s in SearchQueryStat.objects.select_for_update().filter(query_string__in=queries, date__in=days)
+        }
+        new = []
+        for query, day, hits, zero_results, total_ms, max_ms in rows:
+            stat = stats.get((query, day))
+            if stat is None:
+                stat = SearchQueryStat(query_string=query, date=day)
+                new.append(stat)
+            stat.hits += hits
+            stat.zero_results += zero_results
+            stat.total_ms += total_ms
+            stat.max_ms = max(stat.max_ms, max_ms)
+        SearchQueryStat.objects.bulk_create(new)
+        SearchQueryStat.objects.bulk_update(
+            [s for s in stats.values()], ["hits", "zero_results", "total_ms", "max_ms"]
+        )
+
+        # Wagtails populära sökord (underlag för sökpromotions i admin)
+        Query.objects.bulk_create([Query(query_string=q) for q in queries], ignore_conflicts=True)
+        query_ids = dict(Query.objects.filter(query_string__in=queries).values_list("query_string", "pk"))
+        daily = {
+            (d.query_id, d.date): d
+            for d in QueryDailyHits.objects.select_for_update().filter(query_id__in=query_ids.values(), date__in=days)
+        }
+        new_daily = []
+        for query, day, hits, *_ in rows:
+            entry = daily.get((query_ids[query], day))
+            if entry is None:
+                entry = QueryDailyHits(query_id=query_ids[query], date=day, hits=0)
+                new_daily.append(entry)
+            entry.hits += hits
+        QueryDailyHits.objects.bulk_create(new_daily)
+        QueryDailyHits.objects.bulk_update(list(daily.values()), ["hits"])
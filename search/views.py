@@ -1,40 +1,54 @@
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+import time
+
+from django.core.paginator import Paginator
 from django.template.response import TemplateResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_GET
 
+from wagtail.contrib.search_promotions.models import SearchPromotion
 from wagtail.models import Page
+from wagtail.search.utils import normalise_query_string
 
-# To enable logging of search queries for use with the "Promoted search results" module
-# <https://docs.wagtail.org/en/stable/reference/contrib/searchpromotions.html>
-# uncomment the following line and the lines indicated in the search function
-# (after adding wagtail.contrib.search_promotions to INSTALLED_APPS):
+from . import analytics, suggest
 
-# from wagtail.contrib.search_promotions.models import Query
+# --- Konfiguration för sök ---
+RESULTS_PER_PAGE = 10
+# COUNT:en räknar aldrig fler träffar än så (LIMIT i en subquery), så
+# pagineringen kostar lika mycket oavsett hur många sidor som matchar
+MAX_RESULTS = 200
+MAX_QUERY_LENGTH = 100
 
 
 def search(request):
-    search_query = request.GET.get("query", None)
-    page = request.GET.get("page", 1)
+    """
+    Fulltextsök över publicerade sidor (WAGTAILSEARCH_BACKENDS: PostgreSQL
+    med svensk stemming i produktion, SQLite FTS5 i dev och tester).
+    """
+    search_query = (request.GET.get("query") or "").strip()[:MAX_QUERY_LENGTH]
+    start = time.perf_counter()
 
-    # Search
     if search_query:
-        search_results = Page.objects.live().search(search_query)
-
-        # To log this query for use with the "Promoted search results" module:
-
-        # query = Query.get(search_query)
-        # query.add_hit()
-
+        search_results = Page.objects.live().search(search_query)[:MAX_RESULTS]
     else:
         search_results = Page.objects.none()
 
-    # Pagination
-    paginator = Paginator(search_results, 10)
-    try:
-        search_results = paginator.page(page)
-    except PageNotAnInteger:
-        search_results = paginator.page(1)
-    except EmptyPage:
-        search_results = paginator.page(paginator.num_pages)
+    # Ogiltigt sidnummer ger första sidan, för stort ger sista
+    paginator = Paginator(search_results, RESULTS_PER_PAGE)
+    search_results = paginator.get_page(request.GET.get("page"))
+
+    promotions = []
+    if search_query:
+        # Sökningen körs här så att tiden blir rätt i statistiken
+        search_results.object_list = list(search_results.object_list)
+        analytics.record(search_query, (time.perf_counter() - start) * 1000, paginator.count)
+
+        # Utvalda träffar (sökpromotions i admin) – läses bara, Query.get()
+        # skulle skriva en rad per ny sökfråga
+        promotions = list(
+            SearchPromotion.objects.filter(query__query_string=normalise_query_string(search_query))
+            .select_related("page")
+            .order_by("sort_order")
+        )
 
     return TemplateResponse(
         request,
@@ -42,5 +56,23 @@ def search(request):
         {
             "search_query": search_query,
             "search_results": search_results,
+            "promotions": promotions,
+            "result_count": paginator.count,
+            "more_results": paginator.count >= MAX_RESULTS,
         },
     )
+
+
+@require_GET
+@cache_control(public=True, max_age=60)
+def search_suggest(request):
+    """
+    HTMX-endpoint för sökförslag medan man skriver: de bästa titlarna för
+    prefixet i `query` som en HTML-snutt (search.suggest, ingen databas).
+    """
+    query = request.GET.get("query") or ""
+    return TemplateResponse(
+        request,
+        "search/partials/suggestions.html",
+        {"query": query, "suggestions": suggest.suggest(query)},
+    )
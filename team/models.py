@@ -222,5 +222,13 @@ class TeamPage(BasePage):
         InlinePanel('team_members', label="Teammedlemmar"),
     ]
     
+    def get_context(self, request, *args, **kwargs):
+        """Medarbetarna med foton och renditions i tre frågor, inte två per person"""
+        context = super().get_context(request, *args, **kwargs)
+        context["team_members"] = list(
+            self.team_members.select_related("photo").prefetch_related("photo__renditions")
+        )
+        return context
+
     class Meta:
         verbose_name = "Om oss"
\ No newline at end of file
@@ -1,3 +1,12 @@
-from django.test import TestCase
+from core.perf import PerfTestCase, build_site
 
-# Create your tests here.
+
+class TeamBudgetTests(PerfTestCase):
+    """Query-budget för teamsidan – 20 medarbetare med foto (foton och renditions hämtas i klump)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.pages = build_site(team_members=20)
+
+    def test_team_page(self):
+        self.assertBudget("page.team", self.measure(self.pages["team"].url), queries=17)